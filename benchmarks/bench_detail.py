@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Benchmark: log write volume and render time for each "detail" level.
+
+Renders a session transcript through the backfill pipeline (collect_last_turn
+and write_response, as the Stop hook does) once per detail level and log
+format, and prints the bytes written, the share of the full log and the time:
+
+  full        every tool input and result as is (the default)
+  compact     tool results cut to head and tail lines, with size and hash
+  summary     tool name, key parameters and sizes only
+
+By default the transcript is synthetic: --turns turns, each with a mix of
+Read, Bash, Grep, Edit and Write calls whose outputs resemble real ones.
+--transcript renders a real Claude Code transcript instead.
+
+Usage: python benchmarks/bench_detail.py [--turns 200] [--transcript PATH] [--dir PATH]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from backfill import render_transcript
+from utils import DETAIL_LEVELS
+
+SOURCE_LINE = "    result = self.handler_{n}(request, *args, timeout={n}, **kwargs)  # dispatch"
+LOG_LINE = "2026-01-01 12:00:{s:02d} INFO worker-{n} processed batch {n} in {s}ms"
+MATCH_LINE = "src/pkg/module_{n}.py:{n}:    def handler_{n}(self, request):"
+
+
+def _lines(template, count, rng):
+    return "\n".join(template.format(n=rng.randrange(10000), s=rng.randrange(60)) for _ in range(count))
+
+
+def write_transcript(path, turns, seed=1):
+    """A session of turns prompts, each answered with a typical mix of tool calls."""
+    rng = random.Random(seed)
+    ts = "2026-01-01T00:00:00.000Z"
+
+    def entry(**fields):
+        return json.dumps(dict(fields, timestamp=ts)) + "\n"
+
+    def call(f, name, tool_input, result):
+        f.write(entry(type="assistant", message={"content": [
+            {"type": "tool_use", "name": name, "input": tool_input}]}))
+        f.write(entry(type="tool_result", content=result))
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for turn in range(turns):
+            f.write(entry(type="user", message={"role": "user", "content": f"task {turn}: fix the handler"}))
+            module = f"/repo/src/pkg/module_{turn}.py"
+            call(f, "Read", {"file_path": module}, _lines(SOURCE_LINE, rng.randrange(100, 600), rng))
+            call(f, "Grep", {"pattern": "def handler_", "path": "/repo/src"},
+                 _lines(MATCH_LINE, rng.randrange(5, 80), rng))
+            call(f, "Edit", {"file_path": module, "old_string": _lines(SOURCE_LINE, 8, rng),
+                             "new_string": _lines(SOURCE_LINE, 10, rng)}, "The file has been updated.")
+            if turn % 4 == 0:
+                call(f, "Write", {"file_path": f"/repo/tests/test_{turn}.py",
+                                  "content": _lines(SOURCE_LINE, rng.randrange(50, 300), rng)},
+                     "File created successfully.")
+            call(f, "Bash", {"command": "python -m pytest -q", "description": "Run the tests"},
+                 _lines(LOG_LINE, rng.randrange(20, 2000), rng))
+            f.write(entry(type="assistant", message={"content": [
+                {"type": "text", "text": f"Fixed handler {turn}; the tests pass."}]}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200, help="turns in the synthetic transcript")
+    parser.add_argument("--transcript", help="render this transcript instead of a synthetic one")
+    parser.add_argument("--dir", default=None, help="working directory (default: system temp)")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(dir=args.dir)
+    try:
+        transcript = args.transcript
+        if not transcript:
+            transcript = os.path.join(root, "session.jsonl")
+            write_transcript(transcript, args.turns)
+        print(f"Transcript: {os.path.getsize(transcript) / 1e6:.1f} MB")
+        print(f"{'format':<10} {'detail':<9} {'written':>10} {'of full':>8} {'time':>9}")
+        for log_format, ext in (("text", "txt"), ("markdown", "md")):
+            full_size = None
+            for detail in DETAIL_LEVELS:
+                log_file = os.path.join(root, f"log-{detail}.{ext}")
+                start = time.perf_counter()
+                render_transcript(transcript, log_file, log_format, detail=detail)
+                elapsed = time.perf_counter() - start
+                size = os.path.getsize(log_file)
+                full_size = full_size or size
+                print(f"{log_format:<10} {detail:<9} {size / 1e6:>7.2f} MB {size * 100.0 / full_size:>7.1f}% "
+                      f"{elapsed * 1000:>7.0f} ms")
+                os.remove(log_file)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Benchmark: append throughput and latency for each durability mode.
+
+Several worker processes stand in for concurrent hooks (e.g. a burst of
+SubagentStart/SubagentStop events). They append hook-sized blocks to the
+session logs in one log directory through durability.open_log, the same path
+the hooks take. With --sessions 1 (default) every worker writes the same log,
+as in a subagent storm; more sessions spread the workers over several logs.
+
+Usage: python benchmarks/bench_durability.py [--workers 8] [--appends 200]
+                                             [--sessions 1] [--dir PATH] [--fsync-ms MS]
+
+Use --dir to measure on the disk that holds your logs; tmpfs (often /tmp)
+makes fsync free. The raw fsync latency of that disk is printed first: group
+commit only pays off once fsync costs more than the coordination it adds
+(about 0.1 ms). --fsync-ms adds a fixed, serialized delay to every fsync to
+model a slower device (laptop SSD, HDD, network filesystem) on a fast one.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import durability
+
+BLOCK = "~ SUBAGENT STOP (12:00:00) | type=Explore | id=agent-0123456789abcdef\n" * 3
+
+
+def _slow_fsync(delay, device_lock, fsync=os.fsync):
+    """fsync plus a fixed flush delay; flushes are serialized like on one device."""
+    import fcntl
+
+    def slow(fd):
+        fsync(fd)
+        with open(device_lock, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            time.sleep(delay)
+    return slow
+
+
+def _worker(job):
+    log_dir, session, appends, mode, fsync_delay = job
+    if fsync_delay:
+        os.fsync = _slow_fsync(fsync_delay, os.path.join(log_dir, ".device"))  # Worker process only
+    log_file = os.path.join(log_dir, f"2026-01-01_00-00-00_session{session}_conversation-log.txt")
+    latencies = []
+    for _ in range(appends):
+        start = time.perf_counter()
+        with durability.open_log(log_file, mode) as f:
+            f.write(BLOCK)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def fsync_latency(base_dir, samples=50):
+    """Median latency of a small append plus fsync on the target disk, in ms."""
+    fd, path = tempfile.mkstemp(dir=base_dir)
+    try:
+        latencies = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            os.write(fd, BLOCK.encode('utf-8'))
+            os.fsync(fd)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        os.close(fd)
+        os.remove(path)
+    return _percentile(latencies, 0.5) * 1000
+
+
+def run(mode, workers, appends, sessions, base_dir, fsync_delay=0.0):
+    log_dir = tempfile.mkdtemp(prefix=f"durability-{mode}-", dir=base_dir)
+    try:
+        with Pool(workers) as pool:
+            start = time.perf_counter()
+            results = pool.map(_worker, [(log_dir, w % sessions, appends, mode, fsync_delay)
+                                          for w in range(workers)])
+            elapsed = time.perf_counter() - start
+        commits = ""
+        lock_file = os.path.join(log_dir, durability.LOCK_NAME)
+        if os.path.exists(lock_file):
+            with open(lock_file, 'rb') as f:
+                commits = int(f.read(20) or 0)
+    finally:
+        shutil.rmtree(log_dir)
+    latencies = [value for worker in results for value in worker]
+    return {
+        "mode": mode,
+        "appends_per_s": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "commits": commits,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8, help="concurrent writer processes")
+    parser.add_argument("--appends", type=int, default=200, help="appends per writer")
+    parser.add_argument("--sessions", type=int, default=1, help="session logs the writers share")
+    parser.add_argument("--dir", default=None, help="directory on the disk to test (default: system temp)")
+    parser.add_argument("--fsync-ms", type=float, default=0.0, help="extra delay per fsync (slow device model)")
+    args = parser.parse_args()
+
+    total = args.workers * args.appends
+    print(f"{args.workers} writers x {args.appends} appends ({total} total) into {args.sessions} log(s), "
+          f"{len(BLOCK)} bytes each")
+    extra = f" + {args.fsync_ms:g} ms simulated" if args.fsync_ms else ""
+    print(f"fsync latency: {fsync_latency(args.dir):.3f} ms{extra}")
+    print(f"{'mode':<8} {'appends/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'commits':>8}")
+    for mode in durability.DURABILITY_MODES:
+        r = run(mode, args.workers, args.appends, args.sessions, args.dir, args.fsync_ms / 1000.0)
+        commits = r["commits"] if r["commits"] != "" else (total if mode == "always" else 0)
+        print(f"{r['mode']:<8} {r['appends_per_s']:>10.0f} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} {commits:>8}")
+
+
+if __name__ == "__main__":
+    main()
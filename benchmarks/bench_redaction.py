@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Benchmark: cost of the redaction stage on large tool outputs.
+
+Builds a synthetic Stop-hook block (source code, log lines and a few secrets)
+of --mb megabytes and times, for the same patterns:
+
+  combined    redact.Redactor: all patterns in one regex, one pass
+  sequential  one re.sub pass per pattern, the straightforward alternative
+
+and, for --literals exact secrets, the prefix-trie pattern the Redactor builds
+against a flat alternation of the escaped literals. The time the Stop hook
+spends formatting the block (as one tool result) and writing it to disk is
+printed for scale.
+
+Usage: python benchmarks/bench_redaction.py [--mb 100] [--literals 200] [--dir PATH]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import redact
+from utils import load_hook_module
+
+LINES = [
+    "    def handle_{n}(self, request, *args, **kwargs):  # dispatch to the handler",
+    "        return self.render(request, \"template_{n}.html\", {{\"items\": items}})",
+    "2026-01-01 12:00:{n:02d} INFO GET /api/v1/items?id={n} 200 in 12ms user=alice",
+    "drwxr-xr-x  5 user staff   160 Jan  1 12:00 module_{n}",
+    "  File \"/usr/lib/python3/site-packages/pkg/mod_{n}.py\", line {n}, in call",
+]
+SECRETS = [
+    "export GITHUB_TOKEN=ghp_" + "a1B2c3D4e5" * 4,
+    "AWS_SECRET_ACCESS_KEY = \"wJalrXUtnFEMI/K7MDENG/bPxRfiCYEXAMPLEKEY\"",
+    "{\"client_secret\": \"s3cr3t-value-123\"}",
+    "Authorization: Bearer sk-ant-" + "x" * 40,
+]
+
+
+def make_block(size, seed=1):
+    """About size characters of tool output with a secret every ~64 KB."""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        if rng.random() < 0.001:
+            line = rng.choice(SECRETS)
+        else:
+            line = rng.choice(LINES).format(n=rng.randrange(60))
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def sequential(patterns, text):
+    for pattern in patterns:
+        text = pattern.sub(redact.DEFAULT_REPLACEMENT, text)
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mb", type=float, default=100, help="block size in MB")
+    parser.add_argument("--literals", type=int, default=200, help="literal secrets for the trie comparison")
+    parser.add_argument("--dir", default=None, help="directory for the write comparison (default: system temp)")
+    args = parser.parse_args()
+
+    text = make_block(int(args.mb * 1000 * 1000))
+    mb = len(text) / 1e6
+    print(f"block: {mb:.1f} MB, {len(redact.BUILTIN_PATTERNS)} built-in patterns")
+
+    log_response = load_hook_module("log_response")
+    format_time, formatted = timed(log_response.format_outputs, [("tool_result", text)], "text")
+    print(f"{'format (Stop hook)':<22} {format_time:>7.2f} s")
+    del formatted
+
+    fd, path = tempfile.mkstemp(dir=args.dir)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            write_time, _ = timed(f.write, text)
+            flush_time, _ = timed(f.flush)
+    finally:
+        os.remove(path)
+    print(f"{'write to disk':<22} {write_time + flush_time:>7.2f} s")
+
+    compile_time, redactor = timed(redact.build_redactor, True)
+    combined_time, redacted = timed(redactor.redact, text)
+    print(f"{'combined (1 pass)':<22} {combined_time:>7.2f} s {mb / combined_time:>7.0f} MB/s"
+          f"   compile {compile_time * 1000:.1f} ms, {redacted.count(redact.DEFAULT_REPLACEMENT)} redactions")
+    patterns = [re.compile(p) for _, p, _ in redact.BUILTIN_PATTERNS]
+    sequential_time, _ = timed(sequential, patterns, text)
+    print(f"{'sequential':<22} {sequential_time:>7.2f} s {mb / sequential_time:>7.0f} MB/s"
+          f"   {len(patterns)} passes")
+
+    if args.literals:
+        rng = random.Random(2)
+        alphabet = "abcdefghijklmnopqrstuvwxyz0123456789"
+        literals = ["".join(rng.choice(alphabet) for _ in range(24)) for _ in range(args.literals)]
+        sample = text[:max(1, len(text) // 10)]
+        sample_mb = len(sample) / 1e6
+        trie = re.compile("|".join(redact._trie_branches(sorted(literals))))
+        flat = re.compile("|".join(re.escape(s) for s in literals))
+        trie_time, _ = timed(trie.sub, redact.DEFAULT_REPLACEMENT, sample)
+        flat_time, _ = timed(flat.sub, redact.DEFAULT_REPLACEMENT, sample)
+        print(f"{args.literals} literals on {sample_mb:.1f} MB:")
+        print(f"{'  trie':<22} {trie_time:>7.2f} s {sample_mb / trie_time:>7.0f} MB/s")
+        print(f"{'  flat alternation':<22} {flat_time:>7.2f} s {sample_mb / flat_time:>7.0f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Benchmark: peak memory of the Stop hook on turns with many large tool calls.
+
+Writes a synthetic transcript whose last turn has --calls tool calls, each
+with a --kb kilobyte result, and runs the real Stop hook (log-response.py) on
+it in a child process for each turn_memory_bytes setting:
+
+  0           no ceiling: every decoded part is held until the response is written
+  16 MB       the default ceiling
+  1 MB        a small ceiling
+
+Peak RSS comes from the child's rusage and includes the pages of the mapped
+transcript, which are file-backed and reclaimable; on Linux the peak of the
+child's anonymous memory (sampled from /proc, "heap") is printed as well. The
+run is repeated at half the number of calls: with a ceiling, heap memory
+should stay flat as the turn grows. Each run is timed too, since spilled
+entries are decoded twice.
+
+Usage: python benchmarks/bench_turn_memory.py [--calls 400] [--kb 256] [--dir PATH]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+SETTINGS = [("0 (none)", 0), ("16 MB", 16 * 1024 * 1024), ("1 MB", 1024 * 1024)]
+
+
+def write_transcript(path, calls, kb):
+    """One prompt followed by calls tool_use/tool_result pairs of about kb KB each."""
+    line = "drwxr-xr-x  5 user staff   160 Jan  1 12:00 some/long/path/module_{n}.py\n"
+    body = "".join(line.format(n=n) for n in range(kb * 1024 // len(line) + 1))[:kb * 1024]
+    ts = "2026-01-01T00:00:00.000Z"
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"type": "user", "timestamp": ts,
+                            "message": {"role": "user", "content": "list everything"}}) + "\n")
+        for n in range(calls):
+            f.write(json.dumps({"type": "assistant", "timestamp": ts, "message": {"content": [
+                {"type": "tool_use", "name": "Bash", "input": {"command": f"ls -la dir{n}"}}]}}) + "\n")
+            f.write(json.dumps({"type": "tool_result", "timestamp": ts, "content": body}) + "\n")
+
+
+def _anon_mb(pid):
+    """Anonymous (heap) memory of a running process in MB, or None off Linux."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1024.0
+    except (IOError, OSError, ValueError):
+        pass
+    return None
+
+
+def run_hook(home, project, transcript, session_id):
+    """Run the Stop hook once; returns (seconds, peak RSS in MB, peak anonymous memory in MB or None)."""
+    payload = json.dumps({"session_id": session_id, "transcript_path": transcript, "cwd": project})
+    env = dict(os.environ, HOME=home)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(SCRIPTS_DIR, "log-response.py")],
+                            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            env=env)
+    proc.stdin.write(payload.encode("utf-8"))
+    proc.stdin.close()
+    anon = None
+    while True:  # Sample heap usage until the hook exits
+        pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        sample = _anon_mb(proc.pid)
+        if sample is not None:
+            anon = max(anon or 0, sample)
+        time.sleep(0.002)
+    elapsed = time.perf_counter() - start
+    rss = usage.ru_maxrss / 1024.0 if sys.platform != "darwin" else usage.ru_maxrss / 1024.0 / 1024.0
+    return elapsed, rss, anon
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=400, help="tool calls in the last turn")
+    parser.add_argument("--kb", type=int, default=256, help="size of each tool result in KB")
+    parser.add_argument("--dir", default=None, help="working directory (default: system temp)")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(dir=args.dir)
+    try:
+        home = os.path.join(root, "home")
+        project = os.path.join(root, "project")
+        os.makedirs(os.path.join(project, ".claude"))
+        for calls in (args.calls // 2, args.calls):
+            transcript = os.path.join(root, f"turn-{calls}.jsonl")
+            write_transcript(transcript, calls, args.kb)
+            size = os.path.getsize(transcript) / 1e6
+            print(f"{calls} calls x {args.kb} KB ({size:.0f} MB transcript):")
+            for label, limit in SETTINGS:
+                with open(os.path.join(project, ".claude", "conversation-logger-config.json"), 'w') as f:
+                    json.dump({"turn_memory_bytes": limit}, f)
+                elapsed, rss, anon = run_hook(home, project, transcript, f"bench-{calls}-{limit}")
+                heap = f"   heap {anon:>6.0f} MB" if anon is not None else ""
+                print(f"  {label:<12} {elapsed:>6.2f} s   peak RSS {rss:>6.0f} MB{heap}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
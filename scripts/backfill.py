@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+"""
+Offline backfill/rebuild of conversation logs from raw Claude Code transcripts.
+
+Each transcript is split into turns at every real user prompt; each turn is
+rendered with the same parser (collect_last_turn) and writers as the
+log-prompt.py / log-response.py hooks. Sessions run in parallel in a process
+pool, and a manifest in the log directory records a checksum per session so
+unchanged transcripts are skipped on the next run.
+"""
+import json
+import os
+import re
+import sys
+
+BACKFILL_VERSION = 1  # Bump when rendering changes so every session is rebuilt
+MANIFEST_NAME = ".backfill-manifest.json"
+HASH_CHUNK = 1 << 20
+
+
+def get_project_transcript_dir(cwd):
+    """Claude Code's transcript directory for a project (~/.claude/projects/<sanitized cwd>)."""
+    projects = os.path.join(os.path.expanduser("~"), ".claude", "projects")
+    candidates = [re.sub(r'[^A-Za-z0-9]', '-', cwd), cwd.lstrip('/').replace('/', '-')]
+    for name in candidates:
+        path = os.path.join(projects, name)
+        if os.path.isdir(path):
+            return path
+    return os.path.join(projects, candidates[0])
+
+
+def find_transcripts(transcript_dir):
+    """Main session transcripts (<session_id>.jsonl) in a project directory, sorted."""
+    if not os.path.isdir(transcript_dir):
+        return []
+    return sorted(os.path.join(transcript_dir, name) for name in os.listdir(transcript_dir)
+                  if name.endswith(".jsonl") and not name.startswith("agent-"))
+
+
+def transcript_checksum(path):
+    import hashlib
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_timestamp(value):
+    """Local naive datetime from a transcript's ISO-8601 UTC timestamp, or None."""
+    from datetime import datetime, timezone
+    if not isinstance(value, str):
+        return None
+    try:
+        utc = datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return utc.astimezone().replace(tzinfo=None)
+
+
+def prompt_text(entry):
+    """User prompt text of a PROMPT entry."""
+    content = entry.get("message", {}).get("content", "")
+    if isinstance(content, str):
+        return content
+    return "\n".join(c.get("text", "") for c in content
+                     if isinstance(c, dict) and c.get("type") == "text")
+
+
+def iter_turns(reader):
+    """Split a transcript into turns. Yields (prompt_entry, lines, last_time).
+    lines are the (offset, line) pairs from the prompt up to the next prompt;
+    sidechain and meta entries are left out.
+    """
+    from transcript import LazyEntry, classify_user_entry
+    prompt = None
+    lines = []
+    last_time = None
+    for offset, line in reader.iter_lines(complete_only=True):
+        try:
+            entry = LazyEntry(line)
+            if entry.get("isSidechain") or entry.get("isMeta") or entry.get("isCompactSummary"):
+                continue
+            when = parse_timestamp(entry.get("timestamp"))
+            if entry.type == "user" and classify_user_entry(entry.skeleton()) == "PROMPT":
+                if prompt is not None:
+                    yield prompt, lines, last_time
+                prompt = entry.materialize()
+                lines = []
+                last_time = when
+        except ValueError:
+            continue
+        if prompt is not None:
+            lines.append((offset, line))
+            last_time = when or last_time
+    if prompt is not None:
+        yield prompt, lines, last_time
+
+
+def render_transcript(transcript_path, log_file, log_format, redaction=None, detail="full"):
+    """Render a whole transcript into log_file (overwritten). Returns the number of turns.
+    redaction is the "redaction" config value (see redact.py); detail the "detail" level.
+    """
+    from datetime import datetime
+    from transcript import TranscriptReader
+    from utils import ensure_markdown_header, load_hook_module
+    from redact import build_redactor, RedactingWriter
+    redactor = build_redactor(redaction)
+    log_prompt = load_hook_module("log_prompt")
+    log_response = load_hook_module("log_response")
+    log_dir = os.path.dirname(log_file)
+
+    turns = 0
+    with TranscriptReader(transcript_path) as reader, \
+            open(log_file, 'w', encoding='utf-8') as f:
+        if redactor is not None:
+            f = RedactingWriter(f, redactor)
+        for prompt, lines, last_time in iter_turns(reader):
+            start = parse_timestamp(prompt.get("timestamp")) or datetime.now()
+            if turns == 0 and log_format == "markdown":
+                ensure_markdown_header(f, log_file, start)
+                f.flush()  # Later header checks look at the file size
+            if log_format == "markdown":
+                log_prompt._write_prompt_markdown(f, log_file, prompt_text(prompt), start.strftime('%H:%M:%S'))
+            else:
+                log_prompt._write_prompt_text(f, prompt_text(prompt), start.strftime('%H:%M:%S'))
+            follow_ups, all_outputs, _ = log_response.collect_last_turn(lines, log_dir)
+            log_response.write_response(f, log_file, log_format, follow_ups, all_outputs, last_time or start,
+                                        detail)
+            turns += 1
+            del lines
+    return turns
+
+
+def transcript_start(transcript_path):
+    """Local time of the transcript's first timestamped entry (file mtime as fallback)."""
+    from datetime import datetime
+    from transcript import TranscriptReader, LazyEntry
+    with TranscriptReader(transcript_path) as reader:
+        for _, line in reader.iter_lines(complete_only=True):
+            try:
+                start = parse_timestamp(LazyEntry(line).get("timestamp"))
+            except ValueError:
+                continue
+            if start:
+                return start
+    return datetime.fromtimestamp(os.path.getmtime(transcript_path))
+
+
+def log_file_name(transcript_path, session_id, log_format):
+    """Log file name dated by the transcript's first entry (file mtime as fallback)."""
+    start = transcript_start(transcript_path)
+    ext = ".md" if log_format == "markdown" else ".txt"
+    return f"{start.strftime('%Y-%m-%d_%H-%M-%S')}_{session_id}_conversation-log{ext}"
+
+
+def backfill_session(transcript_path, log_file, log_format, redaction=None, detail="full"):
+    """Process pool worker: render one session atomically. Returns a result dict."""
+    tmp_file = f"{log_file}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        checksum = transcript_checksum(transcript_path)
+        turns = render_transcript(transcript_path, tmp_file, log_format, redaction, detail)
+        os.replace(tmp_file, log_file)
+        return {"status": "written", "checksum": checksum, "turns": turns}
+    except Exception as e:
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        return {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+
+
+def load_manifest(log_dir):
+    try:
+        with open(os.path.join(log_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == BACKFILL_VERSION:
+            return manifest
+    except (IOError, OSError, ValueError, AttributeError):
+        pass
+    return {"version": BACKFILL_VERSION, "sessions": {}}
+
+
+def save_manifest(log_dir, manifest):
+    path = os.path.join(log_dir, MANIFEST_NAME)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def plan_backfill(transcripts, log_dir, log_format, manifest, rebuild=False, force=False, temp_dir=None,
+                  layout="flat"):
+    """Decide what to do with each transcript.
+    Returns (jobs, skipped): jobs are (session_id, transcript_path, log_file, stat, replaces)
+    where replaces is an older log of the session to remove once written;
+    skipped are (session_id, reason).
+    """
+    from utils import _find_existing_log, get_temp_session_dir, log_part_path, log_shard_dir
+    if temp_dir is None:
+        temp_dir = get_temp_session_dir()
+    jobs = []
+    skipped = []
+    for path in transcripts:
+        session_id = os.path.splitext(os.path.basename(path))[0]
+        st = os.stat(path)
+        known = manifest["sessions"].get(session_id)
+        if os.path.exists(os.path.join(temp_dir, f".temp_session_{session_id}.json")):
+            skipped.append((session_id, "active"))
+            continue
+        if known and known.get("format") == log_format and os.path.exists(known.get("log_file", "")):
+            if not force and (known.get("size"), known.get("mtime_ns")) == (st.st_size, st.st_mtime_ns):
+                skipped.append((session_id, "up to date"))
+                continue
+            if not force and known.get("checksum") == transcript_checksum(path):
+                known["mtime_ns"] = st.st_mtime_ns  # Touched but unchanged
+                skipped.append((session_id, "up to date"))
+                continue
+            jobs.append((session_id, path, known["log_file"], st, None))
+            continue
+        existing = _find_existing_log(log_dir, session_id)
+        if existing:
+            existing = log_part_path(existing, 1)  # Continuation parts are replaced with it
+        if existing and not (known and known.get("log_file") == existing):
+            if not rebuild:
+                skipped.append((session_id, "has hook log"))
+                continue
+        name = log_file_name(path, session_id, log_format)
+        if existing:
+            name = os.path.splitext(os.path.basename(existing))[0] + os.path.splitext(name)[1]
+            log_file = os.path.join(os.path.dirname(existing), name)
+        else:
+            log_file = os.path.join(log_shard_dir(log_dir, name, layout), name)
+        jobs.append((session_id, path, log_file, st, existing if existing != log_file else None))
+    return jobs, skipped
+
+
+def run_backfill(transcripts, log_dir, log_format, jobs=None, rebuild=False, force=False,
+                 progress=None, temp_dir=None, layout="flat", redaction=None, detail="full"):
+    """Backfill logs for transcripts into log_dir. Returns {"written", "skipped", "failed"} counts."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from utils import log_parts, record_log_path
+    os.makedirs(log_dir, exist_ok=True)
+    manifest = load_manifest(log_dir)
+    work, skipped = plan_backfill(transcripts, log_dir, log_format, manifest, rebuild, force, temp_dir,
+                                  layout)
+    total = len(work) + len(skipped)
+    counts = {"written": 0, "skipped": len(skipped), "failed": 0}
+    done = 0
+    for session_id, reason in skipped:
+        done += 1
+        if progress:
+            progress(done, total, session_id, reason)
+
+    if work:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(backfill_session, job[1], job[2], log_format, redaction, detail): job
+                       for job in work}
+            for future in as_completed(futures):
+                session_id, path, log_file, st, replaces = futures[future]
+                result = future.result()
+                done += 1
+                if result["status"] == "written":
+                    counts["written"] += 1
+                    stale = log_parts(log_file)[1:]  # Parts of a rolled-over hook log
+                    if replaces:
+                        stale.extend(log_parts(replaces))  # Format changed: drop the old extension
+                    for old in stale:
+                        os.remove(old)
+                    if layout != "flat":
+                        record_log_path(log_dir, session_id, log_file)
+                    manifest["sessions"][session_id] = {
+                        "transcript": path, "log_file": log_file, "format": log_format,
+                        "checksum": result["checksum"], "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                        "turns": result["turns"]}
+                    status = f"written ({result['turns']} turns)"
+                else:
+                    counts["failed"] += 1
+                    status = f"failed: {result['error']}"
+                if progress:
+                    progress(done, total, session_id, status)
+    save_manifest(log_dir, manifest)
+    return counts
+
+
+def main(args):
+    """Entry point for `logger-cli.py backfill`."""
+    from utils import get_log_dir, get_log_format, get_log_layout, get_config_option, get_detail
+    cwd = os.path.abspath(args.cwd)
+    transcript_dir = args.transcripts or get_project_transcript_dir(cwd)
+    transcripts = find_transcripts(transcript_dir)
+    if not transcripts:
+        print(f"No transcripts found in {transcript_dir}", file=sys.stderr)
+        return 1
+    log_format = args.format or get_log_format(cwd)
+    log_dir = args.output or get_log_dir(cwd)
+
+    def progress(done, total, session_id, status):
+        print(f"[{done}/{total}] {session_id}: {status}", file=sys.stderr)
+
+    counts = run_backfill(transcripts, log_dir, log_format, jobs=args.jobs, rebuild=args.rebuild,
+                          force=args.force, progress=progress if not args.quiet else None,
+                          layout=get_log_layout(cwd), redaction=get_config_option(cwd, "redaction", None),
+                          detail=get_detail(cwd))
+    print(f"Backfill: {counts['written']} written, {counts['skipped']} skipped, "
+          f"{counts['failed']} failed -> {log_dir}")
+    return 1 if counts["failed"] else 0
+
+
+def add_parser(subparsers):
+    parser = subparsers.add_parser(
+        "backfill", help="regenerate conversation logs from raw transcripts",
+        description="Regenerate conversation logs from a project's Claude Code transcripts.")
+    parser.add_argument("--cwd", default=os.getcwd(), help="project directory (default: current directory)")
+    parser.add_argument("--transcripts", help="transcript directory (default: ~/.claude/projects/<project>)")
+    parser.add_argument("--output", help="log directory (default: <project>/.claude/logs)")
+    parser.add_argument("--format", choices=("text", "markdown"), help="log format (default: from config)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="also regenerate sessions that already have a hook-written log")
+    parser.add_argument("--force", action="store_true", help="ignore checksums and regenerate every session")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no per-session progress")
+    parser.set_defaults(func=main)
+    return parser
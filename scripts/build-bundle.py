@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Build a single-file precompiled bundle of the hook scripts.
+
+Produces a zipapp (default: dist/conversation-logger.pyz) holding the shared
+modules (utils, transcript, subagents, stats, durability, redact, recorder,
+maintenance, coalesce) and the three hook scripts with precompiled bytecode,
+plus a __main__ that dispatches on the hook event name:
+
+    UserPromptSubmit -> log-prompt.py
+    Stop             -> log-response.py
+    anything else    -> log-event.py
+
+Bytecode is stored as unchecked hash-based .pyc files, so nothing is compiled
+or written at hook time even when the plugin directory is read-only. Sources
+are kept alongside as a fallback for interpreters with a different bytecode
+version. Building requires Python 3.7 or later; running the bundle does not.
+
+Usage: python scripts/build-bundle.py [-o OUTPUT]
+"""
+import argparse
+import os
+import py_compile
+import sys
+import tempfile
+import zipfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(SCRIPTS_DIR, "..", "dist", "conversation-logger.pyz")
+
+# Source file -> module name inside the bundle
+MODULES = [
+    ("utils.py", "utils"),
+    ("transcript.py", "transcript"),
+    ("subagents.py", "subagents"),
+    ("stats.py", "stats"),
+    ("durability.py", "durability"),
+    ("redact.py", "redact"),
+    ("recorder.py", "recorder"),
+    ("maintenance.py", "maintenance"),
+    ("coalesce.py", "coalesce"),
+    ("log-prompt.py", "log_prompt"),
+    ("log-event.py", "log_event"),
+    ("log-response.py", "log_response"),
+]
+
+# Fixed timestamp keeps the archive byte-for-byte reproducible
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+MAIN_SOURCE = '''"""
+conversation-logger hook bundle entry point.
+Dispatches on hook_event_name (or the first argument) to the hook scripts.
+"""
+import io
+import json
+import sys
+
+ENTRY_POINTS = {
+    "UserPromptSubmit": ("log_prompt", "log_prompt"),
+    "Stop": ("log_response", "log_response"),
+}
+DEFAULT_ENTRY_POINT = ("log_event", "log_event")
+
+
+def main():
+    raw = sys.stdin.buffer.read() if hasattr(sys.stdin, 'buffer') else sys.stdin.read()
+    event_name = sys.argv[1] if len(sys.argv) > 1 else ""
+    if not event_name:
+        try:
+            event_name = json.loads(raw).get("hook_event_name", "")
+        except (ValueError, AttributeError):
+            pass  # The hook script reports invalid input itself
+    if isinstance(raw, str):
+        raw = raw.encode('utf-8')
+    # Hand the payload to the hook script as if it were read from stdin
+    sys.stdin = io.TextIOWrapper(io.BytesIO(raw), encoding='utf-8')
+
+    module_name, func_name = ENTRY_POINTS.get(event_name, DEFAULT_ENTRY_POINT)
+    module = __import__(module_name)
+    getattr(module, func_name)()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+
+def _compile(source_path, display_name):
+    """Compile source to unchecked hash-based .pyc bytes."""
+    fd, cfile = tempfile.mkstemp(suffix=".pyc")
+    os.close(fd)
+    try:
+        py_compile.compile(source_path, cfile=cfile, dfile=display_name, doraise=True,
+                           invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+        with open(cfile, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(cfile)
+
+
+def _write_entry(zf, name, data):
+    info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = 0o644 << 16
+    zf.writestr(info, data)
+
+
+def build_bundle(output, scripts_dir=SCRIPTS_DIR):
+    """Write the bundle to output. Returns the output path."""
+    output = os.path.abspath(output)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    entries = []
+    with tempfile.TemporaryDirectory() as work:
+        main_path = os.path.join(work, "__main__.py")
+        with open(main_path, 'w', encoding='utf-8') as f:
+            f.write(MAIN_SOURCE)
+        sources = [(main_path, "__main__")]
+        sources += [(os.path.join(scripts_dir, filename), module) for filename, module in MODULES]
+        for source_path, module in sources:
+            with open(source_path, 'rb') as f:
+                entries.append((f"{module}.py", f.read()))
+            entries.append((f"{module}.pyc", _compile(source_path, f"{module}.py")))
+
+    tmp_output = output + ".tmp"
+    with open(tmp_output, 'wb') as f:
+        f.write(b"#!/usr/bin/env python\n")
+        with zipfile.ZipFile(f, 'w') as zf:
+            for name, data in sorted(entries):
+                _write_entry(zf, name, data)
+    os.chmod(tmp_output, 0o755)
+    os.replace(tmp_output, output)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the precompiled hook bundle (.pyz).")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT,
+                        help="output path (default: dist/conversation-logger.pyz)")
+    args = parser.parse_args()
+    if sys.version_info < (3, 7):
+        print("Error: building the bundle requires Python 3.7 or later", file=sys.stderr)
+        sys.exit(1)
+    path = build_bundle(args.output)
+    print(f"Built {os.path.normpath(path)} (Python {sys.version_info[0]}.{sys.version_info[1]} bytecode)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+"""
+Event coalescing for bursts of subagent and tool failure events.
+
+With "coalesce_events" on, the SubagentStart, SubagentStop and
+PostToolUseFailure hooks append their event to a per-session spool in the
+temp session directory instead of opening the log for one line each. The
+spool is flushed into the log as one write by the next prompt or Stop hook,
+by any other session event, or by an event hook that finds its oldest entry
+older than the window. Identical tool failures (same tool and error) in one
+flush collapse into a single line with a count and the time of the last one.
+
+  "coalesce_events": true                      flush after the default window
+  "coalesce_events": {"window_seconds": 10}
+
+Appends hold a shared lock on the spool and flushes an exclusive one for the
+whole read, log write and truncate, so no event is lost or written twice.
+Not available on Windows, where events are written as they come.
+"""
+import json
+import os
+import sys
+import time
+
+DEFAULT_WINDOW_SECONDS = 5
+
+
+def get_coalesce_config(cwd):
+    """Coalescing settings ({"window_seconds": ...}) from the config, or None when it is off."""
+    from utils import get_config_option
+    value = get_config_option(cwd, "coalesce_events", None)
+    if value is True:
+        value = {}
+    if not isinstance(value, dict) or not value.get("enabled", True):
+        return None
+    window = value.get("window_seconds", DEFAULT_WINDOW_SECONDS)
+    if isinstance(window, bool) or not isinstance(window, (int, float)) or window < 0:
+        window = DEFAULT_WINDOW_SECONDS
+    return {"window_seconds": window}
+
+
+def get_spool_path(session_id, temp_dir=None):
+    if temp_dir is None:
+        from utils import get_temp_session_dir
+        temp_dir = get_temp_session_dir()
+    return os.path.join(temp_dir, f".event_spool_{session_id}.jsonl")
+
+
+def format_event(record, log_format, count=1, last=None):
+    """Log line for a subagent_start, subagent_stop or tool_failed record.
+    count and last describe identical tool failures collapsed into this one.
+    """
+    kind, ts, fields = record["kind"], record["ts"], record["fields"]
+    markdown = log_format == "markdown"
+    if kind == "tool_failed":
+        repeat = ""
+        if count > 1:
+            repeat = f" | count: {count} | last: {last}" if markdown else f" | count={count} | last={last}"
+        if markdown:
+            return f"> **Tool Failed** -- {ts} | tool: `{fields['tool']}`{repeat} | error: {fields['error']}\n"
+        return f"~ TOOL FAILED ({ts}) | tool={fields['tool']}{repeat} | error={fields['error']}\n"
+    agent_id = fields.get("id", "")
+    if markdown:
+        title = "Subagent Start" if kind == "subagent_start" else "Subagent Stop"
+        id_part = f" | id: `{agent_id}`" if agent_id else ""
+        return f"> **{title}** -- {ts} | type: `{fields['type']}`{id_part}\n"
+    title = "SUBAGENT START" if kind == "subagent_start" else "SUBAGENT STOP"
+    id_part = f" | id={agent_id}" if agent_id else ""
+    return f"~ {title} ({ts}) | type={fields['type']}{id_part}\n"
+
+
+def coalesce(records, log_format):
+    """Log lines for spooled records in order, with identical tool failures collapsed
+    into the line of the first one.
+    """
+    groups = []
+    failures = {}
+    for record in records:
+        if record["kind"] == "tool_failed":
+            key = (record["fields"]["tool"], record["fields"]["error"])
+            if key in failures:
+                group = failures[key]
+                group[1] += 1
+                group[2] = record["ts"]
+                continue
+            failures[key] = group = [record, 1, record["ts"]]
+        else:
+            group = [record, 1, None]
+        groups.append(group)
+    return [format_event(record, log_format, count, last) for record, count, last in groups]
+
+
+def spool_event(session_id, record, temp_dir=None):
+    """Append a record to the session's spool. Returns the time of its oldest record."""
+    import fcntl
+    path = get_spool_path(session_id, temp_dir)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        os.write(fd, (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8'))
+        os.lseek(fd, 0, os.SEEK_SET)
+        first = os.read(fd, 4096).split(b"\n", 1)[0]
+    finally:
+        os.close(fd)
+    try:
+        return json.loads(first.decode('utf-8'))["t"]
+    except (ValueError, KeyError, TypeError):
+        return record["t"]
+
+
+def flush_events(session_id, log_file, log_format, durability="none", redactor=None, temp_dir=None):
+    """Write the session's spooled events to its log. Returns the number of lines written.
+    Never raises: a spool that could not be written stays for the next flush.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return 0
+    if not session_id:
+        return 0
+    path = get_spool_path(session_id, temp_dir)
+    try:
+        fd = os.open(path, os.O_RDWR)
+    except OSError:
+        return 0  # Nothing spooled
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        chunks = []
+        while True:
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        records = []
+        for line in b"".join(chunks).splitlines():
+            try:
+                records.append(json.loads(line.decode('utf-8')))
+            except ValueError:
+                pass  # Torn write from a killed hook
+        lines = coalesce(records, log_format)
+        if lines:
+            from durability import open_log
+            with open_log(log_file, durability, redactor) as f:
+                f.write("".join(lines))
+        os.ftruncate(fd, 0)
+        return len(lines)
+    except (IOError, OSError) as e:
+        print(f"Warning: event spool flush failed: {e}", file=sys.stderr)
+        return 0
+    finally:
+        os.close(fd)
+
+
+def record_event(kind, fields, ts, session_id, log_file, log_format, cwd, temp_dir=None):
+    """Spool an event when coalescing is on, flushing the spool once its window has passed.
+    Returns False when the caller should write the event itself.
+    """
+    config = get_coalesce_config(cwd)
+    if config is None or not session_id:
+        return False
+    now = time.time()
+    try:
+        oldest = spool_event(session_id, {"kind": kind, "ts": ts, "t": now, "fields": fields}, temp_dir)
+    except ImportError:
+        return False  # No fcntl (Windows)
+    except (IOError, OSError) as e:
+        print(f"Warning: event spool failed: {e}", file=sys.stderr)
+        return False
+    if now - oldest >= config["window_seconds"]:
+        from durability import get_durability
+        from redact import get_redactor
+        flush_events(session_id, log_file, log_format, get_durability(cwd), get_redactor(cwd), temp_dir)
+    return True
@@ -0,0 +1,449 @@
+#!/usr/bin/env python
+"""
+Export sessions to a partitioned columnar dataset for analytics.
+
+Every session becomes one file of rows with a fixed schema (COLUMNS), in a
+Hive-style partition by the session's start date:
+
+  <output>/date=2026-01-01/<session_id>.parquet
+
+Rows come from the raw transcript (prompts, tool calls and results with their
+sizes and errors, follow-ups, and one response row per turn whose latency is
+the time from the prompt to Claude's last message) and from the session log
+(the hook event records: session start/end, subagents, compaction, tool
+failures). Timestamps are UTC.
+
+Files are Parquet when pyarrow is installed and CSV otherwise. Rows are
+written in batches of batch_rows (one Parquet row group each), so a worker
+holds one batch at a time. Sessions are exported in parallel in a process
+pool, and a manifest in the output directory records each session's sources,
+so only new or changed sessions are exported again.
+"""
+import json
+import os
+import re
+import sys
+from collections import namedtuple
+
+DATASET_VERSION = 1  # Bump when the schema or row content changes so every session is exported again
+MANIFEST_NAME = ".dataset-manifest.json"
+BATCH_ROWS = 10000
+FORMATS = ("parquet", "csv")
+
+COLUMNS = [
+    ("session_id", "string"),
+    ("seq", "int64"),         # Row number within the session
+    ("turn", "int32"),        # Prompts so far; 0 before the first one
+    ("source", "string"),     # "transcript" or "log"
+    ("kind", "string"),       # prompt, response, tool_use, tool_result, follow_up or event
+    ("ts", "timestamp"),      # Milliseconds, UTC
+    ("tool", "string"),
+    ("tool_use_id", "string"),
+    ("name", "string"),       # Follow-up kind (TOOL_REJECTION, ...) or event name (session_start, ...)
+    ("is_error", "bool"),
+    ("bytes", "int64"),       # Prompt, tool input or tool output size
+    ("latency_ms", "int64"),  # tool_result: since its tool_use; response: since the prompt
+    ("detail", "string"),     # Event fields as JSON
+]
+
+Row = namedtuple("Row", [name for name, _ in COLUMNS])
+Row.__new__.__defaults__ = (None,) * len(COLUMNS)
+
+_TIMESTAMP_RE = re.compile(r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d{1,6}))?')
+_LOG_START_RE = re.compile(r'^(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})_')
+# "is_error" can only appear unescaped as a key, never inside a JSON string
+_IS_ERROR_RE = re.compile(rb'"is_error"\s*:\s*true')
+
+
+def _epoch_ms(value):
+    """Milliseconds since the epoch from a transcript's ISO-8601 UTC timestamp, or None."""
+    from datetime import datetime, timezone
+    match = _TIMESTAMP_RE.match(value) if isinstance(value, str) else None
+    if not match:
+        return None
+    try:
+        utc = datetime.strptime(match.group(1), '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return int(utc.timestamp()) * 1000 + int((match.group(2) or "0").ljust(3, "0")[:3])
+
+
+def _error_ids(entry, line, results):
+    """tool_use_ids of the entry's results marked is_error. On a line too large to be decoded,
+    all of its results count as errors when any of them is one.
+    """
+    from transcript import LAZY_MIN_BYTES
+    if len(line) >= LAZY_MIN_BYTES:
+        return {tool_use_id for tool_use_id, _ in results} if _IS_ERROR_RE.search(line) else set()
+    content = entry.get("message", {}).get("content", [])
+    return {item.get("tool_use_id") for item in (content if isinstance(content, list) else [])
+            if isinstance(item, dict) and item.get("type") == "tool_result" and item.get("is_error")}
+
+
+def iter_transcript_rows(transcript_path):
+    """Rows for a transcript's prompts, tool calls, results, follow-ups and responses.
+    Sidechain and meta entries are left out, as in the logs.
+    """
+    from backfill import prompt_text
+    from transcript import LazyEntry, TranscriptCache, TranscriptReader, classify_user_entry, _TOOL_USE_RE
+
+    def response(turn, prompt_ms, last_ms):
+        latency = last_ms - prompt_ms if prompt_ms is not None else None
+        return Row(turn=turn, source="transcript", kind="response", ts=last_ms, latency_ms=latency)
+
+    turn = 0
+    prompt_ms = last_ms = None
+    pending = {}  # tool_use_id -> (tool name, time of the call)
+    with TranscriptReader(transcript_path) as reader:
+        for _, line in reader.iter_lines(complete_only=True):
+            try:
+                entry = LazyEntry(line)
+                if entry.get("isSidechain") or entry.get("isMeta") or entry.get("isCompactSummary"):
+                    continue
+                ms = _epoch_ms(entry.get("timestamp"))
+                if entry.type == "user":
+                    kind = classify_user_entry(entry.skeleton())
+                    if kind == "PROMPT":
+                        if last_ms is not None:
+                            yield response(turn, prompt_ms, last_ms)
+                        turn += 1
+                        prompt_ms, last_ms = ms, None
+                        yield Row(turn=turn, source="transcript", kind="prompt", ts=ms,
+                                  bytes=len(prompt_text(entry.materialize()).encode('utf-8')))
+                        continue
+                    if kind in TranscriptCache.FOLLOW_UPS:
+                        yield Row(turn=turn, source="transcript", kind="follow_up", ts=ms, name=kind)
+                    if kind == "INTERRUPT":
+                        continue
+                    results = entry.tool_results()
+                    errors = _error_ids(entry, line, results)
+                    for tool_use_id, size in results:
+                        tool, use_ms = pending.pop(tool_use_id, (None, None))
+                        latency = ms - use_ms if ms is not None and use_ms is not None else None
+                        yield Row(turn=turn, source="transcript", kind="tool_result", ts=ms, tool=tool,
+                                  tool_use_id=tool_use_id, is_error=tool_use_id in errors, bytes=size,
+                                  latency_ms=latency)
+                elif entry.type == "assistant":
+                    last_ms = ms if ms is not None else last_ms
+                    if not _TOOL_USE_RE.search(line):
+                        continue
+                    content = entry.materialize().get("message", {}).get("content", [])
+                    for item in (content if isinstance(content, list) else []):
+                        if not isinstance(item, dict) or item.get("type") != "tool_use":
+                            continue
+                        pending[item.get("id")] = (item.get("name"), ms)
+                        size = len(json.dumps(item.get("input"), ensure_ascii=False).encode('utf-8'))
+                        yield Row(turn=turn, source="transcript", kind="tool_use", ts=ms, tool=item.get("name"),
+                                  tool_use_id=item.get("id"), bytes=size)
+            except ValueError:
+                continue
+    if last_ms is not None:
+        yield response(turn, prompt_ms, last_ms)
+
+
+def log_start(log_file):
+    """Local start time of a session log, from its file name; None when it has no date prefix."""
+    from datetime import datetime
+    match = _LOG_START_RE.match(os.path.basename(log_file))
+    return datetime.strptime(match.group(1), '%Y-%m-%d_%H-%M-%S') if match else None
+
+
+def iter_log_rows(log_file):
+    """Rows for the hook event records in a session log and its continuation parts.
+    Events carry only a local time of day; the date comes from the log file name and
+    moves forward when the time goes back past midnight.
+    """
+    from datetime import datetime, timedelta
+    from logreader import iter_events
+    from utils import log_part_path, log_parts
+    start = log_start(log_file)
+    day = start.date() if start else None
+    previous = None
+    turn = 0
+    for path in log_parts(log_part_path(log_file, 1)) or [log_file]:
+        for event in iter_events(path, max_text=0):
+            if event.kind == "prompt":
+                turn += 1
+            if event.kind != "event":
+                continue
+            attrs = dict(event.attrs)
+            name = attrs.pop("name", None)
+            ms = None
+            try:
+                when = datetime.strptime(event.when, '%H:%M:%S').time()
+            except ValueError:
+                when = None
+            if day is not None and when is not None:
+                if previous is not None and when < previous:
+                    day += timedelta(days=1)
+                previous = when
+                ms = int(datetime.combine(day, when).timestamp()) * 1000
+            yield Row(turn=turn, source="log", kind="event", ts=ms, tool=attrs.get("tool"), name=name,
+                      is_error=name == "tool_failed", detail=json.dumps(attrs, ensure_ascii=False, sort_keys=True))
+
+
+class CsvWriter(object):
+    """Rows as CSV with a header; timestamps as ISO-8601 UTC, booleans as true/false."""
+
+    ext = ".csv"
+
+    def __init__(self, path):
+        import csv
+        self._file = open(path, 'w', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, _ in COLUMNS])
+        self._types = [kind for _, kind in COLUMNS]
+
+    def _cell(self, value, kind):
+        from datetime import datetime, timezone
+        if value is None:
+            return ""
+        if kind == "timestamp":
+            return datetime.fromtimestamp(value / 1000.0, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + "Z"
+        if kind == "bool":
+            return "true" if value else "false"
+        return value
+
+    def write(self, rows):
+        self._writer.writerows([self._cell(value, kind) for value, kind in zip(row, self._types)]
+                               for row in rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter(object):
+    """Rows as a Parquet file with the COLUMNS schema, one row group per batch (needs pyarrow)."""
+
+    ext = ".parquet"
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        types = {"string": pa.string(), "int32": pa.int32(), "int64": pa.int64(), "bool": pa.bool_(),
+                 "timestamp": pa.timestamp("ms", tz="UTC")}
+        self._pa = pa
+        self._schema = pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        pa = self._pa
+        columns = list(zip(*rows))
+        arrays = [pa.array(column, type=field.type) for column, field in zip(columns, self._schema)]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+WRITERS = {"parquet": ParquetWriter, "csv": CsvWriter}
+
+
+def default_format():
+    """"parquet" when pyarrow can be imported, otherwise "csv"."""
+    import importlib.util
+    return "parquet" if importlib.util.find_spec("pyarrow") is not None else "csv"
+
+
+def session_date(transcript_path, log_file):
+    """Partition date (YYYY-MM-DD, local) of a session: its first transcript entry, else its log name."""
+    from datetime import datetime
+    if transcript_path:
+        from backfill import transcript_start
+        return transcript_start(transcript_path).strftime('%Y-%m-%d')
+    start = log_start(log_file) if log_file else None
+    return (start or datetime.now()).strftime('%Y-%m-%d')
+
+
+def source_stamp(transcript_path, log_file):
+    """Sizes and mtimes of a session's transcript and log parts, to tell when it changed."""
+    from utils import log_part_path, log_parts
+    stamp = {"transcript": None, "log": None}
+    if transcript_path:
+        st = os.stat(transcript_path)
+        stamp["transcript"] = [transcript_path, st.st_size, st.st_mtime_ns]
+    if log_file:
+        paths = log_parts(log_part_path(log_file, 1)) or [log_file]
+        stamp["log"] = [[path, os.path.getsize(path)] for path in paths]
+    return stamp
+
+
+def export_session(session_id, transcript_path, log_file, out_root, fmt, batch_rows=BATCH_ROWS):
+    """Process pool worker: write one session's rows to its partition file (replaced atomically).
+    Returns a result dict with the file path relative to out_root.
+    """
+    tmp_path = None
+    try:
+        writer_class = WRITERS[fmt]
+        rel_path = os.path.join(f"date={session_date(transcript_path, log_file)}", session_id + writer_class.ext)
+        path = os.path.join(out_root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        writer = writer_class(tmp_path)
+        rows = 0
+        try:
+            batch = []
+            sources = []
+            if transcript_path:
+                sources.append(iter_transcript_rows(transcript_path))
+            if log_file:
+                sources.append(iter_log_rows(log_file))
+            for source in sources:
+                for row in source:
+                    batch.append(row._replace(session_id=session_id, seq=rows))
+                    rows += 1
+                    if len(batch) >= batch_rows:
+                        writer.write(batch)
+                        batch = []
+            if batch:
+                writer.write(batch)
+        finally:
+            writer.close()
+        os.replace(tmp_path, path)
+        return {"status": "written", "file": rel_path, "rows": rows}
+    except Exception as e:
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+
+
+def find_sessions(log_dir, transcript_dirs):
+    """Sessions as (session_id, transcript path or None, log path or None), sorted by session id."""
+    from backfill import find_transcripts
+    from migrate import iter_log_files, _LOG_NAME_RE
+    transcripts = {}
+    for transcript_dir in transcript_dirs:
+        for path in find_transcripts(transcript_dir):
+            transcripts.setdefault(os.path.splitext(os.path.basename(path))[0], path)
+    logs = {}
+    for directory, name in iter_log_files(log_dir):
+        session_id, rest = _LOG_NAME_RE.match(name).groups()
+        if rest in (".txt", ".md"):
+            logs.setdefault(session_id, os.path.join(directory, name))
+    return [(session_id, transcripts.get(session_id), logs.get(session_id))
+            for session_id in sorted(set(transcripts) | set(logs))]
+
+
+def load_manifest(out_root, fmt):
+    """The output directory's manifest. When it was written for another version or format,
+    only the session files are kept, so every session is exported again and its old file removed.
+    """
+    try:
+        with open(os.path.join(out_root, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == DATASET_VERSION and manifest.get("format") == fmt:
+            return manifest
+        sessions = {session_id: {"file": entry["file"]} for session_id, entry in manifest["sessions"].items()}
+    except (IOError, OSError, ValueError, AttributeError, KeyError, TypeError):
+        sessions = {}
+    return {"version": DATASET_VERSION, "format": fmt, "sessions": sessions}
+
+
+def save_manifest(out_root, manifest):
+    path = os.path.join(out_root, MANIFEST_NAME)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def run_dataset(sessions, out_root, fmt=None, jobs=None, batch_rows=BATCH_ROWS, force=False, progress=None):
+    """Export sessions into out_root. Returns {"written", "skipped", "failed", "rows"} counts."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    fmt = fmt or default_format()
+    os.makedirs(out_root, exist_ok=True)
+    manifest = load_manifest(out_root, fmt)
+    known = manifest["sessions"]
+    counts = {"written": 0, "skipped": 0, "failed": 0, "rows": 0}
+    work = []
+    for session_id, transcript_path, log_file in sessions:
+        try:
+            stamp = source_stamp(transcript_path, log_file)
+        except OSError as e:
+            print(f"Warning: skipping {session_id}: {e}", file=sys.stderr)
+            continue
+        entry = known.get(session_id)
+        if (not force and entry and entry.get("stamp") == stamp
+                and os.path.exists(os.path.join(out_root, entry.get("file", "")))):
+            counts["skipped"] += 1
+            if progress:
+                progress(counts["skipped"], len(sessions), session_id, "up to date")
+            continue
+        work.append((session_id, transcript_path, log_file, stamp))
+    done = counts["skipped"]
+    if work:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(export_session, session_id, transcript_path, log_file, out_root, fmt,
+                                   batch_rows): (session_id, stamp)
+                       for session_id, transcript_path, log_file, stamp in work}
+            for future in as_completed(futures):
+                session_id, stamp = futures[future]
+                result = future.result()
+                done += 1
+                if result["status"] == "written":
+                    counts["written"] += 1
+                    counts["rows"] += result["rows"]
+                    old = known.get(session_id, {}).get("file")
+                    if old and old != result["file"]:
+                        try:
+                            os.remove(os.path.join(out_root, old))  # Partition date changed
+                        except OSError:
+                            pass
+                    known[session_id] = {"stamp": stamp, "file": result["file"], "rows": result["rows"]}
+                    status = f"{result['rows']} rows"
+                else:
+                    counts["failed"] += 1
+                    status = f"failed: {result['error']}"
+                if progress:
+                    progress(done, len(sessions), session_id, status)
+    save_manifest(out_root, manifest)
+    return counts
+
+
+def main(args):
+    """Entry point for `logger-cli.py dataset`."""
+    from backfill import get_project_transcript_dir
+    from utils import get_log_dir
+    cwd = os.path.abspath(args.cwd)
+    log_dir = args.logs or get_log_dir(cwd)
+    fmt = args.format or default_format()
+    if fmt == "parquet" and default_format() != "parquet":
+        print("Parquet output needs pyarrow (pip install pyarrow); use --format csv", file=sys.stderr)
+        return 1
+    sessions = find_sessions(log_dir, args.transcripts or [get_project_transcript_dir(cwd)])
+    if not sessions:
+        print("No sessions to export", file=sys.stderr)
+        return 1
+    out_root = args.output or os.path.join(log_dir, "dataset")
+
+    def progress(done, total, session_id, status):
+        print(f"[{done}/{total}] {session_id}: {status}", file=sys.stderr)
+
+    counts = run_dataset(sessions, out_root, fmt, jobs=args.jobs, batch_rows=args.batch_rows, force=args.force,
+                         progress=progress if not args.quiet else None)
+    print(f"Dataset: {counts['written']} written ({counts['rows']} rows), {counts['skipped']} skipped, "
+          f"{counts['failed']} failed -> {out_root} ({fmt})")
+    return 1 if counts["failed"] else 0
+
+
+def add_parser(subparsers):
+    parser = subparsers.add_parser(
+        "dataset", help="export sessions to a partitioned Parquet/CSV dataset",
+        description="Export sessions' prompts, tool calls, results and hook events to a columnar dataset "
+                    "partitioned by date (Parquet with pyarrow, CSV otherwise).")
+    parser.add_argument("--cwd", default=os.getcwd(), help="project directory (default: current directory)")
+    parser.add_argument("--logs", help="log directory (default: <project>/.claude/logs)")
+    parser.add_argument("--transcripts", action="append",
+                        help="transcript directory, repeatable (default: ~/.claude/projects/<project>)")
+    parser.add_argument("-o", "--output", help="output directory (default: <log directory>/dataset)")
+    parser.add_argument("--format", choices=FORMATS, help="file format (default: parquet when pyarrow is installed)")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS,
+                        help="rows per write batch / Parquet row group (default: %(default)s)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-export sessions that are up to date")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no per-session progress")
+    parser.set_defaults(func=main)
+    return parser
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""
+Durability of log appends.
+
+  none    Plain buffered appends; the OS writes them back when it likes (default).
+  always  fsync every append before the hook exits.
+  batch   Group commit per log directory: a hook that finds a commit already
+          covering its append returns without an fsync, so concurrent hooks
+          share one fsync instead of queueing one each. Every hook still
+          returns only once its append is on disk.
+
+Batch state lives in two small files in the log directory. .fsync.dirty lists
+the logs appended since the last commit; it is locked only briefly to add an
+entry or to take the whole list. .fsync.lock is held for the duration of a
+commit and counts lists taken and commits finished, which tells a waiting
+hook whether a commit has already covered its append.
+"""
+import os
+
+DURABILITY_MODES = ("none", "batch", "always")
+DIRTY_NAME = ".fsync.dirty"
+LOCK_NAME = ".fsync.lock"
+
+
+def get_durability(cwd):
+    from utils import get_config_option
+    return get_config_option(cwd, "durability", "none", DURABILITY_MODES)
+
+
+def _fsync_path(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # Removed since it was written (e.g. rolled over)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # Directories cannot be fsynced on some platforms
+    finally:
+        os.close(fd)
+
+
+# Fixed-width counters in the lock file
+DONE_OFFSET = 0    # Number of the last finished commit (written under the commit lock)
+TAKES_OFFSET = 20  # Number of dirty lists taken (written under the dirty list lock)
+
+
+def _read_counter(lock_fd, offset):
+    try:
+        return int(os.pread(lock_fd, 20, offset) or 0)
+    except ValueError:
+        return 0
+
+
+def _write_counter(lock_fd, offset, value):
+    os.pwrite(lock_fd, f"{value:020d}".encode('ascii'), offset)
+
+
+def _take_dirty(dirty_fd):
+    """Read and empty the dirty list. Returns {path: created}. Caller holds its lock."""
+    os.lseek(dirty_fd, 0, os.SEEK_SET)
+    chunks = []
+    while True:
+        chunk = os.read(dirty_fd, 1 << 16)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.ftruncate(dirty_fd, 0)
+    paths = {}
+    for line in b"".join(chunks).decode('utf-8', errors='replace').splitlines():
+        created, _, path = line.partition(" ")
+        if path:
+            paths[path] = paths.get(path, False) or created == "1"
+    return paths
+
+
+def group_commit(log_file, created=False):
+    """Make an append to log_file durable, sharing fsyncs with concurrent hooks.
+    Returns True if this call ran the commit, False if another hook's covered it.
+    """
+    import fcntl
+    log_dir = os.path.dirname(log_file) or "."
+    dirty_fd = os.open(os.path.join(log_dir, DIRTY_NAME), os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+    lock_fd = None
+    try:
+        lock_fd = os.open(os.path.join(log_dir, LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o600)
+        # List our log; every list taken from now on includes it
+        fcntl.flock(dirty_fd, fcntl.LOCK_SH)
+        os.write(dirty_fd, f"{int(created)} {log_file}\n".encode('utf-8'))
+        seen = _read_counter(lock_fd, TAKES_OFFSET)
+        fcntl.flock(dirty_fd, fcntl.LOCK_UN)
+
+        # Shared first: when a commit ends, every waiter it covered learns so at
+        # once instead of queueing behind the next commit for the exclusive lock
+        fcntl.flock(lock_fd, fcntl.LOCK_SH)  # Waits while another hook commits
+        if _read_counter(lock_fd, DONE_OFFSET) > seen:
+            return False  # Taken and synced by a commit that finished meanwhile
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        if _read_counter(lock_fd, DONE_OFFSET) > seen:
+            return False
+
+        fcntl.flock(dirty_fd, fcntl.LOCK_EX)
+        take = _read_counter(lock_fd, TAKES_OFFSET) + 1
+        _write_counter(lock_fd, TAKES_OFFSET, take)
+        paths = _take_dirty(dirty_fd)
+        fcntl.flock(dirty_fd, fcntl.LOCK_UN)
+
+        paths[log_file] = paths.get(log_file, False) or created
+        for path in paths:
+            _fsync_path(path)
+        for directory in {os.path.dirname(p) or "." for p, new in paths.items() if new}:
+            _fsync_path(directory)  # Directory entry of newly created logs
+        _write_counter(lock_fd, DONE_OFFSET, take)
+        return True
+    finally:
+        os.close(dirty_fd)
+        if lock_fd is not None:
+            os.close(lock_fd)  # Releases the commit lock
+
+
+def sync_log(log_file, durability, created=False):
+    """Make completed appends to log_file durable according to the mode."""
+    if durability == "none":
+        return
+    if durability == "batch":
+        try:
+            group_commit(log_file, created)
+            return
+        except ImportError:
+            pass  # No fcntl (Windows): fall back to an fsync per append
+    _fsync_path(log_file)
+    if created:
+        _fsync_path(os.path.dirname(log_file) or ".")
+
+
+class open_log(object):
+    """Open a log for appending; on close, sync it according to the durability mode.
+    With a redactor (see redact.py) every block is redacted before it is written.
+    Usage: with open_log(log_file, durability) as f: f.write(...)
+    """
+
+    def __init__(self, log_file, durability="none", redactor=None):
+        self.log_file = log_file
+        self.durability = durability
+        self.redactor = redactor
+        self.created = durability != "none" and not os.path.exists(log_file)
+        self.f = None
+
+    def __enter__(self):
+        self.f = open(self.log_file, 'a', encoding='utf-8')
+        if self.redactor is not None:
+            from redact import RedactingWriter
+            return RedactingWriter(self.f, self.redactor)
+        return self.f
+
+    def __exit__(self, exc_type, exc, tb):
+        self.f.close()
+        if exc_type is None:
+            sync_log(self.log_file, self.durability, self.created)
+        return False
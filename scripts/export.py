@@ -0,0 +1,520 @@
+#!/usr/bin/env python
+"""
+Export sessions to paginated static HTML.
+
+Each session becomes a directory of plain files that open from disk without
+a server:
+
+  <session>/index.html         table of contents, one line per turn
+  <session>/page-0001.html     N turns per page, with prev/next links
+  <session>/fragments/*.js     large tool outputs, loaded on click
+
+A tool output (or tool call) longer than the inline limit is written to its own
+fragment file, and the page only shows its first lines with a button that
+loads the rest. Opening a session therefore costs one page however large the
+session is. Fragments are scripts rather than fetched files because browsers
+block fetch() on file:// pages.
+
+Turns come from the raw transcript (parsed with the hooks' own
+collect_last_turn) or, without one, from the session's text or markdown log.
+Sessions are exported in parallel in a process pool; a session whose source
+has not changed since its last export is skipped.
+"""
+import html
+import json
+import os
+import re
+import sys
+
+TURNS_PER_PAGE = 20
+INLINE_LIMIT = 16 * 1024  # Characters shown inline before an item moves to a fragment
+PREVIEW_LINES = 20
+FRAGMENT_DIR = "fragments"
+SOURCE_NAME = ".source.json"
+
+_TEXT_SEPARATOR = "=" * 80
+_TEXT_PROMPT_END = "-" * 80
+_TEXT_PROMPT_RE = re.compile('^\U0001f464 USER \\((.*)\\):$')
+_TEXT_RESULT_PREFIX = "  \u23bf  "
+_MD_PROMPT_RE = re.compile('^## \U0001f464 User \u2014 (.*)$')
+_FENCE_RE = re.compile(r'^(`{3,})[^`]*$')
+_CONTINUATION_RE = re.compile(r'^(?:~ CONTINUED (?:FROM|IN) |> Continued (?:from|in) \[)')
+
+STYLE = """
+body { font: 14px/1.45 -apple-system, "Segoe UI", sans-serif; max-width: 60em; margin: 0 auto; padding: 1em; }
+nav { margin: 1em 0; }
+nav a { margin-right: 1em; }
+.turn { border-top: 1px solid #ccc; padding-top: .5em; }
+.turn h2 { font-size: 1em; color: #555; }
+.prompt { background: #eef4ff; padding: .5em; white-space: pre-wrap; }
+.text, .note, .follow-up { white-space: pre-wrap; margin: .5em 0; }
+.note { color: #a40; }
+.follow-up { background: #f4f4f4; padding: .3em .5em; }
+.tool { font-family: monospace; color: #063; white-space: pre-wrap; margin: .5em 0; }
+pre { background: #f7f7f7; padding: .5em; overflow-x: auto; white-space: pre-wrap; }
+button { margin-bottom: .5em; }
+"""
+
+SCRIPT = """
+function showFragment(id, src, button) {
+  button.disabled = true;
+  button.textContent = "Loading\\u2026";
+  var script = document.createElement("script");
+  script.src = src;
+  script.onerror = function () { button.textContent = "Could not load " + src; };
+  document.body.appendChild(script);
+}
+function loadFragment(id, text) {
+  var box = document.getElementById("fragment-" + id);
+  box.querySelector("pre").textContent = text;
+  box.removeChild(box.querySelector("button"));
+}
+"""
+
+
+# ---------------------------------------------------------------------------
+# Turn sources
+# ---------------------------------------------------------------------------
+# A turn is (when, items); items are (kind, text) with kind one of
+# prompt, follow_up, text, tool, output, note, log.
+
+def iter_transcript_turns(transcript_path, log_dir):
+    """Yield the turns of a raw transcript, parsed like the Stop hook parses them."""
+    from backfill import iter_turns, parse_timestamp, prompt_text
+    from transcript import TranscriptReader
+    from utils import load_hook_module
+    log_response = load_hook_module("log_response")
+    with TranscriptReader(transcript_path) as reader:
+        for prompt, lines, _ in iter_turns(reader):
+            start = parse_timestamp(prompt.get("timestamp"))
+            follow_ups, outputs, _ = log_response.collect_last_turn(lines, log_dir)
+            items = [("prompt", prompt_text(prompt))]
+            items.extend(("follow_up", f"{label}: {text}" if text else label) for label, text in follow_ups)
+            for part_type, content in outputs:
+                if part_type == "text":
+                    items.append(("text", content))
+                elif part_type == "tool_use":
+                    items.append(("tool", log_response.format_tool_input(content["name"], content["input"])))
+                elif part_type == "tool_result":
+                    items.append(("output", content))
+                else:
+                    items.append(("note", content.strip()))
+            yield (start.strftime('%Y-%m-%d %H:%M:%S') if start else ""), items
+            del lines
+
+
+def _iter_log_lines(log_file):
+    """Lines of a session log and its continuation parts, without the lines linking the parts."""
+    from utils import log_part_path, log_parts
+    parts = log_parts(log_part_path(log_file, 1)) or [log_file]
+    for i, part in enumerate(parts):
+        with open(part, 'r', encoding='utf-8', errors='replace') as f:
+            header = i > 0
+            held = None  # The last line of a part may be the link to the next one
+            for line in f:
+                if header:
+                    if _CONTINUATION_RE.match(line) or not line.strip() or line.startswith("# Conversation Log"):
+                        continue
+                    header = False
+                if held is not None:
+                    yield held
+                held = line
+            if held is not None and not (i < len(parts) - 1 and _CONTINUATION_RE.match(held)):
+                yield held
+
+
+def iter_log_turns(log_file, log_format):
+    """Yield the turns of a text or markdown log (all of its parts), reading it line by line.
+    Tool output blocks (result lines in text logs, fenced blocks in markdown)
+    become output items; everything else is kept as log text.
+    """
+    markdown = log_format == "markdown"
+    state = {"when": "", "items": [], "chunk": [], "block": None, "fence": None, "prompt": None}
+
+    def flush_chunk():
+        chunk = state["chunk"]
+        if chunk and "".join(chunk).strip():
+            state["items"].append(("log", "".join(chunk).strip("\n")))
+        state["chunk"] = []
+
+    def end_turn():
+        if state["block"] is not None:
+            state["items"].append(("output", "".join(state["block"]).rstrip("\n")))
+            state["block"] = None
+        flush_chunk()
+        turn = (state["when"], state["items"]) if state["items"] else None
+        state["items"] = []
+        return turn
+
+    def start_prompt(when):
+        turn = end_turn()
+        state["when"] = when
+        state["prompt"] = []
+        return turn
+
+    after_rule = False  # Text logs: a prompt header follows the separator rule
+    for line in _iter_log_lines(log_file):
+        stripped = line.rstrip("\n")
+        if after_rule:
+            after_rule = False
+            match = _TEXT_PROMPT_RE.match(stripped)
+            if match:
+                turn = start_prompt(match.group(1))
+                if turn:
+                    yield turn
+                continue  # Otherwise the rule closed a response and is dropped
+
+        if state["prompt"] is not None:
+            end = stripped == _TEXT_PROMPT_END if not markdown else stripped.startswith("## ")
+            if not end:
+                state["prompt"].append(line)
+                continue
+            state["items"].append(("prompt", "".join(state["prompt"]).strip("\n")))
+            state["prompt"] = None
+            if not markdown:
+                continue
+
+        if markdown:
+            if state["fence"] is not None:
+                if stripped == state["fence"]:
+                    state["items"].append(("output", "".join(state["block"]).rstrip("\n")))
+                    state["block"] = state["fence"] = None
+                else:
+                    state["block"].append(line)
+                continue
+            match = _MD_PROMPT_RE.match(stripped)
+            if match:
+                while state["chunk"] and state["chunk"][-1].strip() in ("", "---"):
+                    state["chunk"].pop()  # The rule that introduces the next prompt
+                turn = start_prompt(match.group(1))
+                if turn:
+                    yield turn
+                continue
+            if stripped.startswith("# Conversation Log"):
+                continue
+            match = _FENCE_RE.match(stripped)
+            if match:
+                flush_chunk()
+                state["fence"] = match.group(1)
+                state["block"] = []
+                continue
+            state["chunk"].append(line)
+            continue
+
+        if stripped == _TEXT_SEPARATOR:
+            after_rule = True
+            continue
+        if line.startswith(_TEXT_RESULT_PREFIX):
+            if state["block"] is None:
+                flush_chunk()
+                state["block"] = []
+            state["block"].append(line[len(_TEXT_RESULT_PREFIX):])
+            continue
+        if state["block"] is not None:
+            state["items"].append(("output", "".join(state["block"]).rstrip("\n")))
+            state["block"] = None
+        state["chunk"].append(line)
+
+    if state["prompt"] is not None:
+        state["items"].append(("prompt", "".join(state["prompt"]).strip("\n")))
+    if state["block"] is not None and markdown:
+        state["block"].insert(0, state["fence"] + "\n")  # Unclosed fence: keep it as written
+    turn = end_turn()
+    if turn:
+        yield turn
+
+
+# ---------------------------------------------------------------------------
+# HTML writer
+# ---------------------------------------------------------------------------
+
+def _size_label(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024.0
+
+
+def _turn_title(items):
+    for kind, text in items:
+        head = text[:4096].strip()
+        if kind in ("prompt", "log", "text") and head:
+            return head.split("\n", 1)[0][:120]
+    return "(no prompt)"
+
+
+class HtmlExport(object):
+    """Writes one session's pages, fragments and index into out_dir.
+    Usage: add_turn(when, items) for every turn, then close().
+    """
+
+    def __init__(self, out_dir, title, turns_per_page=TURNS_PER_PAGE, inline_limit=INLINE_LIMIT, redactor=None):
+        self.out_dir = out_dir
+        self.title = title
+        self.turns_per_page = max(1, turns_per_page)
+        self.inline_limit = inline_limit
+        self.redactor = redactor
+        self.turns = 0
+        self.fragments = 0
+        self.pages = []  # Per page: [(turn number, when, title)]
+        self._page = []  # HTML of the current page's turns
+        os.makedirs(os.path.join(out_dir, FRAGMENT_DIR), exist_ok=True)
+
+    def add_turn(self, when, items):
+        if len(self._page) >= self.turns_per_page:
+            self._write_page(has_next=True)
+        if not self._page:
+            self.pages.append([])
+        self.turns += 1
+        if self.redactor is not None:
+            items = [(kind, self.redactor.redact(text)) for kind, text in items]
+        self.pages[-1].append((self.turns, when, _turn_title(items)))
+        parts = [f'<section class="turn" id="turn-{self.turns}">',
+                 f'<h2><a href="#turn-{self.turns}">#{self.turns}</a> {html.escape(when)}</h2>']
+        parts.extend(self._render_item(kind, text) for kind, text in items)
+        parts.append("</section>")
+        self._page.append("\n".join(parts))
+
+    def close(self):
+        if self._page or not self.pages:
+            if not self.pages:
+                self.pages.append([])
+            self._write_page(has_next=False)
+        self._write_index()
+
+    def _render_item(self, kind, text):
+        if len(text) > self.inline_limit:
+            return self._render_fragment(kind, text)
+        escaped = html.escape(text)
+        if kind in ("output", "log"):
+            return f'<pre class="{kind}">{escaped}</pre>'
+        return f'<div class="{kind.replace("_", "-")}">{escaped}</div>'
+
+    def _render_fragment(self, kind, text):
+        self.fragments += 1
+        number = self.fragments
+        src = f"{FRAGMENT_DIR}/{number:06d}.js"
+        with open(os.path.join(self.out_dir, src), 'w', encoding='utf-8') as f:
+            f.write(f"loadFragment({number}, {json.dumps(text)});\n")
+        lines = text.count("\n") + 1
+        preview = "\n".join(text[:self.inline_limit].split("\n")[:PREVIEW_LINES])
+        label = f"Show all {lines:,} lines ({_size_label(len(text.encode('utf-8')))})"
+        return (f'<div class="{kind.replace("_", "-")} fragment" id="fragment-{number}">'
+                f'<pre>{html.escape(preview)}\n\u2026</pre>'
+                f'<button onclick="showFragment({number}, \'{src}\', this)">{label}</button></div>')
+
+    def _page_name(self, index):
+        return f"page-{index + 1:04d}.html"
+
+    def _document(self, heading, nav, body):
+        return (f'<!DOCTYPE html>\n<html><head><meta charset="utf-8">\n'
+                f'<title>{html.escape(heading)}</title>\n<style>{STYLE}</style>\n<script>{SCRIPT}</script>\n'
+                f'</head><body>\n<h1>{html.escape(heading)}</h1>\n{nav}\n{body}\n{nav}\n</body></html>\n')
+
+    def _write_page(self, has_next):
+        index = len(self.pages) - 1
+        links = ['<a href="index.html">Contents</a>']
+        if index > 0:
+            links.append(f'<a href="{self._page_name(index - 1)}">&larr; Previous</a>')
+        if has_next:
+            links.append(f'<a href="{self._page_name(index + 1)}">Next &rarr;</a>')
+        links.append(f"Page {index + 1}")
+        nav = f"<nav>{' '.join(links)}</nav>"
+        with open(os.path.join(self.out_dir, self._page_name(index)), 'w', encoding='utf-8') as f:
+            f.write(self._document(self.title, nav, "\n".join(self._page)))
+        self._page = []
+
+    def _write_index(self):
+        rows = []
+        for index, turns in enumerate(self.pages):
+            page = self._page_name(index)
+            rows.append(f'<h2><a href="{page}">Page {index + 1}</a></h2>\n<ol start="{turns[0][0] if turns else 1}">')
+            rows.extend(f'<li><a href="{page}#turn-{number}">{html.escape(when)}</a> {html.escape(title)}</li>'
+                        for number, when, title in turns)
+            rows.append("</ol>")
+        summary = f"<p>{self.turns} turns, {len(self.pages)} pages, {self.fragments} large outputs</p>"
+        nav = f'<nav><a href="{self._page_name(0)}">First page &rarr;</a></nav>'
+        with open(os.path.join(self.out_dir, "index.html"), 'w', encoding='utf-8') as f:
+            f.write(self._document(self.title, nav, summary + "\n" + "\n".join(rows)))
+
+
+# ---------------------------------------------------------------------------
+# Sessions
+# ---------------------------------------------------------------------------
+
+def _source_stamp(path, kind):
+    from utils import log_part_path, log_parts
+    paths = [path] if kind == "transcript" else (log_parts(log_part_path(path, 1)) or [path])
+    stats = [os.stat(p) for p in paths]
+    return {"path": path, "size": sum(st.st_size for st in stats),
+            "mtime_ns": max(st.st_mtime_ns for st in stats), "parts": len(paths)}
+
+
+def export_session(session_id, kind, path, out_dir, turns_per_page=TURNS_PER_PAGE,
+                   inline_limit=INLINE_LIMIT, redaction=None):
+    """Process pool worker: export one session into out_dir (replaced atomically).
+    kind is "transcript", "text" or "markdown". Returns a result dict.
+    """
+    import shutil
+    from redact import build_redactor
+    tmp_dir = f"{out_dir}.{os.getpid()}.tmp"
+    try:
+        stamp = _source_stamp(path, kind)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        writer = HtmlExport(tmp_dir, f"Session {session_id}", turns_per_page, inline_limit,
+                            build_redactor(redaction))
+        turns = (iter_transcript_turns(path, os.path.dirname(out_dir)) if kind == "transcript"
+                 else iter_log_turns(path, kind))
+        for when, items in turns:
+            writer.add_turn(when, items)
+        writer.close()
+        with open(os.path.join(tmp_dir, SOURCE_NAME), 'w', encoding='utf-8') as f:
+            json.dump(dict(stamp, kind=kind, turns_per_page=turns_per_page, inline_limit=inline_limit), f)
+        old_dir = f"{out_dir}.{os.getpid()}.old"
+        if os.path.exists(out_dir):
+            os.rename(out_dir, old_dir)
+        os.rename(tmp_dir, out_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return {"status": "written", "turns": writer.turns, "pages": len(writer.pages),
+                "fragments": writer.fragments}
+    except Exception as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+
+
+def is_current(out_dir, kind, path, turns_per_page, inline_limit):
+    """True when out_dir holds an export of path's current contents with the same settings."""
+    try:
+        with open(os.path.join(out_dir, SOURCE_NAME), 'r', encoding='utf-8') as f:
+            recorded = json.load(f)
+        stamp = _source_stamp(path, kind)
+    except (IOError, OSError, ValueError):
+        return False
+    return all(recorded.get(key) == value for key, value in stamp.items()) and \
+        (recorded.get("turns_per_page"), recorded.get("inline_limit")) == (turns_per_page, inline_limit)
+
+
+def find_sources(log_dir, transcript_dir, selectors=(), source="auto"):
+    """Sessions to export as (session_id, kind, path), sorted by session id.
+    selectors are session id prefixes or paths to transcripts/logs (none: every session);
+    source picks "transcript", "log" or, with "auto", the transcript when there is one.
+    """
+    from backfill import find_transcripts
+    from migrate import iter_log_files, _LOG_NAME_RE
+    from utils import log_part_path
+    transcripts = {os.path.splitext(os.path.basename(p))[0]: p for p in find_transcripts(transcript_dir)}
+    logs = {}
+    for directory, name in iter_log_files(log_dir):
+        session_id, rest = _LOG_NAME_RE.match(name).groups()
+        if rest in (".txt", ".md"):
+            logs.setdefault(session_id, os.path.join(directory, name))
+
+    def log_kind(path):
+        return "markdown" if path.endswith(".md") else "text"
+
+    found = {}
+    prefixes = []
+    for selector in selectors:
+        if os.path.isfile(selector):
+            path = os.path.abspath(selector)
+            match = _LOG_NAME_RE.match(os.path.basename(path))
+            if match:
+                found[match.group(1)] = (log_kind(path), log_part_path(path, 1))
+            else:
+                found[os.path.splitext(os.path.basename(path))[0]] = ("transcript", path)
+        else:
+            prefixes.append(selector)
+    if prefixes or not selectors:
+        for session_id in set(transcripts) | set(logs):
+            if prefixes and not any(session_id.startswith(p) for p in prefixes):
+                continue
+            transcript = transcripts.get(session_id)
+            log = logs.get(session_id)
+            if transcript and source in ("transcript", "auto"):
+                found[session_id] = ("transcript", transcript)
+            elif log and source in ("log", "auto"):
+                found[session_id] = (log_kind(log), log)
+    return [(session_id, kind, path) for session_id, (kind, path) in sorted(found.items())]
+
+
+def run_export(sources, out_root, jobs=None, turns_per_page=TURNS_PER_PAGE, inline_limit=INLINE_LIMIT,
+               force=False, progress=None, redaction=None):
+    """Export sources into out_root/<session_id>/. Returns {"written", "skipped", "failed"} counts."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    os.makedirs(out_root, exist_ok=True)
+    counts = {"written": 0, "skipped": 0, "failed": 0}
+    work = []
+    for session_id, kind, path in sources:
+        out_dir = os.path.join(out_root, session_id)
+        if not force and is_current(out_dir, kind, path, turns_per_page, inline_limit):
+            counts["skipped"] += 1
+            if progress:
+                progress(counts["skipped"], len(sources), session_id, "up to date")
+            continue
+        work.append((session_id, kind, path, out_dir))
+    done = counts["skipped"]
+    if not work:
+        return counts
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(export_session, session_id, kind, path, out_dir, turns_per_page,
+                               inline_limit, redaction): session_id
+                   for session_id, kind, path, out_dir in work}
+        for future in as_completed(futures):
+            result = future.result()
+            done += 1
+            if result["status"] == "written":
+                counts["written"] += 1
+                status = f"{result['turns']} turns, {result['pages']} pages, {result['fragments']} fragments"
+            else:
+                counts["failed"] += 1
+                status = f"failed: {result['error']}"
+            if progress:
+                progress(done, len(sources), futures[future], status)
+    return counts
+
+
+def main(args):
+    """Entry point for `logger-cli.py export`."""
+    from backfill import get_project_transcript_dir
+    from utils import get_log_dir, get_config_option
+    cwd = os.path.abspath(args.cwd)
+    log_dir = args.logs or get_log_dir(cwd)
+    sources = find_sources(log_dir, args.transcripts or get_project_transcript_dir(cwd),
+                           args.sessions, args.source)
+    if not sources:
+        print("No sessions to export", file=sys.stderr)
+        return 1
+    out_root = args.output or os.path.join(log_dir, "html")
+
+    def progress(done, total, session_id, status):
+        print(f"[{done}/{total}] {session_id}: {status}", file=sys.stderr)
+
+    counts = run_export(sources, out_root, jobs=args.jobs, turns_per_page=args.turns,
+                        inline_limit=args.inline_kb * 1024, force=args.force,
+                        progress=progress if not args.quiet else None,
+                        redaction=get_config_option(cwd, "redaction", None))
+    print(f"Export: {counts['written']} written, {counts['skipped']} skipped, "
+          f"{counts['failed']} failed -> {out_root}")
+    return 1 if counts["failed"] else 0
+
+
+def add_parser(subparsers):
+    parser = subparsers.add_parser(
+        "export", help="export sessions to paginated static HTML",
+        description="Export sessions to paginated static HTML with large tool outputs loaded on click.")
+    parser.add_argument("sessions", nargs="*",
+                        help="session id prefixes or transcript/log files (default: every session of the project)")
+    parser.add_argument("--cwd", default=os.getcwd(), help="project directory (default: current directory)")
+    parser.add_argument("--logs", help="log directory (default: <project>/.claude/logs)")
+    parser.add_argument("--transcripts", help="transcript directory (default: ~/.claude/projects/<project>)")
+    parser.add_argument("-o", "--output", help="output directory (default: <log directory>/html)")
+    parser.add_argument("--source", choices=("auto", "transcript", "log"), default="auto",
+                        help="export from the raw transcript or the log (default: transcript when available)")
+    parser.add_argument("--turns", type=int, default=TURNS_PER_PAGE, help="turns per page (default: %(default)s)")
+    parser.add_argument("--inline-kb", type=int, default=INLINE_LIMIT // 1024,
+                        help="larger items go to fragment files (default: %(default)s KB)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-export sessions that are up to date")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no per-session progress")
+    parser.set_defaults(func=main)
+    return parser
@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+"""
+Live follow mode for active session logs.
+
+Active sessions are discovered through the temp session store
+(~/.claude/tmp/.temp_session_*.json), which holds each session's log path.
+Every followed log keeps its own byte offset, so new blocks are read from
+where the last read stopped and nothing is read twice. Changes are picked up
+with inotify on Linux, and by polling file sizes elsewhere.
+"""
+import os
+import sys
+import time
+
+TAIL_LINES = 10
+READ_CHUNK = 1 << 20
+POLL_SECONDS = 0.5
+RESCAN_SECONDS = 2.0  # Safety rescan of the session store, even with inotify
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+SESSION_STORE_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+LOG_DIR_MASK = IN_MODIFY | IN_CREATE | IN_MOVED_TO
+
+
+class Inotify(object):
+    """Minimal inotify directory watcher through ctypes (Linux only)."""
+
+    def __init__(self):
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._libc = libc
+        self.fd = fd
+        self._watches = {}  # wd -> directory
+
+    def watch(self, directory, mask):
+        """Watch a directory. Returns False if it cannot be watched (yet)."""
+        if directory in self._watches.values():
+            return True
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+        if wd < 0:
+            return False
+        self._watches[wd] = directory
+        return True
+
+    def read(self, timeout):
+        """Wait up to timeout seconds. Returns [(directory, name, mask)]."""
+        import select
+        import struct
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        events = []
+        pos = 0
+        while pos + 16 <= len(data):
+            wd, mask, _, length = struct.unpack_from("iIII", data, pos)
+            name = data[pos + 16:pos + 16 + length].rstrip(b"\0")
+            pos += 16 + length
+            events.append((self._watches.get(wd), os.fsdecode(name), mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def find_active_sessions(cwd=None, session_ids=(), temp_dir=None):
+    """Active sessions from the temp session store, oldest first.
+    Filtered by project directory, or by session id (prefix) when given.
+    Returns [{"session_id", "log_file_path", ...}].
+    """
+    from utils import get_temp_session_dir, read_temp_session
+    if temp_dir is None:
+        temp_dir = get_temp_session_dir()
+    try:
+        names = os.listdir(temp_dir)
+    except OSError:
+        return []
+    found = []
+    for name in names:
+        if not (name.startswith(".temp_session_") and name.endswith(".json")):
+            continue
+        session_id = name[len(".temp_session_"):-len(".json")]
+        if session_ids and not any(session_id.startswith(s) for s in session_ids):
+            continue
+        data = read_temp_session(session_id, temp_dir)
+        if not data or not data.get("log_file_path"):
+            continue
+        if cwd and not session_ids and os.path.abspath(data.get("cwd", "")) != cwd:
+            continue
+        try:
+            mtime = os.path.getmtime(os.path.join(temp_dir, name))
+        except OSError:
+            continue
+        found.append((mtime, dict(data, session_id=session_id)))
+    found.sort(key=lambda item: item[0])
+    return [data for _, data in found]
+
+
+def tail_offset(path, lines):
+    """Byte offset where the last `lines` lines of a file start."""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return 0
+    if lines <= 0:
+        return size
+    with open(path, 'rb') as f:
+        pos = size
+        # A trailing newline ends the last line; it does not start another one
+        newlines = -1
+        while pos > 0:
+            step = min(8192, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            index = len(chunk)
+            while True:
+                index = chunk.rfind(b"\n", 0, index)
+                if index < 0:
+                    break
+                newlines += 1
+                if newlines == lines:
+                    return pos + index + 1
+    return 0
+
+
+class SessionTail(object):
+    """Incremental reader for one session log, resuming at its last offset."""
+
+    def __init__(self, session_id, path, offset=0):
+        self.session_id = session_id
+        self.path = path
+        self.offset = offset
+        self.pending = b""  # Incomplete last line, completed by a later write
+
+    def read_new(self):
+        """Yield text of complete lines appended since the last read."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size < self.offset:
+            self.offset = 0  # Rewritten (e.g. backfill --rebuild): start over
+            self.pending = b""
+        if size == self.offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            while self.offset < size:
+                data = f.read(min(READ_CHUNK, size - self.offset))
+                if not data:
+                    break
+                self.offset += len(data)
+                data = self.pending + data
+                cut = data.rfind(b"\n") + 1
+                self.pending = data[cut:]
+                if cut:
+                    yield data[:cut].decode('utf-8', errors='replace')
+
+    def flush_pending(self):
+        """Text of an incomplete last line (session gone, nothing more will come)."""
+        text = self.pending.decode('utf-8', errors='replace')
+        self.pending = b""
+        return text + "\n" if text else ""
+
+
+class FollowView(object):
+    """Interleaves blocks of several sessions, tail -f style."""
+
+    def __init__(self, out, headers=True):
+        self.out = out
+        self.headers = headers
+        self.current = None
+
+    def emit(self, tail, text):
+        if not text:
+            return
+        if self.headers and tail.session_id != self.current:
+            prefix = "\n" if self.current is not None else ""
+            self.out.write(f"{prefix}==> {tail.session_id} ({os.path.basename(tail.path)}) <==\n")
+        self.current = tail.session_id
+        self.out.write(text)
+
+    def drain(self, tail):
+        for text in tail.read_new():
+            self.emit(tail, text)
+        self.out.flush()
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def follow(out, cwd=None, session_ids=(), lines=TAIL_LINES, temp_dir=None, use_inotify=True,
+           poll_interval=POLL_SECONDS, headers=True, stop=None):
+    """Stream new log blocks of active sessions to out until stop() returns True.
+    Sessions found at start show their last `lines` lines; sessions that start
+    later are shown from the beginning.
+    """
+    from utils import get_temp_session_dir
+    if temp_dir is None:
+        temp_dir = get_temp_session_dir()
+    view = FollowView(out, headers)
+    tails = {}
+
+    watcher = None
+    if use_inotify:
+        try:
+            watcher = Inotify()
+            watcher.watch(temp_dir, SESSION_STORE_MASK)
+        except (OSError, AttributeError):
+            watcher = None
+
+    def refresh(initial=False):
+        """Sync tails with the session store; drain sessions that ended."""
+        active = {s["session_id"]: s for s in find_active_sessions(cwd, session_ids, temp_dir)}
+        for session_id, session in active.items():
+            path = session["log_file_path"]
+            tail = tails.get(session_id)
+            if tail is None:
+                offset = tail_offset(path, lines) if initial else 0
+                tails[session_id] = tail = SessionTail(session_id, path, offset)
+            elif tail.path != path:
+                view.drain(tail)  # Log moved on to a new file
+                tails[session_id] = tail = SessionTail(session_id, path)
+            if watcher:
+                watcher.watch(os.path.dirname(path), LOG_DIR_MASK)
+            view.drain(tail)
+        for session_id in list(tails):
+            if session_id in active:
+                continue
+            if os.path.exists(os.path.join(temp_dir, f".temp_session_{session_id}.json")):
+                continue  # Being rewritten by a hook; still active
+            tail = tails.pop(session_id)
+            view.drain(tail)
+            view.emit(tail, tail.flush_pending())
+            out.flush()
+
+    refresh(initial=True)
+    if not tails:
+        print("Waiting for an active session...", file=sys.stderr)
+    last_scan = time.monotonic()
+    store_mtime = _mtime_ns(temp_dir)
+    try:
+        while not (stop and stop()):
+            if watcher:
+                events = watcher.read(min(poll_interval, RESCAN_SECONDS))
+                rescan = False
+                changed = set()
+                for directory, name, mask in events:
+                    if mask & IN_Q_OVERFLOW:
+                        rescan = True  # Events were lost; rescan and drain everything
+                    elif directory == temp_dir:
+                        rescan = rescan or name.startswith(".temp_session_")
+                    elif directory:
+                        changed.add(os.path.join(directory, name))
+                for tail in list(tails.values()):
+                    if tail.path in changed:
+                        view.drain(tail)
+            else:
+                time.sleep(poll_interval)
+                # Sessions appearing or going away change the store's mtime
+                store_mtime, last_store_mtime = _mtime_ns(temp_dir), store_mtime
+                rescan = store_mtime != last_store_mtime
+                for tail in list(tails.values()):
+                    view.drain(tail)
+            if rescan or time.monotonic() - last_scan >= RESCAN_SECONDS:
+                refresh()
+                last_scan = time.monotonic()
+    finally:
+        if watcher:
+            watcher.close()
+
+
+def main(args):
+    """Entry point for `logger-cli.py follow`."""
+    cwd = None if args.all else os.path.abspath(args.cwd)
+    try:
+        follow(sys.stdout, cwd=cwd, session_ids=args.session or (), lines=args.lines,
+               use_inotify=not args.poll, headers=not args.quiet)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def add_parser(subparsers):
+    parser = subparsers.add_parser(
+        "follow", help="stream the logs of active sessions as they are written",
+        description="Follow the logs of active sessions (found through the temp session store).")
+    parser.add_argument("--cwd", default=os.getcwd(), help="project directory (default: current directory)")
+    parser.add_argument("--all", action="store_true", help="follow active sessions of every project")
+    parser.add_argument("-s", "--session", action="append",
+                        help="follow this session id or id prefix (repeatable)")
+    parser.add_argument("-n", "--lines", type=int, default=TAIL_LINES,
+                        help=f"lines of existing output to show per session (default: {TAIL_LINES})")
+    parser.add_argument("--poll", action="store_true", help="poll for changes instead of using inotify")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no per-session headers")
+    parser.set_defaults(func=main)
+    return parser
@@ -7,29 +7,64 @@ PreCompact, and PostToolUseFailure events.
 import json
 import sys
 import os
-from datetime import datetime
 
-# Add scripts directory to path for utils import
+# Add scripts directory to path for utils import.
+# utils and heavier stdlib modules are imported lazily by the handlers that
+# need them, so no-op invocations exit before paying for them.
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from utils import (
-    setup_encoding, get_log_dir, get_log_format, get_log_file_path,
-    write_temp_session, read_temp_session, cleanup_stale_temp_files,
-    delete_temp_session,
-    resolve_log_path, ensure_markdown_header, ensure_config,
-    get_context_keeper_config, get_memory_path,
-    read_active_work, write_compaction_marker,
-    extract_modified_files, build_restore_context
-)
-
-# Ensure stdout/stderr can handle Unicode on Windows
-setup_encoding()
 
 
 def _ts():
+    from datetime import datetime
     return datetime.now().strftime('%H:%M:%S')
 
 
+def _open_log(log_file, cwd):
+    """Append to the session log with the configured durability and redaction."""
+    from durability import open_log, get_durability
+    from redact import get_redactor
+    return open_log(log_file, get_durability(cwd), get_redactor(cwd))
+
+
+def _flush_events(session_id, log_file, log_format, cwd):
+    """Write events spooled by the coalescer before this one."""
+    from coalesce import get_spool_path, flush_events
+    if not session_id or not os.path.exists(get_spool_path(session_id)):
+        return
+    from durability import get_durability
+    from redact import get_redactor
+    flush_events(session_id, log_file, log_format, get_durability(cwd), get_redactor(cwd))
+
+
+def _drain_subagents(session_id, log_file, log_format, cwd):
+    """Write subagent transcripts that SubagentStop hooks left queued."""
+    from utils import get_subagent_transcripts
+    mode = get_subagent_transcripts(cwd)
+    if mode == "off" or not session_id:
+        return
+    from utils import get_detail
+    from subagents import drain_subagents
+    from durability import get_durability
+    from redact import get_redactor
+    drain_subagents(session_id, mode, log_file, log_format,
+                    durability=get_durability(cwd), redactor=get_redactor(cwd), detail=get_detail(cwd))
+
+
+def _write_event(kind, fields, log_file, log_format, session_id, cwd):
+    """Log a subagent or tool failure event, through the coalescer's spool when it is on."""
+    from coalesce import format_event, record_event
+    ts = _ts()
+    if record_event(kind, fields, ts, session_id, log_file, log_format, cwd):
+        return
+    with _open_log(log_file, cwd) as f:
+        f.write(format_event({"kind": kind, "ts": ts, "fields": fields}, log_format))
+
+
 def handle_session_start(input_data, log_file, log_format, log_dir, session_id, cwd):
+    from utils import (
+        ensure_config, read_temp_session, write_temp_session, ensure_markdown_header,
+        get_context_keeper_config, get_memory_path, build_restore_context
+    )
     ensure_config(cwd)
     source = input_data.get("source", "unknown")
     model = input_data.get("model", "")
@@ -45,7 +80,8 @@ def handle_session_start(input_data, log_file, log_format, log_dir, session_id,
             "log_file_path": log_file
         })
 
-    with open(log_file, 'a', encoding='utf-8') as f:
+    _flush_events(session_id, log_file, log_format, cwd)
+    with _open_log(log_file, cwd) as f:
         if log_format == "markdown":
             ensure_markdown_header(f, log_file)
             model_part = f" | model: `{model}`" if model else ""
@@ -59,7 +95,7 @@ def handle_session_start(input_data, log_file, log_format, log_dir, session_id,
         ck_config = get_context_keeper_config(cwd)
         if ck_config["enabled"]:
             memory_file = get_memory_path(cwd, ck_config["scope"])
-            context_msg = build_restore_context(memory_file, source)
+            context_msg = build_restore_context(memory_file, source, ck_config["restore_max_bytes"])
             if context_msg:
                 print(json.dumps({
                     "hookSpecificOutput": {
@@ -72,10 +108,14 @@ def handle_session_start(input_data, log_file, log_format, log_dir, session_id,
 
 
 def handle_session_end(input_data, log_file, log_format, log_dir, session_id, cwd):
+    from utils import delete_temp_session
+    from maintenance import schedule_jobs
     reason = input_data.get("reason", "unknown")
     ts = _ts()
 
-    with open(log_file, 'a', encoding='utf-8') as f:
+    _flush_events(session_id, log_file, log_format, cwd)
+    _drain_subagents(session_id, log_file, log_format, cwd)
+    with _open_log(log_file, cwd) as f:
         if log_format == "markdown":
             f.write(f"> **Session End** -- {ts} | reason: `{reason}`\n")
         else:
@@ -83,42 +123,51 @@ def handle_session_end(input_data, log_file, log_format, log_dir, session_id, cw
 
     # Clean up temp_session if still present (Stop hook may have already deleted it)
     delete_temp_session(session_id)
-    cleanup_stale_temp_files()
+    schedule_jobs()
 
 
 def handle_subagent_start(input_data, log_file, log_format, log_dir, session_id, cwd):
     agent_type = input_data.get("subagent_type", "unknown")
     agent_id = input_data.get("subagent_id", "")
-    ts = _ts()
-
-    with open(log_file, 'a', encoding='utf-8') as f:
-        if log_format == "markdown":
-            id_part = f" | id: `{agent_id}`" if agent_id else ""
-            f.write(f"> **Subagent Start** -- {ts} | type: `{agent_type}`{id_part}\n")
-        else:
-            id_part = f" | id={agent_id}" if agent_id else ""
-            f.write(f"~ SUBAGENT START ({ts}) | type={agent_type}{id_part}\n")
+    _write_event("subagent_start", {"type": agent_type, "id": agent_id}, log_file, log_format, session_id, cwd)
 
 
 def handle_subagent_stop(input_data, log_file, log_format, log_dir, session_id, cwd):
     agent_type = input_data.get("subagent_type", "unknown")
     agent_id = input_data.get("subagent_id", "")
-    ts = _ts()
-
-    with open(log_file, 'a', encoding='utf-8') as f:
-        if log_format == "markdown":
-            id_part = f" | id: `{agent_id}`" if agent_id else ""
-            f.write(f"> **Subagent Stop** -- {ts} | type: `{agent_type}`{id_part}\n")
-        else:
-            id_part = f" | id={agent_id}" if agent_id else ""
-            f.write(f"~ SUBAGENT STOP ({ts}) | type={agent_type}{id_part}\n")
+    _write_event("subagent_stop", {"type": agent_type, "id": agent_id}, log_file, log_format, session_id, cwd)
+
+    # Optional: render the subagent's own transcript (inline or into a linked log)
+    from utils import get_subagent_transcripts
+    mode = get_subagent_transcripts(cwd)
+    if mode == "off":
+        return
+    from utils import get_detail, debug_log
+    from subagents import find_subagent_transcript, capture_subagents
+    from durability import get_durability
+    from redact import get_redactor
+    agent_id = agent_id or input_data.get("agent_id", "")
+    path = find_subagent_transcript(input_data.get("transcript_path", ""), session_id, agent_id,
+                                    input_data.get("agent_transcript_path", ""))
+    if not path:
+        debug_log(log_dir, f"Subagent transcript not found for agent {agent_id}")
+        return
+    _flush_events(session_id, log_file, log_format, cwd)  # The stop line goes before the transcript
+    agent = {"id": agent_id, "type": agent_type, "path": path}
+    capture_subagents(session_id, agent, mode, log_file, log_format,
+                      durability=get_durability(cwd), redactor=get_redactor(cwd), detail=get_detail(cwd))
 
 
 def handle_pre_compact(input_data, log_file, log_format, log_dir, session_id, cwd):
+    from utils import (
+        get_context_keeper_config, get_memory_path, write_compaction_marker,
+        get_session_modified_files
+    )
     trigger = input_data.get("trigger", "unknown")
     ts = _ts()
 
-    with open(log_file, 'a', encoding='utf-8') as f:
+    _flush_events(session_id, log_file, log_format, cwd)
+    with _open_log(log_file, cwd) as f:
         if log_format == "markdown":
             f.write(f"> **Context Compacted** -- {ts} | trigger: `{trigger}`\n")
         else:
@@ -134,7 +183,7 @@ def handle_pre_compact(input_data, log_file, log_format, log_dir, session_id, cw
                 with open(memory_file, 'w', encoding='utf-8') as mf:
                     mf.write("# Memory\n\n## Active Work\n\n")
             transcript_path = input_data.get("transcript_path", "")
-            modified_files = extract_modified_files(transcript_path) if transcript_path else []
+            modified_files = get_session_modified_files(session_id, transcript_path) if transcript_path else []
             write_compaction_marker(memory_file, trigger, modified_files)
     except Exception as e:
         print(f"Warning: context-keeper error in PreCompact: {e}", file=sys.stderr)
@@ -144,13 +193,7 @@ def handle_tool_failure(input_data, log_file, log_format, log_dir, session_id, c
     tool_name = input_data.get("tool_name", "unknown")
     error = input_data.get("error", "unknown")
     error_short = error.split('\n')[0][:200]
-    ts = _ts()
-
-    with open(log_file, 'a', encoding='utf-8') as f:
-        if log_format == "markdown":
-            f.write(f"> **Tool Failed** -- {ts} | tool: `{tool_name}` | error: {error_short}\n")
-        else:
-            f.write(f"~ TOOL FAILED ({ts}) | tool={tool_name} | error={error_short}\n")
+    _write_event("tool_failed", {"tool": tool_name, "error": error_short}, log_file, log_format, session_id, cwd)
 
 
 HANDLERS = {
@@ -165,7 +208,9 @@ HANDLERS = {
 
 def log_event():
     try:
-        input_data = json.load(sys.stdin)
+        # Read raw bytes so decoding does not depend on the console encoding
+        raw = sys.stdin.buffer.read() if hasattr(sys.stdin, 'buffer') else sys.stdin.read()
+        input_data = json.loads(raw)
 
         event_name = input_data.get("hook_event_name", "")
         session_id = input_data.get("session_id", "")
@@ -174,7 +219,14 @@ def log_event():
         if event_name not in HANDLERS:
             sys.exit(0)
 
+        from utils import setup_encoding, resolve_log_path
+
+        # Ensure stdout/stderr can handle Unicode on Windows
+        setup_encoding()
+
         log_file, log_format, log_dir = resolve_log_path(cwd, session_id)
+        from recorder import record_hook
+        record_hook(cwd, log_dir, "log-event", input_data)
 
         HANDLERS[event_name](input_data, log_file, log_format, log_dir, session_id, cwd)
 
@@ -11,6 +11,10 @@ from datetime import datetime
 # Add scripts directory to path for utils import
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from utils import setup_encoding, get_log_dir, resolve_log_path, write_temp_session, ensure_markdown_header
+from durability import open_log, get_durability
+from redact import get_redactor
+from recorder import record_hook
+from coalesce import flush_events
 
 # Ensure stdout/stderr can handle Unicode on Windows
 setup_encoding()
@@ -27,12 +31,15 @@ def log_prompt():
 
         # Resolve log path (reuses cached path from temp_session if available)
         log_file, log_format, log_dir = resolve_log_path(cwd, session_id)
+        record_hook(cwd, log_dir, "log-prompt", input_data)
 
         # Write prompt to log
         timestamp = datetime.now().strftime('%H:%M:%S')
 
         os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        with open(log_file, 'a', encoding='utf-8') as f:
+        durability, redactor = get_durability(cwd), get_redactor(cwd)
+        flush_events(session_id, log_file, log_format, durability, redactor)  # Events from the last turn first
+        with open_log(log_file, durability, redactor) as f:
             if log_format == "markdown":
                 _write_prompt_markdown(f, log_file, prompt, timestamp)
             else:
@@ -7,50 +7,138 @@ Formats output similarly to the terminal display.
 import json
 import sys
 import os
-from datetime import datetime
 
-# Add scripts directory to path for utils import
+# Add scripts directory to path for utils import.
+# utils, transcript and datetime are imported inside the functions that use
+# them, so a re-triggered Stop (stop_hook_active) exits before paying for them.
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from utils import (
-    setup_encoding, get_log_dir, get_log_file_path, get_log_format,
-    read_temp_session, cleanup_stale_temp_files, debug_log, calculate_fence,
-    resolve_log_path, ensure_markdown_header, touch_temp_session
-)
 
-# Ensure stdout/stderr can handle Unicode on Windows
-setup_encoding()
-
-
-def format_tool_input(tool_name, tool_input):
-    """Format tool input in terminal style (no truncation)."""
+# Earlier turns a Stop hook logs when the ledger shows they were missed
+MAX_CATCH_UP_TURNS = 10
+
+
+# Tool input keys shown in the log, in order; BULKY_PARAMS hold file contents and prompts
+KEY_PARAMS = ['pattern', 'command', 'file_path', 'path', 'query', 'description',
+              'old_string', 'new_string', 'content', 'url', 'prompt']
+BULKY_PARAMS = ('old_string', 'new_string', 'content', 'prompt')
+
+# "detail" levels below "full": compact keeps the head and tail lines of a tool
+# result (each line and parameter value cut to a length), summary only sizes
+COMPACT_HEAD_LINES = 10
+COMPACT_TAIL_LINES = 5
+COMPACT_LINE_CHARS = 200
+COMPACT_PARAM_CHARS = 200
+SUMMARY_PARAM_CHARS = 120
+
+
+def _byte_size(text):
+    return len(text.encode('utf-8', 'replace'))
+
+
+def _cut(text, limit):
+    """text cut to limit characters, followed by its full size when cut."""
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}\u2026 ({_byte_size(text)} bytes)"
+
+
+def _param_value(key, value, detail):
+    """A tool input value as logged at the given detail level."""
+    if detail == "compact":
+        return _cut(value, COMPACT_PARAM_CHARS)
+    if detail == "summary":
+        if key in BULKY_PARAMS:
+            return f"<{_byte_size(value)} bytes>"
+        return _cut(value.replace('\n', ' ').strip(), SUMMARY_PARAM_CHARS)
+    return value
+
+
+def _head_tail_lines(text, head, tail):
+    """(first lines, number of lines between, last lines) of text, at most head and tail
+    lines, found without splitting the whole text.
+    """
+    lines = []
+    pos = 0
+    while len(lines) < head:
+        end = text.find('\n', pos)
+        if end < 0:
+            return lines + [text[pos:]], 0, []
+        lines.append(text[pos:end])
+        pos = end + 1
+    last = []
+    end = len(text)
+    while len(last) < tail:
+        start = text.rfind('\n', pos, end)
+        if start < 0:
+            last.append(text[pos:end])
+            return lines + last[::-1], 0, []
+        last.append(text[start + 1:end])
+        end = start
+    return lines, text.count('\n', pos, end) + 1, last[::-1]
+
+
+def compact_tool_result(text):
+    """Head and tail lines of a tool result for detail "compact", long lines cut.
+    Returns (text, cut); cut is True when anything was left out.
+    """
+    head, omitted, tail = _head_tail_lines(text, COMPACT_HEAD_LINES, COMPACT_TAIL_LINES)
+    lines = head + ([f"\u2026 {omitted} lines omitted \u2026"] if omitted else []) + tail
+    cut = bool(omitted)
+    for n, line in enumerate(lines):
+        if len(line) > COMPACT_LINE_CHARS:
+            lines[n] = line[:COMPACT_LINE_CHARS] + "\u2026"
+            cut = True
+    return '\n'.join(lines), cut
+
+
+def _result_digest(text):
+    """Size and short SHA-256 of a tool result, to identify the full output."""
+    import hashlib
+    data = text.encode('utf-8', 'replace')
+    return f"{len(data)} bytes, sha256 {hashlib.sha256(data).hexdigest()[:12]}"
+
+
+def _result_size(text):
+    return f"{_byte_size(text)} bytes, {text.count(chr(10)) + 1} lines"
+
+
+def format_tool_input(tool_name, tool_input, detail="full"):
+    """Format tool input in terminal style (no truncation unless detail says so)."""
     if not tool_input:
         return f"\u25cf {tool_name}()"
 
     # Show key parameters
     params = []
-    for key in ['pattern', 'command', 'file_path', 'path', 'query', 'description',
-                'old_string', 'new_string', 'content', 'url', 'prompt']:
+    for key in KEY_PARAMS:
         if key in tool_input:
             value = tool_input[key]
             if isinstance(value, str):
-                params.append(f"{key}={value}")
+                params.append(f"{key}={_param_value(key, value, detail)}")
 
     if params:
         return f"\u25cf {tool_name}({', '.join(params)})"
     return f"\u25cf {tool_name}(...)"
 
 
-def format_tool_result(content):
-    """Format tool result in terminal style (no truncation)."""
+def format_tool_result(content, detail="full"):
+    """Format tool result in terminal style (no truncation unless detail says so)."""
     if not content:
         return "  \u23bf  (no output)"
 
-    lines = content.strip().split('\n')
+    text = content.strip()
+    if detail == "summary":
+        return f"  \u23bf  ({_result_size(text)})"
+    footer = ""
+    if detail == "compact":
+        text, cut = compact_tool_result(text)
+        if cut:
+            footer = f"\n  \u23bf  [{_result_digest(content.strip())}]"
+    lines = text.split('\n')
     formatted = '\n'.join([f"  \u23bf  {line}" for line in lines])
-    return formatted
+    return formatted + footer
 
 
-def format_tool_input_md(tool_name, tool_input):
+def format_tool_input_md(tool_name, tool_input, detail="full"):
     """Format tool input as markdown heading with blockquote params."""
     # Heading
     heading = f"### \U0001f6e0\ufe0f Tool: `{tool_name}`"
@@ -60,13 +148,12 @@ def format_tool_input_md(tool_name, tool_input):
 
     # Key parameters as blockquote
     params = []
-    for key in ['pattern', 'command', 'file_path', 'path', 'query', 'description',
-                 'old_string', 'new_string', 'content', 'url', 'prompt']:
+    for key in KEY_PARAMS:
         if key in tool_input:
             value = tool_input[key]
             if isinstance(value, str):
                 # For display in blockquote, keep single-line
-                display_val = value.replace('\n', ' ').strip()
+                display_val = _param_value(key, value, detail).replace('\n', ' ').strip()
                 params.append(f"{key}={display_val}")
 
     if params:
@@ -74,14 +161,22 @@ def format_tool_input_md(tool_name, tool_input):
     return heading
 
 
-def format_tool_result_md(content):
+def format_tool_result_md(content, detail="full"):
     """Format tool result as markdown code block with dynamic fence."""
+    from utils import calculate_fence
     if not content:
         return "> *(no output)*"
 
     text = content.strip()
+    if detail == "summary":
+        return f"> *({_result_size(text)})*"
+    footer = ""
+    if detail == "compact":
+        text, cut = compact_tool_result(text)
+        if cut:
+            footer = f"\n> *{_result_digest(content.strip())}*"
     fence = calculate_fence(text)
-    return f"{fence}\n{text}\n{fence}"
+    return f"{fence}\n{text}\n{fence}{footer}"
 
 
 def extract_full_content(entry):
@@ -125,44 +220,67 @@ def extract_full_content(entry):
     return parts
 
 
-def classify_user_entry(entry):
-    """Classify user-type entries to determine processing method."""
-    message = entry.get("message", {})
-    content = message.get("content", [])
+class TurnOutputs(object):
+    """Output parts of one turn, in order, with a ceiling on decoded memory.
+
+    Parts extracted from a transcript line are kept with that line. Once the
+    lines behind the decoded parts add up to more than max_bytes, the oldest
+    entries drop their parts and keep only the line (a view into the mapped
+    transcript, which costs no process memory); iterating decodes them again,
+    one entry at a time. max_bytes of None or 0 keeps everything decoded.
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.clear()
+
+    def clear(self):
+        self._items = []  # [line, parts, size]; line is None for parts without one
+        self._count = 0
+        self._decoded = 0  # Size of the lines whose parts are held
+        self._oldest = 0   # First item that may still hold parts
+        self.spilled = 0   # Entries dropped to their line so far
+
+    def append(self, part):
+        self._items.append([None, [part], 0])
+        self._count += 1
+
+    def add_entry(self, line, parts):
+        """Add the parts extracted from one transcript line."""
+        if not parts:
+            return
+        self._items.append([line, parts, len(line)])
+        self._count += len(parts)
+        self._decoded += len(line)
+        if self.max_bytes and self._decoded > self.max_bytes:
+            self._spill()
+
+    def _spill(self):
+        items = self._items
+        while self._decoded > self.max_bytes and self._oldest < len(items):
+            item = items[self._oldest]
+            self._oldest += 1
+            if item[0] is not None and item[1] is not None:
+                item[1] = None
+                self._decoded -= item[2]
+                self.spilled += 1
+
+    def __iter__(self):
+        from transcript import LazyEntry
+        for line, parts, _ in self._items:
+            if parts is None:
+                parts = extract_full_content(LazyEntry(line).materialize())
+            for part in parts:
+                yield part
+
+    def __len__(self):
+        return self._count
 
-    # Raw string = actual user prompt
-    if isinstance(content, str):
-        return "PROMPT"
-
-    if isinstance(content, list):
-        tool_results = [c for c in content if c.get("type") == "tool_result"]
-        if tool_results:
-            result_raw = tool_results[0].get("content", "")
-            # If content is a list (e.g., [{type:"text"}]), classify as regular TOOL_RESULT
-            if not isinstance(result_raw, str):
-                return "TOOL_RESULT"
-            result_text = result_raw.strip()
-
-            if result_text.startswith("User has answered your questions:"):
-                return "USER_ANSWER"
-            elif result_text.startswith("User has approved your plan"):
-                return "PLAN_APPROVAL"
-            elif result_text.startswith("Exit plan mode?"):
-                return "PLAN_APPROVAL"
-            elif result_text.startswith("The user doesn't want to proceed"):
-                return "TOOL_REJECTION"
-            else:
-                return "TOOL_RESULT"
-
-        # Text content
-        text_items = [c for c in content if c.get("type") == "text"]
-        if text_items:
-            text = text_items[0].get("text", "")
-            if "[Request interrupted" in text:
-                return "INTERRUPT"
-            return "PROMPT"
 
-    return "UNKNOWN"
+def classify_user_entry(entry):
+    """Classify user-type entries to determine processing method (see transcript.py)."""
+    from transcript import classify_user_entry as _classify_user_entry
+    return _classify_user_entry(entry)
 
 
 def extract_user_interaction(entry, classification):
@@ -201,43 +319,73 @@ def extract_user_interaction(entry, classification):
     return ""
 
 
-def _format_output_text(all_outputs):
-    """Format collected outputs for text format."""
-    formatted_parts = []
+def _iter_output_text(all_outputs, detail="full"):
+    """Format collected outputs for text format, one part at a time."""
     for part_type, content in all_outputs:
         if part_type == "text":
-            formatted_parts.append(f"\u25cf {content}")
+            yield f"\u25cf {content}"
         elif part_type == "tool_use":
-            formatted_parts.append(format_tool_input(content["name"], content["input"]))
+            yield format_tool_input(content["name"], content["input"], detail)
         elif part_type == "tool_result":
-            formatted_parts.append(format_tool_result(content))
+            yield format_tool_result(content, detail)
         elif part_type == "tool_rejection":
-            formatted_parts.append(content)
+            yield content
         elif part_type == "interrupt":
-            formatted_parts.append(content)
-    return formatted_parts
+            yield content
 
 
-def _format_output_markdown(all_outputs):
-    """Format collected outputs for markdown format."""
-    formatted_parts = []
+def _iter_output_markdown(all_outputs, detail="full"):
+    """Format collected outputs for markdown format, one part at a time."""
     for part_type, content in all_outputs:
         if part_type == "text":
-            formatted_parts.append(content)
+            yield content
         elif part_type == "tool_use":
-            formatted_parts.append(format_tool_input_md(content["name"], content["input"]))
+            yield format_tool_input_md(content["name"], content["input"], detail)
         elif part_type == "tool_result":
-            formatted_parts.append(format_tool_result_md(content))
+            yield format_tool_result_md(content, detail)
         elif part_type == "tool_rejection":
             # Extract text from the formatted string
             if "user message:" in content:
                 reason = content.split("user message:", 1)[-1].strip()
-                formatted_parts.append(f"> **Tool Rejected**: {reason}")
+                yield f"> **Tool Rejected**: {reason}"
             else:
-                formatted_parts.append("> **Tool Rejected**")
+                yield "> **Tool Rejected**"
         elif part_type == "interrupt":
-            formatted_parts.append("> **Interrupted**")
-    return formatted_parts
+            yield "> **Interrupted**"
+
+
+def _format_output_text(all_outputs, detail="full"):
+    """Format collected outputs for text format."""
+    return list(_iter_output_text(all_outputs, detail))
+
+
+def _format_output_markdown(all_outputs, detail="full"):
+    """Format collected outputs for markdown format."""
+    return list(_iter_output_markdown(all_outputs, detail))
+
+
+def iter_formatted_outputs(all_outputs, log_format, detail="full"):
+    """Formatted parts of a response block for the given log format and detail level."""
+    if log_format == "markdown":
+        return _iter_output_markdown(all_outputs, detail)
+    return _iter_output_text(all_outputs, detail)
+
+
+def format_outputs(all_outputs, log_format, detail="full"):
+    """Render collected outputs as one response block for the given log format."""
+    formatted_parts = list(iter_formatted_outputs(all_outputs, log_format, detail))
+    return "\n\n".join(formatted_parts) if formatted_parts else "[No output found]"
+
+
+def _write_outputs(f, all_outputs, log_format, detail="full"):
+    """Write the response block part by part, so only one formatted part is in memory."""
+    empty = True
+    for part in iter_formatted_outputs(all_outputs, log_format, detail):
+        if not empty:
+            f.write("\n\n")
+        f.write(part)
+        empty = False
+    f.write("[No output found]\n" if empty else "\n")
 
 
 def _write_followups_text(f, follow_ups):
@@ -250,9 +398,10 @@ def _write_followups_text(f, follow_ups):
         f.write(f"{'-'*80}\n")
 
 
-def _write_followups_markdown(f, follow_ups):
+def _write_followups_markdown(f, follow_ups, now=None):
     """Write follow-up interactions in markdown format."""
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    from datetime import datetime
+    timestamp = (now or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
     for label, text in follow_ups:
         if label == "answer":
             f.write(f"\n## \U0001f4ac User \u2014 {timestamp}\n")
@@ -275,21 +424,168 @@ def _write_followups_markdown(f, follow_ups):
             f.write(f"{text}\n")
 
 
+def write_response(f, log_file, log_format, follow_ups, all_outputs, now=None, detail="full", header=True):
+    """Write a turn's follow-ups and response block. now defaults to the current time;
+    detail is the "detail" config level of tool calls. header=False skips the markdown
+    document header check, for blocks that follow another in the same write.
+    """
+    from datetime import datetime
+    from utils import ensure_markdown_header
+    now = now or datetime.now()
+    full_timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
+
+    if log_format == "markdown":
+        if header:
+            ensure_markdown_header(f, log_file, now)
+        _write_followups_markdown(f, follow_ups, now)
+        f.write(f"\n## \U0001f916 Claude \u2014 {full_timestamp}\n\n")
+        _write_outputs(f, all_outputs, log_format, detail)
+    else:
+        _write_followups_text(f, follow_ups)
+        f.write(f"\U0001f916 CLAUDE [{full_timestamp}]:\n")
+        _write_outputs(f, all_outputs, log_format, detail)
+        f.write(f"{'='*80}\n\n")
+
+
+def write_responses(f, log_file, log_format, responses, now, detail="full"):
+    """Write (follow_ups, all_outputs) pairs as consecutive response blocks."""
+    for i, (follow_ups, all_outputs) in enumerate(responses):
+        write_response(f, log_file, log_format, follow_ups, all_outputs, now, detail, header=i == 0)
+
+
+def collect_last_turn(lines, log_dir, cache=None, max_bytes=None, in_turn=False):
+    """Walk raw transcript lines and collect follow-ups and outputs of the last turn.
+    Lines are (offset, line) pairs with bytes-like lines (bytes or memoryview);
+    entries are decoded lazily so large tool results that are discarded by a
+    later reset are never fully materialised. Lines at or past cache.offset are
+    recorded into the TranscriptCache when one is given.
+    all_outputs is a TurnOutputs holding at most max_bytes of decoded entries;
+    it may refer back to the lines, so iterate it while they are still valid.
+    in_turn starts collecting at the first line, for lines that continue a turn.
+    Returns (follow_ups, all_outputs, entry_types_found).
+    """
+    from transcript import LazyEntry, classify_user_entry
+    from utils import debug_log
+    follow_ups = []   # [(label, text), ...]
+    all_outputs = TurnOutputs(max_bytes)
+    entry_types_found = []
+    collecting = in_turn
+
+    for offset, line in lines:
+        record = cache is not None and offset >= cache.offset
+        try:
+            entry = LazyEntry(line)
+            entry_type = entry.type
+            entry_types_found.append(entry_type)
+
+            if entry_type == "user":
+                classification = classify_user_entry(entry.skeleton())
+                debug_log(log_dir, f"Offset {offset}: user entry classified as {classification}")
+                if record:
+                    cache.record_user(offset, classification, entry)
+
+                if classification == "PROMPT":
+                    # New prompt -> full reset (already recorded by log-prompt.py)
+                    collecting = True
+                    follow_ups = []
+                    all_outputs.clear()
+
+                elif classification == "USER_ANSWER":
+                    text = extract_user_interaction(entry.materialize(), classification)
+                    follow_ups.append(("answer", text))
+                    all_outputs.clear()
+
+                elif classification == "PLAN_APPROVAL":
+                    text = extract_user_interaction(entry.materialize(), classification)
+                    follow_ups.append(("plan approved", text))
+                    all_outputs.clear()
+
+                elif classification == "TOOL_REJECTION":
+                    text = extract_user_interaction(entry.materialize(), classification)
+                    if text:
+                        all_outputs.append(("tool_rejection", f"  \u23bf  Tool use rejected with user message: {text}"))
+                    else:
+                        all_outputs.append(("tool_rejection", "  \u23bf  Tool use rejected"))
+
+                elif classification == "INTERRUPT":
+                    all_outputs.append(("interrupt", "  \u23bf  Interrupted"))
+
+                elif classification == "TOOL_RESULT":
+                    all_outputs.clear()
+
+            # Collect assistant/other entries (after first user entry)
+            elif collecting or record:
+                full_entry = entry.materialize()
+                if record:
+                    cache.record_entry(offset, full_entry)
+                if collecting:
+                    parts = extract_full_content(full_entry)
+                    all_outputs.add_entry(line, parts)
+                    if parts:
+                        debug_log(log_dir, f"Offset {offset}: Extracted {len(parts)} parts from {entry_type}")
+
+        except ValueError:
+            pass
+
+        if record:
+            cache.advance(offset, line, cache.size)
+
+    return follow_ups, all_outputs, entry_types_found
+
+
+def unlogged_ranges(turns, logged, end):
+    """Transcript ranges the log is missing, oldest first, as (start, stop, in_turn).
+    turns are the prompt offsets and logged the end of what the ledger says is
+    logged (None when unknown: then only the last turn, as without a ledger).
+    A range with in_turn continues a turn whose start is already logged.
+    At most MAX_CATCH_UP_TURNS ranges before the last one are returned.
+    """
+    if logged is None:
+        return [(turns[-1] if turns else 0, end, False)]
+    if logged >= end:
+        return []
+    prompts = [offset for offset in turns if offset >= logged]
+    ranges = []
+    if not prompts or prompts[0] > logged:
+        ranges.append((logged, prompts[0] if prompts else end, True))
+    for n, start in enumerate(prompts):
+        ranges.append((start, prompts[n + 1] if n + 1 < len(prompts) else end, False))
+    return ranges[-(MAX_CATCH_UP_TURNS + 1):]
+
+
 def log_response():
     try:
-        # Read JSON data from stdin
-        input_data = json.load(sys.stdin)
+        # Read raw JSON bytes from stdin so decoding does not depend on the console encoding
+        raw = sys.stdin.buffer.read() if hasattr(sys.stdin, 'buffer') else sys.stdin.read()
+        input_data = json.loads(raw)
 
         # Prevent duplicate logging when another Stop hook blocks and re-triggers
         if input_data.get("stop_hook_active", False):
             sys.exit(0)
 
+        from utils import (
+            setup_encoding, get_log_dir, debug_log,
+            resolve_log_path, touch_temp_session, get_transcript_cache_path, get_turn_memory_bytes,
+            get_ledger_path, get_detail, get_subagent_transcripts
+        )
+        from transcript import TranscriptReader, TranscriptCache, TurnLedger, BlockDigest, entry_uuid_before
+        import itertools
+        from datetime import datetime
+        from durability import open_log, get_durability
+        from redact import get_redactor, RedactingWriter
+        from coalesce import flush_events
+
+        # Ensure stdout/stderr can handle Unicode on Windows
+        setup_encoding()
+
         transcript_path = input_data.get("transcript_path", "")
         session_id = input_data.get("session_id", "")
         cwd = input_data.get("cwd", os.getcwd())
 
         # Log directory
         log_dir = get_log_dir(cwd)
+        from recorder import record_hook
+        record_hook(cwd, log_dir, "log-response", input_data)
 
         debug_log(log_dir, f"=== Stop hook started ===")
         debug_log(log_dir, f"transcript_path: {transcript_path}")
@@ -302,99 +598,90 @@ def log_response():
 
         # Read temp session to get format and log file path
         log_file, log_format, _ = resolve_log_path(cwd, session_id)
-
-        # Extract all outputs from the last turn in the transcript
-        follow_ups = []   # [(label, text), ...]
-        all_outputs = []
-        entry_types_found = []
-        collecting = False
-
-        with open(transcript_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-            debug_log(log_dir, f"Total lines in transcript: {len(lines)}")
-
-            for i, line in enumerate(lines):
-                try:
-                    entry = json.loads(line.strip())
-                    entry_type = entry.get("type", "unknown")
-                    entry_types_found.append(entry_type)
-
-                    if entry_type == "user":
-                        classification = classify_user_entry(entry)
-                        debug_log(log_dir, f"Line {i}: user entry classified as {classification}")
-
-                        if classification == "PROMPT":
-                            # New prompt -> full reset (already recorded by log-prompt.py)
-                            collecting = True
-                            follow_ups = []
-                            all_outputs = []
-
-                        elif classification == "USER_ANSWER":
-                            text = extract_user_interaction(entry, classification)
-                            follow_ups.append(("answer", text))
-                            all_outputs = []
-
-                        elif classification == "PLAN_APPROVAL":
-                            text = extract_user_interaction(entry, classification)
-                            follow_ups.append(("plan approved", text))
-                            all_outputs = []
-
-                        elif classification == "TOOL_REJECTION":
-                            text = extract_user_interaction(entry, classification)
-                            if text:
-                                all_outputs.append(("tool_rejection", f"  \u23bf  Tool use rejected with user message: {text}"))
-                            else:
-                                all_outputs.append(("tool_rejection", "  \u23bf  Tool use rejected"))
-
-                        elif classification == "INTERRUPT":
-                            all_outputs.append(("interrupt", "  \u23bf  Interrupted"))
-
-                        elif classification == "TOOL_RESULT":
-                            all_outputs = []
-
+        detail = get_detail(cwd)
+
+        # Extract all outputs from the last turn in the transcript.
+        # The shared parse cache lets the scan start at the last known prompt.
+        cache_file = get_transcript_cache_path(session_id) if session_id else None
+        ledger_file = get_ledger_path(log_dir, session_id) if session_id else None
+        with TranscriptReader(transcript_path) as reader:
+            cache = TranscriptCache.load(cache_file, reader) if cache_file else None
+            start = cache.last_turn_offset if cache else 0
+            debug_log(log_dir, f"Transcript size: {reader.size} bytes, parsing from offset {start}")
+            if cache:
+                cache.size = reader.size
+            max_bytes = get_turn_memory_bytes(cwd)
+            follow_ups, all_outputs, entry_types_found = collect_last_turn(
+                reader.iter_lines(start, complete_only=True), log_dir, cache, max_bytes)
+
+            debug_log(log_dir, f"Entry types found: {set(entry_types_found)}")
+            debug_log(log_dir, f"Total outputs collected: {len(all_outputs)} "
+                               f"({all_outputs.spilled} entries left in the transcript)")
+            debug_log(log_dir, f"Follow-ups collected: {len(follow_ups)}")
+
+            # The ledger makes the write idempotent: a repeated Stop logs nothing,
+            # a turn continued after its Stop logs only the new lines, and turns
+            # whose Stop never ran are caught up
+            responses = [(follow_ups, all_outputs)]
+            ledger = TurnLedger.load(ledger_file, reader) if ledger_file else None
+            if ledger is not None:
+                responses = []
+                for range_start, stop, in_turn in unlogged_ranges(cache.turns, ledger.offset, cache.offset):
+                    # The outputs collected above are the last turn's; earlier ranges are read again
+                    if range_start == cache.last_turn_offset and stop == cache.offset and not in_turn:
+                        responses.append((follow_ups, all_outputs))
                         continue
-
-                    # Collect assistant/other entries (after first user entry)
-                    if collecting:
-                        parts = extract_full_content(entry)
-                        all_outputs.extend(parts)
-                        if parts:
-                            debug_log(log_dir, f"Line {i}: Extracted {len(parts)} parts from {entry_type}")
-
-                except json.JSONDecodeError:
-                    continue
-
-        debug_log(log_dir, f"Entry types found: {set(entry_types_found)}")
-        debug_log(log_dir, f"Total outputs collected: {len(all_outputs)}")
-        debug_log(log_dir, f"Follow-ups collected: {len(follow_ups)}")
-
-        # Format output and write to log
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        with open(log_file, 'a', encoding='utf-8') as f:
-            timestamp = datetime.now().strftime('%H:%M:%S')
-
-            if log_format == "markdown":
-                ensure_markdown_header(f, log_file)
-                _write_followups_markdown(f, follow_ups)
-
-                formatted_parts = _format_output_markdown(all_outputs)
-                response_text = "\n\n".join(formatted_parts) if formatted_parts else "[No output found]"
-                f.write(f"\n## \U0001f916 Claude \u2014 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                f.write(f"{response_text}\n")
-            else:
-                full_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                _write_followups_text(f, follow_ups)
-
-                formatted_parts = _format_output_text(all_outputs)
-                response_text = "\n\n".join(formatted_parts) if formatted_parts else "[No output found]"
-                f.write(f"\U0001f916 CLAUDE [{full_timestamp}]:\n")
-                f.write(f"{response_text}\n")
-                f.write(f"{'='*80}\n\n")
-
-        # Clean up stale temporary files
+                    lines = itertools.takewhile(lambda item, stop=stop: item[0] < stop,
+                                                reader.iter_lines(range_start, complete_only=True))
+                    ups, outputs, _ = collect_last_turn(lines, log_dir, max_bytes=max_bytes, in_turn=in_turn)
+                    if ups or len(outputs) or not in_turn:
+                        responses.append((ups, outputs))
+                debug_log(log_dir, f"Ledger offset {ledger.offset}: {len(responses)} responses to log")
+
+            # Events spooled during the turn go before its response
+            durability, redactor = get_durability(cwd), get_redactor(cwd)
+            flush_events(session_id, log_file, log_format, durability, redactor)
+            subagent_mode = get_subagent_transcripts(cwd)
+            if subagent_mode != "off" and session_id:
+                # Subagents whose SubagentStop ran out of time, or was the turn's last
+                from subagents import drain_subagents
+                drain_subagents(session_id, subagent_mode, log_file, log_format,
+                                durability=durability, redactor=redactor, detail=detail)
+
+            # Format output and write to log; spilled entries are re-read from the mapped transcript
+            if responses:
+                now = datetime.now()
+                if ledger is not None:
+                    # Measured by a dry run, so a Stop killed mid-write is not taken for a logged turn
+                    block = BlockDigest()
+                    write_responses(block if redactor is None else RedactingWriter(block, redactor),
+                                    log_file, log_format, responses, now, detail)
+                    ledger.begin(cache.offset, entry_uuid_before(reader, cache.offset), log_file, block)
+                    ledger.save(ledger_file)
+                os.makedirs(os.path.dirname(log_file), exist_ok=True)
+                with open_log(log_file, durability, redactor) as f:
+                    write_responses(f, log_file, log_format, responses, now, detail)
+                if ledger is not None:
+                    ledger.commit()
+                    ledger.save(ledger_file)
+
+        # Share the parsed structure with later hooks (PreCompact)
+        if cache:
+            try:
+                cache.save(cache_file)
+            except (IOError, OSError) as e:
+                debug_log(log_dir, f"Transcript cache save failed: {e}")
+            # Per-session stats sidecar for `logger-cli.py stats`
+            try:
+                from stats import write_session_stats
+                write_session_stats(log_dir, session_id, cache.stats(), transcript_path)
+            except (IOError, OSError) as e:
+                debug_log(log_dir, f"Stats sidecar write failed: {e}")
+
+        # Keep this session's temp files fresh; stale ones are removed by the maintenance scheduler
         touch_temp_session(session_id)
-        cleanup_stale_temp_files()
+        from maintenance import schedule_jobs
+        schedule_jobs()
 
         print("Response logged")
 
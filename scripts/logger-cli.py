@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+conversation-logger command line tools.
+
+Usage: python scripts/logger-cli.py <command> [options]
+
+Commands:
+  backfill   Regenerate conversation logs from raw Claude Code transcripts
+  stats      Tool usage and interaction statistics across sessions
+  follow     Stream the logs of active sessions as they are written
+  migrate    Move logs between the flat and date-sharded layouts
+  export     Export sessions to paginated static HTML
+  dataset    Export sessions to a partitioned Parquet/CSV dataset
+  replay     Replay a recorded session through the hooks
+"""
+import argparse
+import os
+import sys
+
+# Add scripts directory to path for utils import
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import backfill
+import dataset
+import export
+import follow
+import migrate
+import replay
+import stats
+
+COMMANDS = [backfill, stats, follow, migrate, export, dataset, replay]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="logger-cli.py", description="conversation-logger command line tools.")
+    subparsers = parser.add_subparsers(dest="command", metavar="<command>")
+    for command in COMMANDS:
+        command.add_parser(subparsers)
+    return parser
+
+
+def main(argv=None):
+    from utils import setup_encoding
+    setup_encoding()
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, "func", None):
+        parser.print_help()
+        return 2
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
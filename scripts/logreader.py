@@ -0,0 +1,419 @@
+#!/usr/bin/env python
+"""
+Streaming reader for the session logs the hooks write.
+
+    from logreader import iter_events, iter_turns
+
+    for event in iter_events(".claude/logs/2026-01-01_..._conversation-log.md"):
+        if event.kind == "tool_use":
+            print(event.attrs["name"], event.text)
+
+iter_events() reads a text or markdown log line by line and yields one Event
+per record, in file order:
+
+  prompt        a user prompt (when: the time it was logged)
+  follow_up     an answer, plan approval, rejection or interrupt (attrs: label)
+  response      the start of a Claude response block (when)
+  subagent      the start of a subagent transcript (when; attrs: type, id)
+  text          text Claude wrote
+  tool_use      a tool call (attrs: name; text: the logged parameters)
+  tool_result   a tool's output (attrs: digest, when the detail level cut it)
+  rejected      a rejected tool use (text: the user's message)
+  interrupted   an interrupted response
+  event         a hook event line (attrs: name, e.g. "session_start", and its fields)
+  continued     a link to the previous or next part of a rolled-over log
+                (attrs: direction "from" or "in", file)
+
+Each Event has the byte offsets of its first line and of the end of its last
+line. Reading again from an event's end offset continues right after it, so
+a log that is still being written can be followed; an unfinished last line
+is left for the next read. Only the record being read is held in memory, and
+with max_text only its first max_text characters of text. iter_turns()
+groups the events by prompt.
+
+Markdown code blocks end the way the hooks' dynamic fences are written: at a
+line of backticks at least as long as the one that opened the block, so
+output that holds shorter fences, or lines that look like log markers, stays
+inside the block.
+"""
+import re
+from collections import namedtuple
+
+Event = namedtuple("Event", "kind offset end when text attrs")
+Turn = namedtuple("Turn", "offset end when prompt events")
+
+_TIME = r'\d{2}:\d{2}:\d{2}'
+_TIMESTAMP_RE = re.compile(r'^(?:\d{4}-\d{2}-\d{2} )?' + _TIME + '$')
+_FIELD_RE = re.compile(r'^([a-z_]+)(?:=|: )(.*)$')
+_LINK_RE = re.compile(r'^\[(.*)\]\((.*)\)$')
+_DIGEST_RE = re.compile(r'^\[?(\d+ bytes, sha256 [0-9a-f]+)\]?$')
+
+# Text logs
+_RULE = "=" * 80
+_PROMPT_END = "-" * 80
+_RESULT_PREFIX = "  \u23bf  "
+_TEXT_USER_RE = re.compile('^\U0001f464 USER \\((.*)\\)(:?)$')
+_TEXT_CLAUDE_RE = re.compile('^\U0001f916 CLAUDE \\[(.*)\\]:$')
+_TEXT_TOOL_RE = re.compile('^\u25cf ([A-Za-z_][\\w.-]*)\\((.*)$')
+_TEXT_EVENT_RE = re.compile(r'^~ ([A-Z][A-Z ]*[A-Z])(?: \((' + _TIME + r')\))?(?: \| (.*))?$')
+_TEXT_CONTINUED_RE = re.compile(r'^~ CONTINUED (FROM|IN) (.+?)(?: \(part \d+\))?$')
+_REJECTED_PREFIX = "Tool use rejected"
+_REJECTED_MESSAGE = "with user message: "
+
+# Markdown logs
+_MD_HEADING_RE = re.compile('^## (\U0001f464|\U0001f4ac|\u2705|\u274c|\u26a1|\U0001f916) (?:User|Claude) \u2014 (.*)$')
+_MD_SUBAGENT_RE = re.compile('^## \U0001f9e9 Subagent `(.*)` \u2014 (.*)$')
+_MD_TOOL_RE = re.compile('^### \U0001f6e0\ufe0f Tool: `(.*)`$')
+_MD_EVENT_RE = re.compile(r'^> \*\*(Session Start|Session End|Subagent Start|Subagent Stop|Context Compacted'
+                          r'|Tool Failed|Subagent Log)\*\* -- (?:(' + _TIME + r')(?: \| |$))?(.*)$')
+_MD_CONTINUED_RE = re.compile(r'^> Continued (from|in) \[(.+?)\]\(')
+_MD_LABEL_RE = re.compile(r'^> \*\*(.+?)\*\*(?:: (.*))?$')
+_MD_NOTE_RE = re.compile(r'^> \*(\(.*\))\*$')
+_MD_DIGEST_RE = re.compile(r'^> \*(\d+ bytes, sha256 [0-9a-f]+)\*$')
+_FENCE_OPEN_RE = re.compile(r'^ {0,3}(`{3,})[^`]*$')
+_MD_LABELS = {"Answer": "answer", "Plan Approved": "plan approved", "Tool Rejected": "tool rejected",
+              "Interrupted": "interrupt"}
+
+# Event names that differ between the formats, and the key of a field written without one
+_EVENT_NAMES = {"context_compacted": "compact"}
+_UNNAMED_FIELDS = {"session_start": "source", "subagent_log": "type"}
+
+
+class _Record(object):
+    """A multi-line record being read. Text is kept up to max_text characters."""
+
+    def __init__(self, kind, offset, end, when="", max_text=None, attrs=None):
+        self.kind = kind
+        self.offset = offset
+        self.end = end
+        self.when = when
+        self.attrs = attrs or {}
+        self.max_text = max_text
+        self.chunks = []
+        self.kept = 0
+        self.started = False
+        self.blanks = 0
+        self.last = None
+
+    def add(self, line, end, raw=False):
+        """Append a line. Blank lines count only when more text follows, unless raw."""
+        if not raw and not line.strip():
+            if self.started:
+                self.blanks += 1
+            return
+        piece = "\n" * (self.blanks + 1) + line if self.started else line
+        self.started = True
+        self.blanks = 0
+        self.end = end
+        self.last = line
+        if self.max_text is None:
+            self.chunks.append(piece)
+        elif self.kept < self.max_text:
+            piece = piece[:self.max_text - self.kept]
+            self.chunks.append(piece)
+            self.kept += len(piece)
+        else:
+            self.attrs["truncated"] = True
+
+    def event(self):
+        text = "".join(self.chunks)
+        if self.kind == "tool_result" and self.last is not None:
+            match = _DIGEST_RE.match(self.last[len(_RESULT_PREFIX):] if self.last.startswith(_RESULT_PREFIX)
+                                     else self.last)
+            if match and text.endswith(self.last):
+                self.attrs["digest"] = match.group(1)
+                text = text[:-len(self.last)].rstrip("\n")
+        elif self.kind == "tool_use" and text.endswith(")"):
+            text = text[:-1]
+        return Event(self.kind, self.offset, self.end, self.when, text, self.attrs)
+
+
+def _event_name(label):
+    name = label.strip().lower().replace(" ", "_")
+    return _EVENT_NAMES.get(name, name)
+
+
+def _event_fields(name, rest):
+    """Attributes of a hook event line from its "key=value | key: `value`" fields."""
+    attrs = {"name": name}
+    key = None
+    for field in rest.split(" | ") if rest else ():
+        match = _FIELD_RE.match(field)
+        link = _LINK_RE.match(field)
+        if match:
+            key, value = match.groups()
+        elif link:
+            key, value = "file", link.group(2)
+        elif key is None:
+            key, value = _UNNAMED_FIELDS.get(name, "value"), field
+        else:
+            attrs[key] += " | " + field  # A value (an error message) holding the separator
+            continue
+        attrs[key] = value[1:-1] if len(value) > 1 and value[0] == value[-1] == "`" else value
+    return attrs
+
+
+def _closes(line, fence):
+    stripped = line.strip()
+    return len(stripped) >= len(fence) and stripped == "`" * len(stripped)
+
+
+def _text_events(lines, max_text):
+    record = None
+    section = None  # "response" or "subagent" inside a block that ends at a rule
+    for offset, end, line in lines:
+        if record is not None and record.kind in ("prompt", "follow_up"):
+            if line == _PROMPT_END:
+                yield record.event()
+                record = None
+            else:
+                record.add(line, end)
+            continue
+        if line == _RULE or (section == "subagent" and line == "~ END SUBAGENT TRANSCRIPT"):
+            if record is not None:
+                yield record.event()
+                record = None
+            section = None
+            continue
+
+        if section is None:
+            match = _TEXT_USER_RE.match(line)
+            if match:
+                label, colon = match.groups()
+                if colon and _TIMESTAMP_RE.match(label):
+                    record = _Record("prompt", offset, end, label, max_text)
+                elif colon:
+                    record = _Record("follow_up", offset, end, "", max_text, {"label": label})
+                else:
+                    yield Event("follow_up", offset, end, "", "", {"label": label})
+                continue
+            match = _TEXT_CLAUDE_RE.match(line)
+            if match:
+                section = "response"
+                yield Event("response", offset, end, match.group(1), "", {})
+                continue
+            match = _TEXT_CONTINUED_RE.match(line)
+            if match:
+                yield Event("continued", offset, end, "", "",
+                            {"direction": match.group(1).lower(), "file": match.group(2)})
+                continue
+            match = _TEXT_EVENT_RE.match(line)
+            if match:
+                name = _event_name(match.group(1))
+                attrs = _event_fields(name, match.group(3))
+                if name == "subagent_transcript":
+                    section = "subagent"
+                    del attrs["name"]
+                    yield Event("subagent", offset, end, match.group(2) or "", "", attrs)
+                else:
+                    yield Event("event", offset, end, match.group(2) or "", "", attrs)
+                continue
+            if not line.strip() or line == _PROMPT_END:
+                continue
+            section = "response"  # Parts of a response read from an offset inside it
+
+        if section == "subagent" and record is None and line.startswith("~ session log: "):
+            continue
+        if line.startswith(_RESULT_PREFIX):
+            content = line[len(_RESULT_PREFIX):]
+            if record is not None and record.kind == "tool_result":
+                record.add(content, end, raw=True)
+                continue
+            if record is not None:
+                yield record.event()
+                record = None
+            if content == "Interrupted":
+                yield Event("interrupted", offset, end, "", "", {})
+            elif content.startswith(_REJECTED_PREFIX):
+                record = _Record("rejected", offset, end, "", max_text)
+                record.add(content.split(_REJECTED_MESSAGE, 1)[1] if _REJECTED_MESSAGE in content else "", end)
+            else:
+                record = _Record("tool_result", offset, end, "", max_text)
+                record.add(content, end, raw=True)
+            continue
+        if line.startswith("\u25cf ") or line == "[No output found]":
+            if record is not None:
+                yield record.event()
+                record = None
+            match = _TEXT_TOOL_RE.match(line)
+            if match:
+                record = _Record("tool_use", offset, end, "", max_text, {"name": match.group(1)})
+                record.add(match.group(2), end)
+            elif line != "[No output found]":
+                record = _Record("text", offset, end, "", max_text)
+                record.add(line[2:], end)
+            continue
+        if record is None or record.kind == "tool_result":
+            if record is not None:
+                yield record.event()  # Every line of a result is prefixed, so a blank line ends it
+                record = None
+            if not line.strip():
+                continue
+            record = _Record("text", offset, end, "", max_text)
+        record.add(line, end)
+
+    if record is not None:
+        yield record.event()
+
+
+def _markdown_events(lines, max_text):
+    record = None
+    fence = None  # Fence of the code block open in the current record
+    held = []     # A "---" rule and blank lines: dropped before a heading, text otherwise
+    for offset, end, line in lines:
+        if fence is not None:
+            if _closes(line, fence):
+                fence = None
+                if record.kind == "tool_result":
+                    record.end = end
+                    continue
+            record.add(line, end, raw=True)
+            continue
+
+        stripped = line.strip()
+        if stripped == "---" or (held and not stripped):
+            held.append((end, line))
+            continue
+        if not stripped:
+            if record is not None:
+                record.add(line, end)
+            continue
+
+        match = _MD_HEADING_RE.match(line)
+        subagent = _MD_SUBAGENT_RE.match(line)
+        event = _MD_EVENT_RE.match(line)
+        continued = _MD_CONTINUED_RE.match(line)
+        if match or subagent or event or continued or line.startswith("# Conversation Log"):
+            held = []
+            if record is not None:
+                yield record.event()
+                record = None
+            if match:
+                emoji, when = match.groups()
+                if emoji == "\U0001f464":
+                    record = _Record("prompt", offset, end, when, max_text)
+                elif emoji == "\U0001f916":
+                    yield Event("response", offset, end, when, "", {})
+                else:
+                    record = _Record("follow_up", offset, end, when, max_text)
+            elif subagent:
+                yield Event("subagent", offset, end, subagent.group(2), "", {"type": subagent.group(1)})
+            elif event:
+                name = _event_name(event.group(1))
+                yield Event("event", offset, end, event.group(2) or "", "", _event_fields(name, event.group(3)))
+            elif continued:
+                yield Event("continued", offset, end, "", "",
+                            {"direction": continued.group(1), "file": continued.group(2)})
+            continue
+
+        if held:
+            if record is not None and record.kind not in ("tool_use", "tool_result"):
+                for held_end, held_line in held:
+                    record.add(held_line, held_end)
+            held = []
+
+        if record is not None and record.kind == "follow_up" and "label" not in record.attrs:
+            label = _MD_LABEL_RE.match(line)
+            if label and not record.started:
+                record.attrs["label"] = _MD_LABELS.get(label.group(1), label.group(1))
+                record.end = end
+                if label.group(2):
+                    record.add(label.group(2), end)
+                continue
+        if record is not None and record.kind in ("prompt", "follow_up"):
+            opened = _FENCE_OPEN_RE.match(line)
+            if opened:
+                fence = opened.group(1)
+            record.add(line, end)
+            continue
+
+        # Parts of a response or subagent transcript
+        match = _MD_TOOL_RE.match(line)
+        if match:
+            if record is not None:
+                yield record.event()
+            record = _Record("tool_use", offset, end, "", max_text, {"name": match.group(1)})
+            continue
+        if record is not None and record.kind == "tool_use" and not record.started and line.startswith("> "):
+            record.add(line[2:], end)
+            continue
+        opened = _FENCE_OPEN_RE.match(line)
+        if opened:
+            fence = opened.group(1)
+            if record is not None and record.kind == "text":
+                record.add(line, end)  # A code block in Claude's text
+                continue
+            if record is not None:
+                yield record.event()
+            record = _Record("tool_result", offset, end, "", max_text)
+            continue
+        match = _MD_DIGEST_RE.match(line)
+        if match and record is not None and record.kind == "tool_result" and "digest" not in record.attrs:
+            record.attrs["digest"] = match.group(1)
+            record.end = end
+            continue
+
+        match = _MD_NOTE_RE.match(line)
+        label = _MD_LABEL_RE.match(line)
+        if not (match or label) and record is not None and (
+                record.kind == "text" or (record.kind == "rejected" and not record.blanks)):
+            record.add(line, end)
+            continue
+        if record is not None:
+            yield record.event()
+            record = None
+        if match:
+            yield Event("tool_result", offset, end, "", match.group(1), {})
+        elif label and label.group(1) == "Tool Rejected":
+            record = _Record("rejected", offset, end, "", max_text)
+            record.add(label.group(2) or "", end)
+        elif label and label.group(1) == "Interrupted" and not label.group(2):
+            yield Event("interrupted", offset, end, "", "", {})
+        elif line != "[No output found]":
+            record = _Record("text", offset, end, "", max_text)
+            record.add(line, end)
+
+    if record is not None:
+        yield record.event()
+
+
+def _iter_lines(f, offset):
+    """(offset, end, line) of each complete line, the line decoded without its newline."""
+    for raw in f:
+        if not raw.endswith(b"\n"):
+            return  # Still being written
+        end = offset + len(raw)
+        yield offset, end, raw.rstrip(b"\r\n").decode("utf-8", "replace")
+        offset = end
+
+
+def iter_events(path, log_format=None, offset=0, max_text=None):
+    """Yield the Events of a log, starting at byte offset (0, or the end of an earlier event).
+    log_format is "text" or "markdown"; by default it follows the file extension.
+    """
+    if log_format is None:
+        log_format = "markdown" if path.endswith(".md") else "text"
+    parse = _markdown_events if log_format == "markdown" else _text_events
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for event in parse(_iter_lines(f, offset), max_text):
+            yield event
+
+
+def iter_turns(path, log_format=None, offset=0, max_text=None):
+    """Yield a Turn per prompt: its offsets, time, prompt text and the events up to the next prompt.
+    Events before the first prompt (a session start, or a read from an offset) form a turn
+    with prompt None. One turn's events are held at a time.
+    """
+    turn = None
+    for event in iter_events(path, log_format, offset, max_text):
+        if event.kind == "prompt":
+            if turn is not None:
+                yield turn._replace(end=turn.events[-1].end if turn.events else turn.end)
+            turn = Turn(event.offset, event.end, event.when, event.text, [])
+            continue
+        if turn is None:
+            turn = Turn(event.offset, event.end, "", None, [])
+        turn.events.append(event)
+    if turn is not None:
+        yield turn._replace(end=turn.events[-1].end if turn.events else turn.end)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+"""
+Maintenance scheduler: housekeeping jobs run outside the hooks.
+
+Hooks call schedule_jobs() as they finish. It reads a small stamp file in the
+temp session directory holding each job's last run. When a job is due, the
+hook takes the scheduler lock (O_EXCL) and starts a detached, low-priority
+process (os.nice) that runs every due job, stamps it and releases the lock,
+so each job runs at most once per interval however many hooks fire, and no
+hook waits for housekeeping. The first hook to see a job starts its clock.
+
+Jobs are listed in JOBS as (name, interval in seconds, function(temp_dir)).
+
+Usage (what the scheduler starts): python scripts/maintenance.py TEMP_DIR
+"""
+import json
+import os
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+STAMP_NAME = ".maintenance.json"
+LOCK_NAME = ".maintenance.lock"
+LOCK_STALE_SECONDS = 600  # A run that held the lock this long has died
+NICE_INCREMENT = 10
+
+# Windows process creation flags for the detached run
+_DETACHED_PROCESS = 0x00000008
+_CREATE_NEW_PROCESS_GROUP = 0x00000200
+_BELOW_NORMAL_PRIORITY_CLASS = 0x00004000
+
+
+def _cleanup_temp_files(temp_dir):
+    from utils import cleanup_stale_temp_files
+    cleanup_stale_temp_files(temp_dir)
+
+
+JOBS = [
+    ("temp_files", 10 * 60, _cleanup_temp_files),
+]
+
+
+def _paths(temp_dir):
+    return os.path.join(temp_dir, STAMP_NAME), os.path.join(temp_dir, LOCK_NAME)
+
+
+def read_stamps(temp_dir):
+    """{job name: last run time} from the stamp file; empty when there is none."""
+    stamp_file, _ = _paths(temp_dir)
+    try:
+        with open(stamp_file, 'r', encoding='utf-8') as f:
+            stamps = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    return stamps if isinstance(stamps, dict) else {}
+
+
+def write_stamps(temp_dir, stamps):
+    """Write the stamp file atomically (temp file + os.replace)."""
+    stamp_file, _ = _paths(temp_dir)
+    tmp_path = f"{stamp_file}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(stamps, f)
+    os.replace(tmp_path, stamp_file)
+
+
+def due_jobs(stamps, now):
+    """Names of the jobs whose interval has passed since their last run."""
+    return [name for name, interval, _ in JOBS
+            if isinstance(stamps.get(name), (int, float)) and now - stamps[name] >= interval]
+
+
+def _try_lock(lock_file):
+    try:
+        fd = os.open(lock_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        try:
+            if time.time() - os.path.getmtime(lock_file) > LOCK_STALE_SECONDS:
+                os.remove(lock_file)  # Holder died; the next hook takes over
+        except OSError:
+            pass
+        return False
+    os.write(fd, str(os.getpid()).encode('ascii'))
+    os.close(fd)
+    return True
+
+
+def _spawn(temp_dir):
+    """Start `maintenance.py TEMP_DIR` detached from the hook, with no inherited pipes.
+    Started through -c with the scripts directory on sys.path, so it also runs from the bundle.
+    """
+    import subprocess
+    code = "import sys; sys.path.insert(0, sys.argv[1]); import maintenance; sys.exit(maintenance.main(sys.argv[2:]))"
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = _DETACHED_PROCESS | _CREATE_NEW_PROCESS_GROUP | _BELOW_NORMAL_PRIORITY_CLASS
+    else:
+        kwargs["start_new_session"] = True
+    subprocess.Popen([sys.executable, "-c", code, SCRIPTS_DIR, temp_dir],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     close_fds=True, **kwargs)
+
+
+def schedule_jobs(temp_dir=None, now=None):
+    """Start a background run when a maintenance job is due. Returns True if one was started.
+    Never raises: a failed check is retried by the next hook.
+    """
+    try:
+        if temp_dir is None:
+            from utils import get_temp_session_dir
+            temp_dir = get_temp_session_dir()
+        now = time.time() if now is None else now
+        stamps = read_stamps(temp_dir)
+        new = [name for name, _, _ in JOBS if not isinstance(stamps.get(name), (int, float))]
+        if new:
+            stamps.update(dict.fromkeys(new, now))
+            write_stamps(temp_dir, stamps)
+        if not due_jobs(stamps, now):
+            return False
+        _, lock_file = _paths(temp_dir)
+        if not _try_lock(lock_file):
+            return False  # Another run is in progress
+        try:
+            _spawn(temp_dir)
+        except (IOError, OSError):
+            os.remove(lock_file)
+            raise
+        return True
+    except (IOError, OSError, ValueError) as e:
+        print(f"Warning: maintenance scheduling failed: {e}", file=sys.stderr)
+        return False
+
+
+def run_due_jobs(temp_dir, now=None):
+    """Run the due jobs and stamp them; the caller holds the lock. Returns the names run.
+    A failing job is stamped too, so it is retried after its interval rather than by every hook.
+    """
+    now = time.time() if now is None else now
+    stamps = read_stamps(temp_dir)
+    ran = []
+    for name, interval, job in JOBS:
+        if name not in due_jobs(stamps, now):
+            continue
+        try:
+            job(temp_dir)
+        except Exception as e:
+            print(f"Warning: maintenance job {name} failed: {e}", file=sys.stderr)
+        stamps[name] = time.time()
+        write_stamps(temp_dir, stamps)
+        ran.append(name)
+    return ran
+
+
+def main(argv=None):
+    """Run the due jobs at low priority, then release the lock taken by schedule_jobs()."""
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print(__doc__.strip().splitlines()[-1], file=sys.stderr)
+        return 2
+    temp_dir = argv[0]
+    sys.path.insert(0, SCRIPTS_DIR)
+    if hasattr(os, "nice"):
+        try:
+            os.nice(NICE_INCREMENT)
+        except OSError:
+            pass
+    _, lock_file = _paths(temp_dir)
+    try:
+        run_due_jobs(temp_dir)
+    finally:
+        try:
+            os.remove(lock_file)
+        except OSError:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+"""
+Move existing logs between the flat and the date-sharded log layout.
+
+  flat  .claude/logs/<date>_<time>_<session>_conversation-log.md
+  date  .claude/logs/YYYY/MM/DD/<date>_<time>_<session>_conversation-log.md
+
+All files of a session (main log, linked subagent logs) move together by
+rename, in one pass over the log directory. In the date layout every session
+gets an entry in the session index (.claude/logs/.sessions/<session>), which
+is how hooks find a session's log without scanning the shards. Logs of active
+sessions are left alone, since their hooks hold the current path.
+"""
+import os
+import re
+import sys
+
+_LOG_NAME_RE = re.compile(r'^\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}_(.+?)_conversation-log(.*)$')
+_MAIN_LOG_RE = re.compile(r'^(?:\.part\d+)?\.(?:txt|md)$')  # Main log and its continuation parts
+_SHARD_PARTS = (r'^\d{4}$', r'^\d{2}$', r'^\d{2}$')
+
+
+def iter_log_files(log_dir):
+    """Yield (directory, filename) for logs in log_dir and its YYYY/MM/DD shards."""
+    def walk(directory, depth):
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except OSError:
+            return
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if depth < 3 and re.match(_SHARD_PARTS[depth], entry.name):
+                    for item in walk(entry.path, depth + 1):
+                        yield item
+            elif _LOG_NAME_RE.match(entry.name):
+                yield directory, entry.name
+    return walk(log_dir, 0)
+
+
+def plan_migration(log_dir, layout, active_ids=()):
+    """Returns (moves, index, skipped).
+    moves are (source, target); index maps session_id to its main log's final path;
+    skipped are (path, reason).
+    """
+    from utils import current_log_part, log_shard_dir
+    moves = []
+    logs = {}
+    skipped = []
+    for directory, name in iter_log_files(log_dir):
+        session_id, rest = _LOG_NAME_RE.match(name).groups()
+        source = os.path.join(directory, name)
+        if session_id in active_ids:
+            skipped.append((source, "active session"))
+            continue
+        target = os.path.join(log_shard_dir(log_dir, name, layout), name)
+        if target != source:
+            if os.path.exists(target):
+                skipped.append((source, f"{target} exists"))
+                continue
+            moves.append((source, target))
+        if _MAIN_LOG_RE.match(rest):
+            logs.setdefault(session_id, []).append(target)
+    # Current part of the earliest log, as the flat lookup picks
+    index = {session_id: current_log_part(paths) for session_id, paths in logs.items()}
+    return moves, index, skipped
+
+
+def _remove_empty_shards(log_dir):
+    for year in os.listdir(log_dir):
+        year_dir = os.path.join(log_dir, year)
+        if not (re.match(_SHARD_PARTS[0], year) and os.path.isdir(year_dir)):
+            continue
+        for root, dirs, files in os.walk(year_dir, topdown=False):
+            if not os.listdir(root):
+                os.rmdir(root)
+
+
+def _update_manifest(log_dir, moved):
+    """Point backfill manifest entries at the moved logs."""
+    from backfill import MANIFEST_NAME, load_manifest, save_manifest
+    if not os.path.exists(os.path.join(log_dir, MANIFEST_NAME)):
+        return
+    manifest = load_manifest(log_dir)
+    changed = False
+    for entry in manifest["sessions"].values():
+        target = moved.get(entry.get("log_file"))
+        if target:
+            entry["log_file"] = target
+            changed = True
+    if changed:
+        save_manifest(log_dir, manifest)
+
+
+def migrate_logs(log_dir, layout, temp_dir=None, dry_run=False):
+    """Move log_dir's logs into layout. Returns {"moved", "indexed", "skipped"} and the skip list."""
+    from utils import get_temp_session_dir, record_log_path, forget_log_path
+    if temp_dir is None:
+        temp_dir = get_temp_session_dir()
+    prefix = ".temp_session_"
+    active_ids = {name[len(prefix):-len(".json")] for name in os.listdir(temp_dir)
+                  if name.startswith(prefix) and name.endswith(".json")}
+    moves, index, skipped = plan_migration(log_dir, layout, active_ids)
+    counts = {"moved": 0, "indexed": 0, "skipped": len(skipped)}
+    if dry_run:
+        counts["moved"] = len(moves)
+        return counts, skipped, moves
+
+    made = set()
+    moved = {}
+    for source, target in moves:
+        directory = os.path.dirname(target)
+        if directory not in made:
+            os.makedirs(directory, exist_ok=True)
+            made.add(directory)
+        try:
+            os.rename(source, target)
+        except OSError as e:
+            skipped.append((source, str(e)))
+            counts["skipped"] += 1
+            continue
+        moved[source] = target
+        counts["moved"] += 1
+
+    for session_id, log_file in index.items():
+        if layout == "flat":
+            forget_log_path(log_dir, session_id)
+        elif os.path.exists(log_file):
+            record_log_path(log_dir, session_id, log_file)
+            counts["indexed"] += 1
+    if layout == "flat":
+        _remove_empty_shards(log_dir)
+    _update_manifest(log_dir, moved)
+    return counts, skipped, moves
+
+
+def main(args):
+    """Entry point for `logger-cli.py migrate`."""
+    from utils import get_log_dir, get_log_layout
+    cwd = os.path.abspath(args.cwd)
+    log_dir = args.logs or get_log_dir(cwd)
+    counts, skipped, moves = migrate_logs(log_dir, args.layout, dry_run=args.dry_run)
+    if args.dry_run:
+        for source, target in moves:
+            print(f"{os.path.relpath(source, log_dir)} -> {os.path.relpath(target, log_dir)}")
+    if not args.quiet:
+        for path, reason in skipped:
+            print(f"skipped {os.path.relpath(path, log_dir)}: {reason}", file=sys.stderr)
+    verb = "would move" if args.dry_run else "moved"
+    print(f"Migrate to {args.layout}: {counts['moved']} {verb}, {counts['skipped']} skipped -> {log_dir}")
+    if not args.dry_run and get_log_layout(cwd) != args.layout:
+        print(f'Set "log_layout": "{args.layout}" in the config so new sessions use it too.')
+    return 0
+
+
+def add_parser(subparsers):
+    parser = subparsers.add_parser(
+        "migrate", help="move existing logs between the flat and date-sharded layouts",
+        description="Move existing logs into the flat or the date-sharded (YYYY/MM/DD) layout.")
+    parser.add_argument("layout", choices=("flat", "date"), help="target layout")
+    parser.add_argument("--cwd", default=os.getcwd(), help="project directory (default: current directory)")
+    parser.add_argument("--logs", help="log directory (default: <project>/.claude/logs)")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="list the moves without making them")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not list skipped files")
+    parser.set_defaults(func=main)
+    return parser
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""
+Opt-in recorder of hook payloads, for replaying real sessions (`logger-cli.py replay`).
+
+Each hook appends its stdin JSON, with the size of the session transcript at
+that moment, to a ring buffer file in the log directory. The file has a fixed
+capacity: once it is full, the oldest records are overwritten, so recording
+can stay on without growing. Records are zlib-compressed and checksummed;
+writers serialize on an flock of the file.
+
+Config (project or user conversation-logger-config.json):
+
+    "record_hooks": true                    record with the default capacity
+    "record_hooks": {"max_bytes": 8388608}  ring buffer capacity in bytes
+
+The file holds prompts and tool payloads as Claude Code sent them, before any
+redaction, and is created readable by its owner only. Not available on Windows.
+"""
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+RING_NAME = ".hook-recording.ring"
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+MIN_MAX_BYTES = 64 * 1024
+
+_MAGIC = b"CLHR"
+_VERSION = 1
+# magic, version, capacity, head, tail, count, next_seq (offsets into the data area)
+_HEADER = struct.Struct("<4sIQQQQQ")
+_HEADER_SIZE = 64
+# payload length, crc32 of the payload
+_RECORD = struct.Struct("<II")
+_WRAP = 0xFFFFFFFF  # Length of the marker that sends readers back to the start
+
+
+def get_record_config(cwd):
+    """Recorder settings ({"max_bytes": ...}) from the config, or None when recording is off."""
+    from utils import get_config_option
+    value = get_config_option(cwd, "record_hooks", None)
+    if value is True:
+        value = {}
+    if not isinstance(value, dict) or not value.get("enabled", True):
+        return None
+    max_bytes = value.get("max_bytes", DEFAULT_MAX_BYTES)
+    if isinstance(max_bytes, bool) or not isinstance(max_bytes, int):
+        max_bytes = DEFAULT_MAX_BYTES
+    return {"max_bytes": max(max_bytes, MIN_MAX_BYTES)}
+
+
+def get_ring_path(log_dir):
+    return os.path.join(log_dir, RING_NAME)
+
+
+class RingBuffer(object):
+    """Fixed-capacity record file. Use as a context manager, which holds the lock."""
+
+    def __init__(self, path, capacity=DEFAULT_MAX_BYTES, create=True):
+        import fcntl
+        self.path = path
+        flags = os.O_RDWR | os.O_CREAT if create else os.O_RDONLY
+        self.fd = os.open(path, flags, 0o600)
+        self._fcntl = fcntl
+        self._writable = create
+        self._capacity = capacity - _HEADER_SIZE
+
+    def __enter__(self):
+        try:
+            self._fcntl.flock(self.fd, self._fcntl.LOCK_EX if self._writable else self._fcntl.LOCK_SH)
+            header = os.pread(self.fd, _HEADER.size, 0)
+            if len(header) == _HEADER.size and header[:4] == _MAGIC:
+                _, _, self.capacity, self.head, self.tail, self.count, self.next_seq = _HEADER.unpack(header)
+            elif self._writable:
+                self.capacity, self.head, self.tail, self.count, self.next_seq = self._capacity, 0, 0, 0, 1
+                os.ftruncate(self.fd, _HEADER_SIZE + self.capacity)
+                self._write_header()
+            else:
+                raise ValueError(f"{self.path} is not a hook recording")
+        except Exception:
+            os.close(self.fd)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._fcntl.flock(self.fd, self._fcntl.LOCK_UN)
+        os.close(self.fd)
+
+    def _write_header(self):
+        os.pwrite(self.fd, _HEADER.pack(_MAGIC, _VERSION, self.capacity, self.head, self.tail,
+                                        self.count, self.next_seq), 0)
+
+    def _length_at(self, pos):
+        """Payload length of the record at pos, or None where readers wrap to the start."""
+        if self.capacity - pos < _RECORD.size:
+            return None
+        length, _ = _RECORD.unpack(os.pread(self.fd, _RECORD.size, _HEADER_SIZE + pos))
+        return None if length == _WRAP else length
+
+    def _free(self, start, end):
+        """Drop the oldest records until none of them lies in [start, end)."""
+        while self.count and start <= self.tail < end:
+            length = self._length_at(self.tail)
+            self.tail += _RECORD.size + length
+            self.count -= 1
+            if self._length_at(self.tail) is None:
+                self.tail = 0
+        if not self.count:
+            self.tail = self.head = start
+
+    def append(self, data):
+        """Store one record (bytes); the oldest records make room. Returns its sequence number."""
+        size = _RECORD.size + len(data)
+        if size > self.capacity // 4:
+            raise ValueError(f"record of {len(data)} bytes is too large for the ring buffer")
+        if self.head + size > self.capacity:
+            self._free(self.head, self.capacity)
+            if self.capacity - self.head >= _RECORD.size:
+                os.pwrite(self.fd, _RECORD.pack(_WRAP, 0), _HEADER_SIZE + self.head)
+            self.head = 0
+            if not self.count:
+                self.tail = 0
+        self._free(self.head, self.head + size)
+        self._write_header()  # The evicted records are gone before they are overwritten
+        os.pwrite(self.fd, _RECORD.pack(len(data), zlib.crc32(data)) + data, _HEADER_SIZE + self.head)
+        self.head += size
+        self.count += 1
+        seq = self.next_seq
+        self.next_seq += 1
+        self._write_header()
+        return seq
+
+    def __iter__(self):
+        """Yield the stored records, oldest first; stops at a damaged record."""
+        pos = self.tail
+        for _ in range(self.count):
+            length = self._length_at(pos)
+            if length is None:
+                pos = 0
+                length = self._length_at(pos)
+            if length is None or pos + _RECORD.size + length > self.capacity:
+                return
+            record = os.pread(self.fd, _RECORD.size + length, _HEADER_SIZE + pos)
+            data = record[_RECORD.size:]
+            if zlib.crc32(data) != _RECORD.unpack(record[:_RECORD.size])[1]:
+                return
+            yield data
+            pos += _RECORD.size + length
+
+
+def record_hook(cwd, log_dir, hook, input_data):
+    """Append a hook's payload to the recording when record_hooks is on. Never raises."""
+    try:
+        config = get_record_config(cwd)
+        if config is None:
+            return
+        transcript_path = input_data.get("transcript_path") or ""
+        try:
+            transcript_size = os.path.getsize(transcript_path) if transcript_path else None
+        except OSError:
+            transcript_size = None
+        record = {"ts": time.time(), "hook": hook, "transcript_size": transcript_size, "input": input_data}
+        data = zlib.compress(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 1)
+        with RingBuffer(get_ring_path(log_dir), config["max_bytes"]) as ring:
+            ring.append(data)
+    except ImportError:
+        pass  # No fcntl (Windows): recording is unavailable
+    except (IOError, OSError, ValueError) as e:
+        print(f"Warning: hook recording failed: {e}", file=sys.stderr)
+
+
+def read_records(path):
+    """Recorded hook payloads, oldest first: dicts with ts, hook, transcript_size and input."""
+    records = []
+    with RingBuffer(path, create=False) as ring:
+        for data in ring:
+            records.append(json.loads(zlib.decompress(data).decode("utf-8")))
+    return records
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""
+Secret redaction for log writes.
+
+Every configured pattern (built-in secret formats, user patterns, literal
+secrets) is compiled into one combined regular expression, so each formatted
+block is scanned once, in a single linear pass, whatever the number of
+patterns. Literal secrets are folded into a prefix trie before they are
+turned into a pattern, which gives the regex engine one branch per distinct
+first character instead of one alternative per secret (the same effect as an
+Aho-Corasick automaton).
+
+Config (project or user conversation-logger-config.json):
+
+    "redaction": true                       built-in patterns only
+    "redaction": {
+        "builtin": true,                    built-in patterns (default true)
+        "patterns": ["corp-[0-9a-f]{32}"],  extra regular expressions
+        "literals": ["hunter2"],            exact secret strings
+        "env": ["MY_SERVICE_TOKEN"],        redact the current values of these variables
+        "replacement": "[REDACTED]"
+    }
+"""
+import os
+import re
+import sys
+
+DEFAULT_REPLACEMENT = "[REDACTED]"
+MIN_LITERAL_LENGTH = 4  # Shorter literals would redact ordinary text
+
+_ENV_SECRET_KEYS = ("SECRET", "TOKEN", "PASSWORD", "PASSWD", "API_KEY", "APIKEY", "ACCESS_KEY",
+                    "PRIVATE_KEY", "CREDENTIAL")
+# Numbers, booleans and bare words under 4 characters are settings rather than
+# credentials (MAX_TOKENS=4096, TOKEN_LIMIT: 1.5, USE_TOKEN=true)
+_ENV_SECRET_VALUE = (r"[A-Z0-9_]{0,64}[ \t]{0,4}[=:][ \t]{0,4}"
+                     r"(?P<value>\"(?![0-9.,]*\")[^\"\n]{1,1024}\"|'(?![0-9.,]*')[^'\n]{1,1024}'"
+                     r"|(?![0-9.,]*(?![^\s\"'])|(?i:true|false|null|none)(?![^\s\"']))[^\s\"']{4,1024})")
+
+# (name, pattern, value_group): when value_group is set only that group is
+# replaced, so the key of an assignment stays readable. Every pattern starts
+# with a fixed character: the regex engine then skips all other positions
+# with a character-set check instead of trying each alternative there.
+BUILTIN_PATTERNS = [
+    ("private_key", r"-----BEGIN [A-Z ]{0,20}PRIVATE KEY-----[\s\S]{0,20000}?-----END [A-Z ]{0,20}PRIVATE KEY-----",
+     None),
+    ("aws_access_key", r"A(?:KIA|SIA)[0-9A-Z]{16}", None),
+    ("github_token", r"gh[pousr]_[A-Za-z0-9]{36,255}", None),
+    ("github_token", r"github_pat_[A-Za-z0-9_]{22,255}", None),
+    ("slack_token", r"xox[abposr]-[A-Za-z0-9-]{10,255}", None),
+    ("api_key", r"sk-[A-Za-z0-9_-]{20,255}", None),
+    ("google_api_key", r"AIza[0-9A-Za-z_-]{35}", None),
+    ("jwt", r"eyJ[A-Za-z0-9_-]{10,4096}\.eyJ[A-Za-z0-9_-]{10,4096}\.[A-Za-z0-9_-]{10,4096}", None),
+    # JSON/YAML keys: "client_secret": "...", "password": "..."
+    ("json_secret", r"\"[A-Za-z_]{0,32}(?:secret|token|password|api_?key|apiKey|access_?key)\"[ \t]{0,4}:[ \t]{0,4}"
+                    r"(?P<value>\"[^\"\n]{1,1024}\")", "value"),
+] + [
+    # Env dumps and shell exports: GITHUB_TOKEN=..., DB_PASSWORD: ...
+    ("env_secret", key + _ENV_SECRET_VALUE, "value") for key in _ENV_SECRET_KEYS
+]
+
+_GLOBAL_FLAGS_RE = re.compile(r'^\(\?([imsx]+)\)')
+_UNSUPPORTED_RE = re.compile(r'\(\?P[<=]|\\[1-9]')
+
+
+def _trie_branches(words):
+    """Alternatives matching any of words, factored into a prefix trie.
+    One alternative per distinct first character, so they can be joined
+    straight into the combined pattern.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # End of a word
+
+    def build(node):
+        end = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not end:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if end else body
+
+    return [re.escape(char) + build(child) for char, child in sorted(trie.items())]
+
+
+def _normalize_config(value):
+    if value is True:
+        return {}
+    if isinstance(value, dict) and value.get("enabled", True):
+        return value
+    return None
+
+
+class Redactor(object):
+    """Compiled redaction patterns. redact(text) returns text with secrets replaced."""
+
+    def __init__(self, patterns, literals=(), replacement=DEFAULT_REPLACEMENT):
+        self.replacement = replacement
+        alternatives = []
+        self._checks = []  # (compiled pattern, value_group) to tell which pattern matched
+        for name, pattern, value_group in patterns:
+            flags = _GLOBAL_FLAGS_RE.match(pattern)
+            if flags:  # Global flags are only allowed at the very start: scope them
+                pattern = f"(?{flags.group(1)}:{pattern[flags.end():]})"
+            self._checks.append((re.compile(pattern), value_group))
+            if value_group:
+                pattern = pattern.replace(f"(?P<{value_group}>", "(?:")
+            alternatives.append(pattern)
+        literals = sorted({s for s in literals if isinstance(s, str) and len(s) >= MIN_LITERAL_LENGTH})
+        if literals:
+            branches = _trie_branches(literals)
+            self._checks.append((re.compile("|".join(branches)), None))
+            alternatives.extend(branches)
+        # No groups around the alternatives: they would hide the leading
+        # characters from the engine's prefix check and make the scan several
+        # times slower. The (rare) matches are classified in _replace instead.
+        self.pattern = re.compile("|".join(alternatives)) if alternatives else None
+
+    def _replace(self, match):
+        text = match.group()
+        for check, value_group in self._checks:
+            found = check.fullmatch(text)
+            if found:
+                if value_group:
+                    return text[:found.start(value_group)] + self.replacement
+                break
+        return self.replacement
+
+    def redact(self, text):
+        if self.pattern is None or not text:
+            return text
+        return self.pattern.sub(self._replace, text)
+
+
+def build_redactor(config):
+    """Redactor for a "redaction" config value, or None when redaction is off."""
+    config = _normalize_config(config)
+    if config is None:
+        return None
+    patterns = list(BUILTIN_PATTERNS) if config.get("builtin", True) else []
+    for i, pattern in enumerate(config.get("patterns", [])):
+        try:
+            re.compile(pattern)
+        except (re.error, TypeError) as e:
+            print(f"Warning: invalid redaction pattern {pattern!r}: {e}", file=sys.stderr)
+            continue
+        if _UNSUPPORTED_RE.search(pattern):
+            print(f"Warning: redaction pattern {pattern!r} uses named groups or backreferences, skipped",
+                  file=sys.stderr)
+            continue
+        patterns.append((f"pattern{i}", pattern, None))
+    literals = list(config.get("literals", []))
+    literals.extend(os.environ[name] for name in config.get("env", []) if os.environ.get(name))
+    return Redactor(patterns, literals, config.get("replacement", DEFAULT_REPLACEMENT))
+
+
+def get_redactor(cwd):
+    """Redactor from the project/user config, or None when redaction is off."""
+    from utils import get_config_option
+    return build_redactor(get_config_option(cwd, "redaction", None))
+
+
+class RedactingWriter(object):
+    """File wrapper that redacts each block before writing it."""
+
+    def __init__(self, f, redactor):
+        self.f = f
+        self.redactor = redactor
+
+    def write(self, text):
+        return self.f.write(self.redactor.redact(text))
+
+    def flush(self):
+        self.f.flush()
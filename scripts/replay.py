@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+"""
+Replay recorded hook payloads through the hook scripts.
+
+A session recorded with "record_hooks" (see recorder.py) is run again, in
+recording order, through log-prompt.py, log-event.py and log-response.py in a
+sandbox: a temporary HOME (temp sessions, caches) and project directory with
+a copy of the project config. Before each hook, the sandbox copy of the
+session transcript is grown to the size the transcript had when the hook ran,
+so every hook sees what it saw in production. The replayed log is then
+compared with a golden log (by default the session's real log), with dates
+and times normalized, and per-hook latency is reported.
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_NAME = "conversation-logger-config.json"
+DIFF_LINES = 40
+
+_DATETIME_RE = re.compile(r'\d{4}-\d{2}-\d{2}[ T_]\d{2}[:-]\d{2}[:-]\d{2}(?:\.\d+)?')
+_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+_TIME_RE = re.compile(r'\b\d{2}:\d{2}:\d{2}\b')
+
+
+def list_sessions(records):
+    """{session_id: (records, first ts, last ts)} in recording order."""
+    sessions = {}
+    for record in records:
+        session_id = record["input"].get("session_id", "")
+        count, first, _ = sessions.get(session_id, (0, record["ts"], None))
+        sessions[session_id] = (count + 1, first, record["ts"])
+    return sessions
+
+
+def select_session(records, selector=None):
+    """(session_id, records) for a session id prefix, or for the last recorded session."""
+    sessions = list_sessions(records)
+    if selector:
+        matches = [sid for sid in sessions if sid.startswith(selector)]
+        if len(matches) != 1:
+            raise ValueError(f"{len(matches)} recorded sessions match '{selector}'")
+        session_id = matches[0]
+    elif records:
+        session_id = records[-1]["input"].get("session_id", "")
+    else:
+        raise ValueError("the recording is empty")
+    return session_id, [r for r in records if r["input"].get("session_id", "") == session_id]
+
+
+class Sandbox(object):
+    """Temporary HOME and project directory the hooks run against."""
+
+    def __init__(self, root, project_cwd):
+        self.root = root
+        self.home = os.path.join(root, "home")
+        self.cwd = os.path.join(root, "project")
+        self.transcript_dir = os.path.join(root, "transcripts")
+        for directory in (self.home, os.path.join(self.cwd, ".claude"), self.transcript_dir):
+            os.makedirs(directory)
+        config = {}
+        try:
+            with open(os.path.join(project_cwd, ".claude", CONFIG_NAME), 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except (IOError, OSError, ValueError):
+            pass
+        config["record_hooks"] = False  # Do not record the replay
+        with open(os.path.join(self.cwd, ".claude", CONFIG_NAME), 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+        self.transcripts = {}  # original path -> sandbox copy
+        self.missing = set()
+
+    def transcript(self, original, size):
+        """Sandbox copy of a transcript, grown (or cut) to size bytes of the original."""
+        copy = self.transcripts.get(original)
+        if copy is None:
+            copy = os.path.join(self.transcript_dir, os.path.basename(original))
+            open(copy, 'wb').close()
+            self.transcripts[original] = copy
+            subagents = os.path.splitext(original)[0]  # {session}/subagents/ next to the transcript
+            if os.path.isdir(subagents):
+                try:
+                    os.symlink(subagents, os.path.splitext(copy)[0])
+                except OSError:
+                    pass
+        if size is None:
+            return copy
+        current = os.path.getsize(copy)
+        if size < current:
+            with open(copy, 'r+b') as f:
+                f.truncate(size)
+        elif size > current:
+            try:
+                with open(original, 'rb') as src, open(copy, 'ab') as dst:
+                    src.seek(current)
+                    dst.write(src.read(size - current))
+            except (IOError, OSError):
+                self.missing.add(original)
+        return copy
+
+    def payload(self, record):
+        """The recorded stdin JSON, pointed at the sandbox."""
+        input_data = dict(record["input"], cwd=self.cwd)
+        if input_data.get("transcript_path"):
+            input_data["transcript_path"] = self.transcript(input_data["transcript_path"],
+                                                            record.get("transcript_size"))
+        return json.dumps(input_data, ensure_ascii=False).encode("utf-8")
+
+    def run(self, record):
+        """Run the record's hook. Returns (seconds, returncode, stderr)."""
+        script = os.path.join(SCRIPTS_DIR, record["hook"] + ".py")
+        payload = self.payload(record)
+        env = dict(os.environ, HOME=self.home, USERPROFILE=self.home)
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, script], input=payload, env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        return time.perf_counter() - start, result.returncode, result.stderr.decode("utf-8", "replace")
+
+
+def read_session_log(log_dir, session_id):
+    """Text of a session's log with all of its parts, or None if there is none."""
+    from utils import _find_existing_log, log_part_path, log_parts
+    log_file = _find_existing_log(log_dir, session_id)
+    if not log_file:
+        return None
+    chunks = []
+    for part in log_parts(log_part_path(log_file, 1)) or [log_file]:
+        with open(part, 'r', encoding='utf-8', errors='replace') as f:
+            chunks.append(f.read())
+    return "".join(chunks)
+
+
+def normalize(text, replacements=()):
+    """Log text with run-dependent values (paths, dates, times) replaced by placeholders."""
+    for old, new in replacements:
+        text = text.replace(old, new)
+    text = _DATETIME_RE.sub("<datetime>", text)
+    text = _DATE_RE.sub("<date>", text)
+    return _TIME_RE.sub("<time>", text)
+
+
+def replay_session(records, project_cwd, root):
+    """Replay records in a sandbox under root. Returns (sandbox, timings, failures):
+    timings are (label, seconds); failures are (label, returncode, stderr).
+    """
+    sandbox = Sandbox(root, project_cwd)
+    timings = []
+    failures = []
+    for record in records:
+        label = record["input"].get("hook_event_name") or record["hook"]
+        seconds, returncode, stderr = sandbox.run(record)
+        timings.append((label, seconds))
+        if returncode:
+            failures.append((label, returncode, stderr.strip()))
+    return sandbox, timings, failures
+
+
+def latency_report(timings):
+    """Lines of a per-hook latency table (count, mean, p50, p95, max in ms)."""
+    by_label = {}
+    for label, seconds in timings:
+        by_label.setdefault(label, []).append(seconds * 1000)
+    by_label["total"] = [seconds * 1000 for _, seconds in timings]
+    lines = [f"{'hook':<20} {'n':>5} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8}  (ms)"]
+    for label, values in by_label.items():
+        values.sort()
+
+        def pct(q):
+            return values[int(round(q * (len(values) - 1)))]
+        lines.append(f"{label:<20} {len(values):>5} {sum(values) / len(values):>8.1f} {pct(0.5):>8.1f} "
+                     f"{pct(0.95):>8.1f} {values[-1]:>8.1f}")
+    return lines
+
+
+def main(args):
+    """Entry point for `logger-cli.py replay`."""
+    import difflib
+    from recorder import get_ring_path, read_records
+    from utils import get_log_dir
+    cwd = os.path.abspath(args.cwd)
+    log_dir = args.logs or get_log_dir(cwd)
+    ring = args.recording or get_ring_path(log_dir)
+    try:
+        records = read_records(ring)
+    except (IOError, OSError, ValueError) as e:
+        print(f"Cannot read recording {ring}: {e}", file=sys.stderr)
+        return 2
+
+    if args.list:
+        for session_id, (count, first, last) in list_sessions(records).items():
+            start = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(first))
+            print(f"{session_id}  {count:>5} hooks  {start}  {last - first:>8.1f} s")
+        return 0
+    try:
+        session_id, session = select_session(records, args.session)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print(f"Replaying {len(session)} hooks of session {session_id}", file=sys.stderr)
+
+    timings = []
+    actual = None
+    for run in range(max(args.repeat, 1)):
+        root = tempfile.mkdtemp(prefix="conversation-logger-replay-")
+        try:
+            sandbox, run_timings, failures = replay_session(session, cwd, root)
+            timings.extend(run_timings)
+            for label, returncode, stderr in failures:
+                print(f"{label} exited with {returncode}: {stderr.splitlines()[-1] if stderr else ''}",
+                      file=sys.stderr)
+            for original in sorted(sandbox.missing):
+                print(f"Warning: transcript {original} is missing or shorter than recorded", file=sys.stderr)
+            if run == 0:
+                sandbox_logs = os.path.join(sandbox.cwd, ".claude", "logs")
+                actual = read_session_log(sandbox_logs, session_id)
+                if args.save_golden and actual is not None:
+                    os.makedirs(args.save_golden, exist_ok=True)
+                    with open(os.path.join(args.save_golden, f"{session_id}.log"), 'w', encoding='utf-8') as f:
+                        f.write(normalize(actual, [(sandbox.cwd, cwd)]))
+                actual = normalize(actual or "", [(sandbox.cwd, cwd)])
+        finally:
+            if args.keep:
+                print(f"Sandbox kept in {root}", file=sys.stderr)
+            else:
+                shutil.rmtree(root, ignore_errors=True)
+
+    for line in latency_report(timings):
+        print(line)
+
+    if args.golden and os.path.isfile(args.golden):
+        with open(args.golden, 'r', encoding='utf-8', errors='replace') as f:
+            golden = f.read()
+    elif args.golden:
+        golden_file = os.path.join(args.golden, f"{session_id}.log")
+        golden = None
+        if os.path.exists(golden_file):
+            with open(golden_file, 'r', encoding='utf-8', errors='replace') as f:
+                golden = f.read()
+    else:
+        golden = read_session_log(log_dir, session_id)
+    if golden is None:
+        print("No golden log to compare with", file=sys.stderr)
+        return 0
+    diff = list(difflib.unified_diff(normalize(golden).splitlines(), actual.splitlines(),
+                                     "golden", "replay", lineterm="", n=1))
+    if not diff:
+        print("Replayed log matches the golden log")
+        return 0
+    changed = sum(1 for line in diff if line[:1] in "+-" and line[:3] not in ("+++", "---"))
+    print(f"Replayed log differs from the golden log ({changed} lines):")
+    for line in diff[:args.diff_lines]:
+        print(line)
+    if len(diff) > args.diff_lines:
+        print(f"... {len(diff) - args.diff_lines} more diff lines")
+    return 1
+
+
+def add_parser(subparsers):
+    parser = subparsers.add_parser(
+        "replay", help="replay a recorded session through the hooks",
+        description="Replay a session recorded with \"record_hooks\" through the hook scripts in a sandbox, "
+                    "compare the log with a golden log and report per-hook latency.")
+    parser.add_argument("session", nargs="?", help="session id or prefix (default: the last recorded session)")
+    parser.add_argument("--cwd", default=os.getcwd(), help="project directory (default: current directory)")
+    parser.add_argument("--logs", help="log directory (default: <project>/.claude/logs)")
+    parser.add_argument("--recording", help="recording file (default: <logs>/.hook-recording.ring)")
+    parser.add_argument("--list", action="store_true", help="list the recorded sessions")
+    parser.add_argument("--golden", help="golden log file, or a directory written by --save-golden "
+                                         "(default: the session's log in the project)")
+    parser.add_argument("--save-golden", metavar="DIR", help="save the replayed log as DIR/<session>.log")
+    parser.add_argument("--repeat", type=int, default=1, help="replay N times for steadier latency figures")
+    parser.add_argument("--diff-lines", type=int, default=DIFF_LINES, help="diff lines to print")
+    parser.add_argument("--keep", action="store_true", help="keep the sandbox directory")
+    parser.set_defaults(func=main)
+    return parser
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+"""
+Per-session statistics sidecars and the cross-session stats report.
+
+The Stop hook writes {log_dir}/.stats/{session_id}.json after every turn from
+the counters kept in the shared transcript parse cache, so a sidecar is always
+current without re-parsing the session. The `stats` command merges sidecars;
+sessions without one are parsed from their transcripts in a process pool and
+get a sidecar written for next time.
+"""
+import json
+import os
+import sys
+
+STATS_VERSION = 1
+STATS_DIR_NAME = ".stats"
+
+
+def get_stats_dir(log_dir):
+    return os.path.join(log_dir, STATS_DIR_NAME)
+
+
+def write_session_stats(log_dir, session_id, stats, transcript_path=""):
+    """Write a session's stats sidecar atomically."""
+    stats_dir = get_stats_dir(log_dir)
+    os.makedirs(stats_dir, exist_ok=True)
+    path = os.path.join(stats_dir, f"{session_id}.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(stats, version=STATS_VERSION, session_id=session_id,
+                       transcript_path=transcript_path), f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_session_stats(log_dir):
+    """Load every sidecar in log_dir. Returns {session_id: stats}."""
+    stats_dir = get_stats_dir(log_dir)
+    sessions = {}
+    if not os.path.isdir(stats_dir):
+        return sessions
+    for name in os.listdir(stats_dir):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(stats_dir, name), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            continue
+        if isinstance(data, dict) and data.get("version") == STATS_VERSION:
+            sessions[data.get("session_id") or name[:-5]] = data
+    return sessions
+
+
+def transcript_stats(transcript_path):
+    """Process pool worker: stats for one transcript parsed from scratch."""
+    from transcript import TranscriptReader, TranscriptCache
+    with TranscriptReader(transcript_path) as reader:
+        cache = TranscriptCache(transcript_path, reader.inode)
+        cache.scan(reader)
+    return cache.stats()
+
+
+def merge_stats(sessions):
+    """Merge per-session stats into totals with rates."""
+    totals = {"sessions": 0, "turns": 0, "tool_calls": {}, "output_bytes": {}, "follow_ups": {}}
+    for stats in sessions:
+        totals["sessions"] += 1
+        totals["turns"] += stats.get("turns", 0)
+        for key in ("tool_calls", "output_bytes", "follow_ups"):
+            merged = totals[key]
+            for name, value in stats.get(key, {}).items():
+                name = name or "unknown"
+                merged[name] = merged.get(name, 0) + value
+    calls = sum(totals["tool_calls"].values())
+    follow_ups = totals["follow_ups"]
+    totals["total_tool_calls"] = calls
+    totals["total_output_bytes"] = sum(totals["output_bytes"].values())
+    totals["rejection_rate"] = follow_ups.get("TOOL_REJECTION", 0) / calls if calls else 0.0
+    totals["interrupt_rate"] = follow_ups.get("INTERRUPT", 0) / totals["turns"] if totals["turns"] else 0.0
+    return totals
+
+
+def collect_stats(log_dir, transcripts=(), jobs=None, progress=None):
+    """Sidecar stats for log_dir plus stats parsed for transcripts without a sidecar.
+    Returns {session_id: stats}.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    sessions = load_session_stats(log_dir)
+    missing = [path for path in transcripts
+               if os.path.splitext(os.path.basename(path))[0] not in sessions]
+    if not missing:
+        return sessions
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(transcript_stats, path): path for path in missing}
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            session_id = os.path.splitext(os.path.basename(path))[0]
+            try:
+                stats = future.result()
+            except Exception as e:
+                print(f"Warning: failed to parse {path}: {e}", file=sys.stderr)
+                continue
+            sessions[session_id] = stats
+            try:
+                write_session_stats(log_dir, session_id, stats, path)
+            except (IOError, OSError):
+                pass  # Report still works; parsed again next time
+            if progress:
+                progress(done, len(missing), session_id)
+    return sessions
+
+
+def _format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024.0
+
+
+def format_report(totals):
+    lines = [
+        f"Sessions: {totals['sessions']}",
+        f"Turns: {totals['turns']}",
+        f"Tool calls: {totals['total_tool_calls']}",
+        f"Tool output: {_format_bytes(totals['total_output_bytes'])}",
+        f"Rejection rate: {totals['rejection_rate']:.1%} of tool calls",
+        f"Interrupt rate: {totals['interrupt_rate']:.1%} of turns",
+        "",
+        f"{'Tool':<24} {'Calls':>8} {'Output':>10} {'Avg':>10}",
+    ]
+    names = set(totals["tool_calls"]) | set(totals["output_bytes"])
+    for name in sorted(names, key=lambda n: (-totals["tool_calls"].get(n, 0), n)):
+        calls = totals["tool_calls"].get(name, 0)
+        output = totals["output_bytes"].get(name, 0)
+        average = _format_bytes(output / calls) if calls else "-"
+        lines.append(f"{name:<24} {calls:>8} {_format_bytes(output):>10} {average:>10}")
+    return "\n".join(lines)
+
+
+def main(args):
+    """Entry point for `logger-cli.py stats`."""
+    from backfill import find_transcripts, get_project_transcript_dir
+    from utils import get_log_dir
+    cwd = os.path.abspath(args.cwd)
+    log_dir = args.logs or get_log_dir(cwd)
+    transcripts = find_transcripts(args.transcripts or get_project_transcript_dir(cwd))
+
+    def progress(done, total, session_id):
+        print(f"[{done}/{total}] parsed {session_id}", file=sys.stderr)
+
+    sessions = collect_stats(log_dir, transcripts, jobs=args.jobs,
+                             progress=progress if not args.quiet else None)
+    totals = merge_stats(sessions.values())
+    if args.json:
+        print(json.dumps(totals, indent=2, sort_keys=True))
+    else:
+        print(format_report(totals))
+    return 0
+
+
+def add_parser(subparsers):
+    parser = subparsers.add_parser(
+        "stats", help="tool usage and interaction statistics across sessions",
+        description="Merge per-session stats sidecars into a report; sessions without one are parsed.")
+    parser.add_argument("--cwd", default=os.getcwd(), help="project directory (default: current directory)")
+    parser.add_argument("--logs", help="log directory (default: <project>/.claude/logs)")
+    parser.add_argument("--transcripts", help="transcript directory (default: ~/.claude/projects/<project>)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="print merged totals as JSON")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no per-session progress")
+    parser.set_defaults(func=main)
+    return parser
@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+"""
+Subagent transcript capture for the SubagentStop hook.
+
+Each finished subagent is appended to a per-session queue in the temp session
+directory. Whichever SubagentStop hook holds the session's capture lock drains
+the queue: the queued sidechain transcripts are parsed and written to the logs
+one at a time, in queue order. Taken entries stay in a draining file until
+written, so a hook killed mid-drain loses nothing. Work that does not finish
+within the time budget is re-queued; the Stop and SessionEnd hooks drain
+whatever is left.
+"""
+import json
+import os
+import sys
+import time
+
+CAPTURE_BUDGET_SECONDS = 3.5  # SubagentStop hook timeout is 5 s
+LOCK_STALE_SECONDS = 30
+POLL_SECONDS = 0.05
+
+
+class _DeadlineExceeded(Exception):
+    pass
+
+
+def find_subagent_transcript(transcript_path, session_id, agent_id, hint=""):
+    """Locate a subagent's sidechain transcript. Returns path or None.
+    Tries the path given by the hook, then the session's subagents/ directory
+    and the project directory next to the main transcript.
+    """
+    if hint and os.path.isfile(hint):
+        return hint
+    if not agent_id or not transcript_path:
+        return None
+    base = os.path.dirname(transcript_path)
+    for path in (os.path.join(base, session_id, "subagents", f"agent-{agent_id}.jsonl"),
+                 os.path.join(base, f"agent-{agent_id}.jsonl")):
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _queue_paths(session_id, temp_dir=None):
+    if temp_dir is None:
+        from utils import get_temp_session_dir
+        temp_dir = get_temp_session_dir()
+    base = os.path.join(temp_dir, f".subagent_queue_{session_id}")
+    return base + ".jsonl", base + ".lock"
+
+
+def enqueue_subagent(session_id, agent, temp_dir=None):
+    """Append a finished subagent ({"id", "type", "path"}) to the session's capture queue."""
+    queue_file, _ = _queue_paths(session_id, temp_dir)
+    fd = os.open(queue_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+    try:
+        os.write(fd, (json.dumps(agent) + "\n").encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+def _try_lock(lock_file):
+    try:
+        fd = os.open(lock_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        try:
+            if time.time() - os.path.getmtime(lock_file) > LOCK_STALE_SECONDS:
+                os.remove(lock_file)  # Holder died; retried on the next poll
+        except OSError:
+            pass
+        return False
+    os.write(fd, str(os.getpid()).encode('ascii'))
+    os.close(fd)
+    return True
+
+
+def _read_agents(path):
+    agents = []
+    try:
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    agents.append(json.loads(line))
+                except ValueError:
+                    pass  # Torn write from a killed hook
+    except OSError:
+        pass
+    return agents
+
+
+def _drain_files(queue_file):
+    """Draining files of earlier drains that did not finish, oldest first."""
+    directory, name = os.path.split(queue_file)
+    try:
+        names = [n for n in os.listdir(directory) if n.startswith(name + ".") and n.endswith(".draining")]
+    except OSError:
+        return []
+    paths = [os.path.join(directory, n) for n in names]
+    try:
+        paths.sort(key=os.path.getmtime)
+    except OSError:
+        pass  # Removed by a concurrent cleanup; the order does not matter then
+    return paths
+
+
+def _pending(queue_file):
+    return os.path.exists(queue_file) or bool(_drain_files(queue_file))
+
+
+def _save_drain(draining, agents):
+    """Record the taken subagents not yet written; removes the draining file when none are left."""
+    if not agents:
+        try:
+            os.remove(draining)
+        except OSError:
+            pass
+        return
+    tmp_path = f"{draining}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write("".join(json.dumps(agent) + "\n" for agent in agents))
+    os.replace(tmp_path, draining)
+
+
+def _take_queue(queue_file):
+    """Take every queued subagent, after any left by a drain that was killed.
+    The taken subagents stay in the returned draining file until they are written.
+    Returns (draining_file, agents).
+    """
+    draining = f"{queue_file}.{os.getpid()}.draining"
+    sources = _drain_files(queue_file)
+    taken = f"{queue_file}.{os.getpid()}.queue.draining"
+    try:
+        os.replace(queue_file, taken)
+        sources.append(taken)
+    except OSError:
+        pass
+    agents = []
+    for path in sources:
+        agents.extend(_read_agents(path))
+    _save_drain(draining, agents)
+    for path in sources:
+        if path != draining:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return draining, agents
+
+
+def _until(lines, deadline):
+    for item in lines:
+        if time.monotonic() > deadline:
+            raise _DeadlineExceeded()
+        yield item
+
+
+def _user_outputs(entry, classification, log_response):
+    """Outputs for a user-type entry inside a subagent transcript."""
+    if classification == "TOOL_REJECTION":
+        text = log_response.extract_user_interaction(entry, classification)
+        suffix = f" with user message: {text}" if text else ""
+        return [("tool_rejection", f"  \u23bf  Tool use rejected{suffix}")]
+    if classification == "INTERRUPT":
+        return [("interrupt", "  \u23bf  Interrupted")]
+    outputs = []
+    content = entry.get("message", {}).get("content", [])
+    for item in (content if isinstance(content, list) else []):
+        if isinstance(item, dict) and item.get("type") == "tool_result":
+            outputs.extend(log_response.extract_full_content(item))
+    return outputs
+
+
+def collect_subagent_outputs(lines, log_response):
+    """Collect every output of a subagent run: assistant text, tool calls and tool results.
+    Unlike the main Stop hook, tool results do not reset the collected outputs.
+    The initial task prompt is skipped (it is already logged with the Task call).
+    """
+    from transcript import LazyEntry, classify_user_entry
+    all_outputs = []
+    for _, line in lines:
+        try:
+            entry = LazyEntry(line)
+            if entry.type == "user":
+                classification = classify_user_entry(entry.skeleton())
+                if classification != "PROMPT":
+                    all_outputs.extend(_user_outputs(entry.materialize(), classification, log_response))
+            else:
+                all_outputs.extend(log_response.extract_full_content(entry.materialize()))
+        except ValueError:
+            pass
+    return all_outputs
+
+
+def render_subagent(agent, log_format, deadline, detail="full"):
+    """Parse and render one subagent transcript. Returns str, or None past the deadline."""
+    from transcript import TranscriptReader
+    from utils import load_hook_module
+    log_response = load_hook_module("log_response")
+    if time.monotonic() > deadline:
+        return None
+    try:
+        with TranscriptReader(agent["path"]) as reader:
+            outputs = collect_subagent_outputs(
+                _until(reader.iter_lines(complete_only=True), deadline), log_response)
+    except _DeadlineExceeded:
+        return None
+    except (IOError, OSError) as e:
+        return f"[Subagent transcript unreadable: {e}]"
+    return log_response.format_outputs(outputs, log_format, detail)
+
+
+def linked_log_path(log_file, agent_id):
+    """Per-subagent log path next to the session log (named after its first part)."""
+    from utils import log_part_path
+    stem, ext = os.path.splitext(log_part_path(log_file, 1))
+    return f"{stem}_subagent-{agent_id}{ext}"
+
+
+def _write_rendered(agent, rendered, mode, log_file, log_format, durability="none", redactor=None):
+    from datetime import datetime
+    from durability import open_log
+    from utils import ensure_markdown_header
+    agent_type = agent.get("type", "unknown")
+    agent_id = agent.get("id", "")
+    ts = datetime.now().strftime('%H:%M:%S')
+
+    if mode == "linked":
+        target = linked_log_path(log_file, agent_id or agent_type)
+        with open_log(target, durability, redactor) as f:
+            if log_format == "markdown":
+                ensure_markdown_header(f, target)
+                f.write(f"\n## \U0001f9e9 Subagent `{agent_type}` \u2014 {ts}\n\n")
+                f.write(f"> Session log: [{os.path.basename(log_file)}]({os.path.basename(log_file)})\n\n")
+                f.write(f"{rendered}\n")
+            else:
+                f.write(f"~ SUBAGENT TRANSCRIPT ({ts}) | type={agent_type} | id={agent_id}\n")
+                f.write(f"~ session log: {os.path.basename(log_file)}\n")
+                f.write(f"{rendered}\n{'='*80}\n\n")
+        name = os.path.basename(target)
+        with open_log(log_file, durability, redactor) as f:
+            if log_format == "markdown":
+                f.write(f"> **Subagent Log** -- `{agent_type}` | [{name}]({name})\n")
+            else:
+                f.write(f"~ SUBAGENT LOG | type={agent_type} | file={name}\n")
+        return
+
+    with open_log(log_file, durability, redactor) as f:
+        if log_format == "markdown":
+            f.write(f"\n## \U0001f9e9 Subagent `{agent_type}` \u2014 {ts}\n\n{rendered}\n\n")
+        else:
+            f.write(f"~ SUBAGENT TRANSCRIPT ({ts}) | type={agent_type} | id={agent_id}\n")
+            f.write(f"{rendered}\n~ END SUBAGENT TRANSCRIPT\n")
+
+
+def _drain(session_id, mode, log_file, log_format, temp_dir, deadline, durability, redactor, detail):
+    """Write every queued subagent in queue order until the deadline. Caller holds the lock.
+    Transcripts are rendered one at a time: parsing and formatting hold the GIL, so a
+    thread pool ran no faster and only added its overhead to the budget.
+    """
+    queue_file, _ = _queue_paths(session_id, temp_dir)
+    written = 0
+    while time.monotonic() < deadline:
+        draining, agents = _take_queue(queue_file)
+        if not agents:
+            break
+        retry = False
+        for index, queued in enumerate(agents):
+            rendered = render_subagent(queued, log_format, deadline, detail)
+            if rendered is None:
+                enqueue_subagent(session_id, queued, temp_dir)  # Retried by the next drain
+                retry = True
+            else:
+                try:
+                    _write_rendered(queued, rendered, mode, log_file, log_format, durability, redactor)
+                    written += 1
+                except (IOError, OSError) as e:
+                    print(f"Warning: failed to write subagent transcript: {e}", file=sys.stderr)
+                    enqueue_subagent(session_id, queued, temp_dir)
+                    retry = True
+            # Dropped from the draining file only once written or queued again
+            _save_drain(draining, agents[index + 1:])
+        if retry:
+            break
+    return written
+
+
+def capture_subagents(session_id, agent, mode, log_file, log_format,
+                      temp_dir=None, budget=CAPTURE_BUDGET_SECONDS, durability="none", redactor=None,
+                      detail="full"):
+    """Queue a finished subagent and drain the session's queue if no other hook is.
+    Returns the number of subagent transcripts written by this call.
+    """
+    deadline = time.monotonic() + budget
+    queue_file, lock_file = _queue_paths(session_id, temp_dir)
+    enqueue_subagent(session_id, agent, temp_dir)
+
+    # Wait for the lock: the current holder may already drain our entry, but if
+    # it released just before we queued, we must drain it ourselves.
+    while not _try_lock(lock_file):
+        if time.monotonic() > deadline or not os.path.exists(queue_file):
+            return 0
+        time.sleep(POLL_SECONDS)
+    try:
+        return _drain(session_id, mode, log_file, log_format, temp_dir, deadline, durability, redactor, detail)
+    finally:
+        try:
+            os.remove(lock_file)
+        except OSError:
+            pass
+
+
+def drain_subagents(session_id, mode, log_file, log_format,
+                    temp_dir=None, budget=CAPTURE_BUDGET_SECONDS, durability="none", redactor=None,
+                    detail="full"):
+    """Write subagents left queued by SubagentStop hooks that ran out of time or were killed.
+    Called by the Stop and SessionEnd hooks, so the last subagent of a turn is not left
+    waiting for a SubagentStop that never comes. Returns the number written.
+    """
+    deadline = time.monotonic() + budget
+    queue_file, lock_file = _queue_paths(session_id, temp_dir)
+    if not _pending(queue_file):
+        return 0
+    while not _try_lock(lock_file):
+        if time.monotonic() > deadline or not _pending(queue_file):
+            return 0
+        time.sleep(POLL_SECONDS)
+    try:
+        if not _pending(queue_file):
+            return 0
+        return _drain(session_id, mode, log_file, log_format, temp_dir, deadline, durability, redactor, detail)
+    finally:
+        try:
+            os.remove(lock_file)
+        except OSError:
+            pass
@@ -0,0 +1,755 @@
+#!/usr/bin/env python
+"""
+Transcript access helpers for conversation-logger plugin.
+Memory-mapped line readers and lazy views over raw transcript JSONL lines.
+"""
+import json
+import mmap
+import os
+import re
+
+# classify_user_entry only checks short startswith() prefixes on tool results
+CLASSIFY_PREFIX_CHARS = 256
+# Lines below this size are cheaper to decode in one json.loads call
+LAZY_MIN_BYTES = 1 << 20
+# Tools whose input names a file the session modified
+MODIFYING_TOOLS = ("Edit", "Write", "MultiEdit", "NotebookEdit")
+
+_WS_RE = re.compile(rb'[ \t\r\n]*')
+# Bounded repetition keeps the regex backtracking stack constant on huge strings
+_STRING_CHUNK_RE = re.compile(rb'[^"\\]*(?:\\.[^"\\]*){0,1024}', re.S)
+_SCALAR_RE = re.compile(rb'[^,\]}\s]*')
+_STRUCT_RE = re.compile(rb'["\[\]{}]')
+_TOOL_USE_RE = re.compile(rb'"tool_use"')
+_ESCAPE_RE = re.compile(rb'\\')
+
+_QUOTE = ord('"')
+_OPEN = (ord('{'), ord('['))
+_LBRACE = ord('{')
+_LBRACKET = ord('[')
+_RBRACE = ord('}')
+_RBRACKET = ord(']')
+_COMMA = ord(',')
+_COLON = ord(':')
+
+
+def _skip_ws(buf, pos, end):
+    return _WS_RE.match(buf, pos, end).end()
+
+
+def _skip_string(buf, pos, end):
+    """Return the end offset of the JSON string starting at pos."""
+    if pos >= end or buf[pos] != _QUOTE:
+        raise ValueError(f"Expecting string at {pos}")
+    cursor = pos + 1
+    while True:
+        stop = _STRING_CHUNK_RE.match(buf, cursor, end).end()
+        if stop < end and buf[stop] == _QUOTE:
+            return stop + 1
+        if stop == cursor:
+            raise ValueError(f"Unterminated string at {pos}")
+        cursor = stop
+
+
+def _skip_value(buf, pos, end, memo=None):
+    """Return the end offset of the JSON value starting at pos, without decoding it.
+    memo maps already skipped start offsets to their end offsets.
+    """
+    if memo is not None and pos in memo:
+        return memo[pos]
+    if pos >= end:
+        raise ValueError(f"Expecting value at {pos}")
+    start = pos
+    c = buf[pos]
+    if c == _QUOTE:
+        stop = _skip_string(buf, pos, end)
+    elif c in _OPEN:
+        depth = 0
+        while True:
+            m = _STRUCT_RE.search(buf, pos, end)
+            if m is None:
+                raise ValueError(f"Unterminated container at {start}")
+            pos = m.start()
+            c = buf[pos]
+            if c == _QUOTE:
+                pos = _skip_value(buf, pos, end, memo)
+                continue
+            pos += 1
+            depth += 1 if c in _OPEN else -1
+            if depth == 0:
+                break
+        stop = pos
+    else:
+        stop = _SCALAR_RE.match(buf, pos, end).end()
+        if stop == pos:
+            raise ValueError(f"Expecting value at {pos}")
+    if memo is not None:
+        memo[start] = stop
+    return stop
+
+
+def _iter_members(buf, pos, end, memo=None):
+    """Yield (key, value_start, value_end) for the JSON object starting at pos."""
+    if pos >= end or buf[pos] != _LBRACE:
+        raise ValueError(f"Expecting object at {pos}")
+    pos = _skip_ws(buf, pos + 1, end)
+    if pos < end and buf[pos] == _RBRACE:
+        return
+    while True:
+        key_end = _skip_string(buf, pos, end)
+        key = json.loads(bytes(buf[pos:key_end]))
+        pos = _skip_ws(buf, key_end, end)
+        if pos >= end or buf[pos] != _COLON:
+            raise ValueError(f"Expecting ':' at {pos}")
+        value_start = _skip_ws(buf, pos + 1, end)
+        value_end = _skip_value(buf, value_start, end, memo)
+        yield key, value_start, value_end
+        pos = _skip_ws(buf, value_end, end)
+        if pos < end and buf[pos] == _COMMA:
+            pos = _skip_ws(buf, pos + 1, end)
+            continue
+        if pos < end and buf[pos] == _RBRACE:
+            return
+        raise ValueError(f"Expecting ',' or '}}' at {pos}")
+
+
+def _iter_elements(buf, pos, end, memo=None):
+    """Yield (value_start, value_end) for the JSON array starting at pos."""
+    if pos >= end or buf[pos] != _LBRACKET:
+        raise ValueError(f"Expecting array at {pos}")
+    pos = _skip_ws(buf, pos + 1, end)
+    if pos < end and buf[pos] == _RBRACKET:
+        return
+    while True:
+        value_end = _skip_value(buf, pos, end, memo)
+        yield pos, value_end
+        pos = _skip_ws(buf, value_end, end)
+        if pos < end and buf[pos] == _COMMA:
+            pos = _skip_ws(buf, pos + 1, end)
+            continue
+        if pos < end and buf[pos] == _RBRACKET:
+            return
+        raise ValueError(f"Expecting ',' or ']' at {pos}")
+
+
+def _decode_span(buf, start, end):
+    return json.loads(bytes(buf[start:end]))
+
+
+def _string_size(buf, start, end):
+    """UTF-8 length of the JSON string at [start, end) once decoded.
+    Only strings containing escapes are decoded to measure them.
+    """
+    if buf[start] != _QUOTE:
+        return 0
+    if _ESCAPE_RE.search(buf, start, end) is None:
+        return end - start - 2
+    return len(_decode_span(buf, start, end).encode('utf-8'))
+
+
+def _decode_string_prefix(buf, start, end, max_chars):
+    """Decode at most roughly max_chars characters of the JSON string at [start, end)."""
+    # UTF-8 needs up to 4 bytes per character; escapes up to 6
+    limit = max_chars * 4
+    if end - start <= limit + 2:
+        return _decode_span(buf, start, end)
+    chunk = bytes(buf[start + 1:start + 1 + limit])
+    # Back off until the cut no longer splits an escape or a multi-byte character
+    for trim in range(12):
+        try:
+            return json.loads(b'"' + chunk[:len(chunk) - trim] + b'"')[:max_chars]
+        except ValueError:
+            continue
+    return ""
+
+
+class LazyEntry(object):
+    """Read-only view over one raw transcript JSONL line.
+
+    Lines of at least LAZY_MIN_BYTES are not decoded up front: only the
+    top-level key layout is scanned, individual fields are decoded on demand,
+    and skeleton() decodes just enough of a user entry for
+    classify_user_entry(). The full entry is materialised by materialize().
+    Smaller lines are decoded immediately.
+    """
+
+    __slots__ = ("_buf", "_start", "_end", "_fields", "_entry", "_memo")
+
+    def __init__(self, buf, start=0, end=None):
+        self._buf = buf
+        self._start = start
+        self._end = len(buf) if end is None else end
+        self._fields = None
+        self._entry = None
+        self._memo = {}
+        if self._end - self._start < LAZY_MIN_BYTES:
+            self.materialize()
+
+    def _index(self):
+        if self._fields is None:
+            start = _skip_ws(self._buf, self._start, self._end)
+            self._fields = {
+                key: (vs, ve) for key, vs, ve in _iter_members(self._buf, start, self._end, self._memo)
+            }
+        return self._fields
+
+    def get(self, key, default=None):
+        """Decode a single top-level field."""
+        if self._entry is not None:
+            return self._entry.get(key, default)
+        span = self._index().get(key)
+        if span is None:
+            return default
+        return _decode_span(self._buf, span[0], span[1])
+
+    @property
+    def type(self):
+        value = self.get("type", "unknown")
+        return value if isinstance(value, str) else "unknown"
+
+    def skeleton(self, max_chars=CLASSIFY_PREFIX_CHARS):
+        """Return a minimal entry dict sufficient for classify_user_entry().
+
+        Tool result bodies are reduced to a prefix of max_chars characters;
+        only the first tool_result and first text item keep their payload.
+        """
+        if self._entry is not None:
+            return self._entry
+        buf = self._buf
+        span = self._index().get("message")
+        skeleton = {"type": self.type}
+        if span is None or buf[span[0]] != _LBRACE:
+            return skeleton
+        message = {}
+        for key, vs, ve in _iter_members(buf, span[0], span[1], self._memo):
+            if key != "content":
+                continue
+            if buf[vs] == _QUOTE:
+                message["content"] = _decode_string_prefix(buf, vs, ve, max_chars)
+            elif buf[vs] == _LBRACKET:
+                message["content"] = self._skeleton_items(vs, ve, max_chars)
+            else:
+                message["content"] = _decode_span(buf, vs, ve)
+        skeleton["message"] = message
+        return skeleton
+
+    def _skeleton_items(self, start, end, max_chars):
+        buf = self._buf
+        items = []
+        seen_result = seen_text = False
+        for is_, ie in _iter_elements(buf, start, end, self._memo):
+            if buf[is_] != _LBRACE:
+                items.append(_decode_span(buf, is_, ie))
+                continue
+            members = {key: (vs, ve) for key, vs, ve in _iter_members(buf, is_, ie, self._memo)}
+            item = {}
+            if "type" in members:
+                item["type"] = _decode_span(buf, *members["type"])
+            if item.get("type") == "tool_result" and not seen_result:
+                seen_result = True
+                if "content" in members:
+                    vs, ve = members["content"]
+                    if buf[vs] == _QUOTE:
+                        item["content"] = _decode_string_prefix(buf, vs, ve, max_chars)
+                    else:
+                        item["content"] = []  # Non-string results classify as TOOL_RESULT
+            elif item.get("type") == "text" and not seen_text:
+                seen_text = True
+                if "text" in members:
+                    item["text"] = _decode_span(buf, *members["text"])
+            items.append(item)
+        return items
+
+    def tool_results(self):
+        """Return (tool_use_id, output_bytes) for each tool_result item in message content.
+        Large lines are measured from the raw JSON string spans, decoding only outputs
+        with escapes, and give the same sizes as entry_tool_results().
+        """
+        if self._entry is not None:
+            return entry_tool_results(self._entry)
+        buf = self._buf
+        span = self._index().get("message")
+        if span is None or buf[span[0]] != _LBRACE:
+            return []
+        results = []
+        for key, vs, ve in _iter_members(buf, span[0], span[1], self._memo):
+            if key != "content" or buf[vs] != _LBRACKET:
+                continue
+            for is_, ie in _iter_elements(buf, vs, ve, self._memo):
+                if buf[is_] != _LBRACE:
+                    continue
+                members = {k: (a, b) for k, a, b in _iter_members(buf, is_, ie, self._memo)}
+                if "type" not in members or _decode_span(buf, *members["type"]) != "tool_result":
+                    continue
+                tool_use_id = _decode_span(buf, *members["tool_use_id"]) if "tool_use_id" in members else None
+                size = 0
+                if "content" in members:
+                    cs, ce = members["content"]
+                    if buf[cs] == _LBRACKET:
+                        size = sum(self._text_size(ps, pe) for ps, pe in _iter_elements(buf, cs, ce, self._memo))
+                    else:
+                        size = _string_size(buf, cs, ce)
+                results.append((tool_use_id, size))
+        return results
+
+    def _text_size(self, start, end):
+        """Size of the "text" member of a content list item, as entry_tool_results() counts it."""
+        if self._buf[start] != _LBRACE:
+            return 0
+        for key, vs, ve in _iter_members(self._buf, start, end, self._memo):
+            if key == "text":
+                return _string_size(self._buf, vs, ve)
+        return 0
+
+    def materialize(self):
+        """Decode and cache the full entry."""
+        if self._entry is None:
+            self._entry = _decode_span(self._buf, self._start, self._end)
+            self._fields = self._memo = None
+        return self._entry
+
+
+class TranscriptReader(object):
+    """Memory-mapped transcript reader yielding zero-copy line views.
+
+    Lines are yielded as (offset, memoryview) pairs without the trailing
+    newline; empty lines are skipped. Views are only valid until close().
+    Use as a context manager.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.inode = os.fstat(self._file.fileno()).st_ino
+        self._mm = None
+        self._view = None
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mm)
+        except ValueError:
+            pass  # Empty file cannot be mapped
+        except Exception:
+            self._file.close()
+            raise
+
+    @property
+    def size(self):
+        return len(self._mm) if self._mm is not None else 0
+
+    def iter_lines(self, start=0, complete_only=False):
+        """Yield (offset, view) for each line from byte offset start forward.
+        With complete_only, a final line without a newline (still being written) is skipped.
+        """
+        mm, view = self._mm, self._view
+        if mm is None:
+            return
+        size = len(mm)
+        pos = start
+        while pos < size:
+            nl = mm.find(b'\n', pos)
+            if nl == -1 and complete_only:
+                return
+            stop = size if nl == -1 else nl
+            if stop > pos:
+                yield pos, view[pos:stop]
+            pos = stop + 1
+
+    def iter_lines_reverse(self, end=None):
+        """Yield (offset, view) for each line from byte offset end backward."""
+        mm, view = self._mm, self._view
+        if mm is None:
+            return
+        stop = len(mm) if end is None else end
+        while stop > 0:
+            nl = mm.rfind(b'\n', 0, stop)
+            pos = nl + 1
+            if stop > pos:
+                yield pos, view[pos:stop]
+            stop = nl if nl >= 0 else 0
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # A line view escaped; the map is released when it is collected
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def classify_user_entry(entry):
+    """Classify user-type entries to determine processing method."""
+    message = entry.get("message", {})
+    content = message.get("content", [])
+
+    # Raw string = actual user prompt
+    if isinstance(content, str):
+        return "PROMPT"
+
+    if isinstance(content, list):
+        tool_results = [c for c in content if c.get("type") == "tool_result"]
+        if tool_results:
+            result_raw = tool_results[0].get("content", "")
+            # If content is a list (e.g., [{type:"text"}]), classify as regular TOOL_RESULT
+            if not isinstance(result_raw, str):
+                return "TOOL_RESULT"
+            result_text = result_raw.strip()
+
+            if result_text.startswith("User has answered your questions:"):
+                return "USER_ANSWER"
+            elif result_text.startswith("User has approved your plan"):
+                return "PLAN_APPROVAL"
+            elif result_text.startswith("Exit plan mode?"):
+                return "PLAN_APPROVAL"
+            elif result_text.startswith("The user doesn't want to proceed"):
+                return "TOOL_REJECTION"
+            else:
+                return "TOOL_RESULT"
+
+        # Text content
+        text_items = [c for c in content if c.get("type") == "text"]
+        if text_items:
+            text = text_items[0].get("text", "")
+            if "[Request interrupted" in text:
+                return "INTERRUPT"
+            return "PROMPT"
+
+    return "UNKNOWN"
+
+
+def tool_uses(entry):
+    """Return (name, input) for each tool use in a decoded transcript entry, in order.
+    Handles tool_use items nested in assistant message content as well as
+    top-level tool_use entries.
+    """
+    uses = []
+    entry_type = entry.get("type")
+    if entry_type == "assistant":
+        content = entry.get("message", {}).get("content", [])
+        for item in (content if isinstance(content, list) else []):
+            if isinstance(item, dict) and item.get("type") == "tool_use":
+                uses.append((item.get("name"), item.get("input")))
+    elif entry_type == "tool_use":
+        uses.append((entry.get("tool_name"), entry.get("tool_input")))
+    return uses
+
+
+def tool_use_ids(entry):
+    """Return (tool_use_id, name) for each tool_use item in a decoded assistant entry."""
+    content = entry.get("message", {}).get("content", []) if entry.get("type") == "assistant" else []
+    return [(item.get("id"), item.get("name")) for item in (content if isinstance(content, list) else [])
+            if isinstance(item, dict) and item.get("type") == "tool_use"]
+
+
+def entry_tool_results(entry):
+    """Return (tool_use_id, output_bytes) for each tool_result item in a decoded entry."""
+    results = []
+    content = entry.get("message", {}).get("content", [])
+    for item in (content if isinstance(content, list) else []):
+        if not isinstance(item, dict) or item.get("type") != "tool_result":
+            continue
+        output = item.get("content", "")
+        if isinstance(output, list):
+            output = "".join(c.get("text", "") for c in output if isinstance(c, dict))
+        size = len(output.encode('utf-8')) if isinstance(output, str) else 0
+        results.append((item.get("tool_use_id"), size))
+    return results
+
+
+def tool_file_path(tool_input):
+    """Return the file path a tool input refers to, or None."""
+    if not isinstance(tool_input, dict):
+        return None
+    fp = tool_input.get("file_path") or tool_input.get("notebook_path")
+    return fp if fp and isinstance(fp, str) else None
+
+
+def modified_paths(entry):
+    """Return file paths modified by tool uses in a decoded transcript entry, in order."""
+    paths = []
+    for name, tool_input in tool_uses(entry):
+        fp = tool_file_path(tool_input)
+        if name in MODIFYING_TOOLS and fp:
+            paths.append(fp)
+    return paths
+
+
+class TranscriptCache(object):
+    """Structural facts extracted from one transcript, shared between hooks.
+
+    Records the byte offsets of the most recent turn boundaries (PROMPT
+    entries) with a count of all of them, counts of follow-ups by
+    classification and of tool calls and output bytes by tool name, and the
+    session's modified files, most recent first. Only counters are kept, so
+    the file stays small however long the session runs. `offset` marks the
+    end of the last line recorded, so later scans only parse the delta.
+    The cache is keyed by transcript path, inode and size; a transcript that
+    was replaced or truncated invalidates it.
+    """
+
+    VERSION = 3
+    RECENT_TURNS = 32  # Prompt offsets kept; more than the Stop hook catches up
+    FOLLOW_UPS = ("USER_ANSWER", "PLAN_APPROVAL", "TOOL_REJECTION", "INTERRUPT")
+
+    def __init__(self, transcript_path, inode=None, data=None):
+        data = data or {}
+        self.transcript_path = transcript_path
+        self.inode = inode
+        self.size = data.get("size", 0)
+        self.offset = data.get("offset", 0)
+        self.turns = data.get("turns", [])
+        self.turn_count = data.get("turn_count", 0)
+        self.follow_ups = data.get("follow_ups", {})
+        self.tool_calls = data.get("tool_calls", {})
+        self.modified_files = data.get("modified_files", [])
+        self.output_bytes = data.get("output_bytes", {})
+        self.pending_tools = data.get("pending_tools", {})
+
+    @classmethod
+    def load(cls, cache_file, reader):
+        """Load the cache for reader's transcript, or start empty if missing or stale."""
+        data = None
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            pass
+        if (not isinstance(data, dict)
+                or data.get("version") != cls.VERSION
+                or data.get("transcript_path") != reader.path
+                or data.get("inode") != reader.inode
+                or data.get("offset", 0) > reader.size):
+            data = None
+        return cls(reader.path, reader.inode, data)
+
+    def save(self, cache_file):
+        """Write the cache atomically (temp file + os.replace)."""
+        tmp_path = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": self.VERSION,
+                "transcript_path": self.transcript_path,
+                "inode": self.inode,
+                "size": self.size,
+                "offset": self.offset,
+                "turns": self.turns,
+                "turn_count": self.turn_count,
+                "follow_ups": self.follow_ups,
+                "tool_calls": self.tool_calls,
+                "modified_files": self.modified_files,
+                "output_bytes": self.output_bytes,
+                "pending_tools": self.pending_tools,
+            }, f)
+        os.replace(tmp_path, cache_file)
+
+    @property
+    def last_turn_offset(self):
+        """Offset of the last PROMPT entry recorded, or 0 when none is known."""
+        return self.turns[-1] if self.turns else 0
+
+    def record_user(self, offset, classification, entry=None):
+        """Record a classified user entry; entry (LazyEntry) supplies tool result sizes."""
+        if classification == "PROMPT":
+            self.turns.append(offset)
+            del self.turns[:-self.RECENT_TURNS]
+            self.turn_count += 1
+        elif classification in self.FOLLOW_UPS:
+            self.follow_ups[classification] = self.follow_ups.get(classification, 0) + 1
+        if entry is not None and classification not in ("PROMPT", "INTERRUPT"):
+            for tool_use_id, size in entry.tool_results():
+                name = self.pending_tools.pop(tool_use_id, None) or "unknown"
+                self.output_bytes[name] = self.output_bytes.get(name, 0) + size
+
+    def record_entry(self, offset, entry):
+        for tool_use_id, name in tool_use_ids(entry):
+            if tool_use_id:
+                self.pending_tools[tool_use_id] = name
+        for name, tool_input in tool_uses(entry):
+            fp = tool_file_path(tool_input)
+            key = name or "unknown"
+            self.tool_calls[key] = self.tool_calls.get(key, 0) + 1
+            if name in MODIFYING_TOOLS and fp:
+                if fp in self.modified_files:
+                    self.modified_files.remove(fp)
+                self.modified_files.insert(0, fp)
+
+    def stats(self):
+        """Session counters: turns, tool calls and output bytes per tool, follow-ups by kind."""
+        return {
+            "turns": self.turn_count,
+            "tool_calls": dict(self.tool_calls),
+            "output_bytes": dict(self.output_bytes),
+            "follow_ups": dict(self.follow_ups),
+        }
+
+    def advance(self, offset, line, size):
+        """Mark the line at offset as recorded."""
+        self.offset = offset + len(line) + 1
+        self.size = size
+
+    def scan(self, reader):
+        """Record every complete line after the cached offset.
+        Non-user lines that contain no tool use are not recorded.
+        """
+        size = reader.size
+        for offset, line in reader.iter_lines(self.offset, complete_only=True):
+            try:
+                entry = LazyEntry(line)
+                if entry.type == "user":
+                    self.record_user(offset, classify_user_entry(entry.skeleton()), entry)
+                elif _TOOL_USE_RE.search(line):
+                    self.record_entry(offset, entry.materialize())
+            except ValueError:
+                pass
+            self.advance(offset, line, size)
+
+
+def entry_uuid_before(reader, end):
+    """uuid of the transcript entry whose line ends at byte offset end, or None."""
+    for _, line in reader.iter_lines_reverse(end):
+        try:
+            uuid = LazyEntry(line).get("uuid")
+        except ValueError:
+            return None
+        return uuid if isinstance(uuid, str) else None
+    return None
+
+
+class BlockDigest(object):
+    """Write target that measures a block instead of storing it: the byte size
+    and SHA-1 of the text as a text-mode log file would append it.
+    """
+
+    def __init__(self):
+        import hashlib
+        self.size = 0
+        self._sha1 = hashlib.sha1()
+
+    def write(self, text):
+        data = text.replace("\n", os.linesep).encode('utf-8')
+        self.size += len(data)
+        self._sha1.update(data)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def hexdigest(self):
+        return self._sha1.hexdigest()
+
+
+def _digest_at(path, start, size):
+    """SHA-1 of the size bytes of path at start, or None when the file is shorter."""
+    import hashlib
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while size > 0:
+            chunk = f.read(min(size, 1 << 20))
+            if not chunk:
+                return None
+            sha1.update(chunk)
+            size -= len(chunk)
+    return sha1.hexdigest()
+
+
+class TurnLedger(object):
+    """What the Stop hook has written to a session's log.
+
+    `offset` is the end of the last transcript line whose turn was logged and
+    `uuid` the uuid of that entry, which is checked against the transcript on
+    load. A write in progress is kept as `pending` with the log size before it
+    and the size and SHA-1 of the block it appends: it counts as done only if
+    the log holds exactly that block at that size, so a partial write or
+    another hook's append leaves the turn to be caught up. The ledger is keyed
+    by transcript path and inode like the TranscriptCache; offset None means
+    nothing is known.
+    """
+
+    VERSION = 2
+
+    def __init__(self, transcript_path, inode=None, data=None):
+        data = data or {}
+        self.transcript_path = transcript_path
+        self.inode = inode
+        self.offset = data.get("offset")
+        self.uuid = data.get("uuid")
+        self.pending = data.get("pending")
+
+    @classmethod
+    def load(cls, ledger_file, reader):
+        """Load the ledger for reader's transcript; a missing, stale or mismatched one starts empty."""
+        data = None
+        try:
+            with open(ledger_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            pass
+        if (not isinstance(data, dict)
+                or data.get("version") != cls.VERSION
+                or data.get("transcript_path") != reader.path
+                or data.get("inode") != reader.inode):
+            data = None
+        ledger = cls(reader.path, reader.inode, data)
+        ledger._settle()
+        if ledger.offset is not None and (ledger.offset > reader.size
+                                          or entry_uuid_before(reader, ledger.offset) != ledger.uuid):
+            ledger.offset = ledger.uuid = None  # The transcript was rewritten
+        return ledger
+
+    def _settle(self):
+        pending, self.pending = self.pending, None
+        if not isinstance(pending, dict):
+            return
+        try:
+            written = _digest_at(pending["log_file"], pending["log_size"],
+                                 pending["block_size"]) == pending["digest"]
+        except (OSError, KeyError, TypeError, ValueError):
+            written = False
+        if written:
+            self.offset, self.uuid = pending.get("offset"), pending.get("uuid")
+
+    def save(self, ledger_file):
+        """Write the ledger atomically (temp file + os.replace)."""
+        os.makedirs(os.path.dirname(ledger_file), exist_ok=True)
+        tmp_path = f"{ledger_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": self.VERSION,
+                "transcript_path": self.transcript_path,
+                "inode": self.inode,
+                "offset": self.offset,
+                "uuid": self.uuid,
+                "pending": self.pending,
+            }, f)
+        os.replace(tmp_path, ledger_file)
+
+    def logged(self, end):
+        """True when every line up to byte offset end is already in the log."""
+        return self.offset is not None and self.offset >= end
+
+    def begin(self, end, uuid, log_file, block):
+        """Mark a write of the lines up to end as in progress.
+        block is the BlockDigest of what the write appends to log_file.
+        """
+        try:
+            log_size = os.path.getsize(log_file)
+        except OSError:
+            log_size = 0
+        self.pending = {"offset": end, "uuid": uuid, "log_file": log_file, "log_size": log_size,
+                        "block_size": block.size, "digest": block.hexdigest()}
+
+    def commit(self):
+        """Mark the pending write as done."""
+        if self.pending:
+            self.offset, self.uuid = self.pending["offset"], self.pending["uuid"]
+            self.pending = None
@@ -6,10 +6,12 @@ Common logic used by both log-prompt.py and log-response.py.
 import json
 import sys
 import os
-import glob
-import tempfile
+import re
 from datetime import datetime
 
+# glob, tempfile, hashlib and the transcript module are imported inside the
+# functions that use them to keep hook startup cheap.
+
 DEBUG = False  # Debug mode
 
 
@@ -32,11 +34,84 @@ def get_log_dir(cwd):
     return log_dir
 
 
-def get_log_file_path(log_dir, session_id, log_format):
+LOG_LAYOUTS = ("flat", "date")
+SESSION_INDEX_DIR = ".sessions"
+LEDGER_DIR = ".ledger"
+_LOG_DATE_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})_')
+
+
+def log_shard_dir(log_dir, filename, layout="flat"):
+    """Directory a log file belongs in: log_dir (flat) or log_dir/YYYY/MM/DD by its date prefix (date)."""
+    match = _LOG_DATE_RE.match(filename)
+    if layout != "date" or not match:
+        return log_dir
+    return os.path.join(log_dir, *match.groups())
+
+
+def get_log_file_path(log_dir, session_id, log_format, layout="flat"):
     """Generate log file path with appropriate extension."""
     date_prefix = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
     ext = ".md" if log_format == "markdown" else ".txt"
-    return os.path.join(log_dir, f"{date_prefix}_{session_id}_conversation-log{ext}")
+    filename = f"{date_prefix}_{session_id}_conversation-log{ext}"
+    return os.path.join(log_shard_dir(log_dir, filename, layout), filename)
+
+
+MIN_LOG_BYTES = 4096  # Keeps a part that holds little more than its header from rolling over again
+_LOG_PART_RE = re.compile(r'^(.*_conversation-log)(?:\.part(\d+))?(\.(?:txt|md))$')
+
+
+def log_part_path(log_file, part):
+    """Path of a session log's part (1 is the first file, later parts are .partN)."""
+    match = _LOG_PART_RE.match(log_file)
+    if not match:
+        return log_file
+    stem, _, ext = match.groups()
+    return f"{stem}{ext}" if part <= 1 else f"{stem}.part{part}{ext}"
+
+
+def log_part_number(log_file):
+    """Part number of a session log path (1 for the first file)."""
+    match = _LOG_PART_RE.match(log_file)
+    return int(match.group(2)) if match and match.group(2) else 1
+
+
+def current_log_part(paths):
+    """Latest part of the earliest session log among paths (one session's logs and parts)."""
+    # 시간순 정렬 (YYYY-MM-DD_HH-MM-SS 접두사): 가장 먼저 생성된 로그의 마지막 part
+    return min(paths, key=lambda path: (os.path.basename(log_part_path(path, 1)), -log_part_number(path)))
+
+
+def log_parts(log_file):
+    """Existing parts of the session log that log_file belongs to, first part first."""
+    parts = []
+    part = 1
+    while True:
+        path = log_part_path(log_file, part)
+        if not os.path.exists(path) or (parts and path == parts[-1]):
+            return parts
+        parts.append(path)
+        part += 1
+
+
+def _session_index_path(log_dir, session_id):
+    return os.path.join(log_dir, SESSION_INDEX_DIR, session_id)
+
+
+def record_log_path(log_dir, session_id, log_file):
+    """Point the session index at a session's log, so lookup by id needs no directory scan."""
+    index_file = _session_index_path(log_dir, session_id)
+    os.makedirs(os.path.dirname(index_file), exist_ok=True)
+    tmp_file = f"{index_file}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(os.path.relpath(log_file, log_dir))
+    os.replace(tmp_file, index_file)
+
+
+def forget_log_path(log_dir, session_id):
+    try:
+        os.remove(_session_index_path(log_dir, session_id))
+    except OSError:
+        pass
 
 
 def _try_load_json(path):
@@ -111,6 +186,94 @@ def get_log_format(cwd):
     return load_config(cwd).get("log_format", "text")
 
 
+def get_config_option(cwd, key, default=None, choices=None):
+    """Get a top-level option from the project or user config file.
+    The first config file that sets key wins; ENV does not affect it.
+    Values outside choices fall back to default with a warning.
+    """
+    for path in [
+        os.path.join(cwd, ".claude", "conversation-logger-config.json"),
+        os.path.join(os.path.expanduser("~"), ".claude", "conversation-logger-config.json"),
+    ]:
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            continue
+        if not isinstance(config, dict) or key not in config:
+            continue
+        value = config[key]
+        if choices is not None and value not in choices:
+            print(f"Warning: invalid {key} '{value}' in {path}, using '{default}'", file=sys.stderr)
+            return default
+        return value
+    return default
+
+
+def get_log_layout(cwd):
+    """Log directory layout: "flat" (default) or "date" (logs/YYYY/MM/DD/)."""
+    return get_config_option(cwd, "log_layout", "flat", LOG_LAYOUTS)
+
+
+DETAIL_LEVELS = ("full", "compact", "summary")
+
+
+def get_detail(cwd):
+    """How much of each tool call is logged: "full" (default), "compact" or "summary"."""
+    return get_config_option(cwd, "detail", "full", DETAIL_LEVELS)
+
+
+SUBAGENT_TRANSCRIPT_MODES = ("off", "inline", "linked")
+
+
+def get_subagent_transcripts(cwd):
+    """Where subagent transcripts are rendered: "off" (default), "inline" or "linked"."""
+    return get_config_option(cwd, "subagent_transcripts", "off", SUBAGENT_TRANSCRIPT_MODES)
+
+
+DEFAULT_TURN_MEMORY_BYTES = 16 * 1024 * 1024
+
+
+def _get_size_option(cwd, key, default):
+    """Non-negative integer byte count from the config; invalid values fall back to default."""
+    value = get_config_option(cwd, key, default)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        print(f"Warning: invalid {key} '{value}', using {default}", file=sys.stderr)
+        return default
+    return value
+
+
+def get_max_log_bytes(cwd):
+    """Size at which a session log continues in a new part; 0 (default) means no limit."""
+    value = _get_size_option(cwd, "max_log_bytes", 0)
+    return max(value, MIN_LOG_BYTES) if value else 0
+
+
+def get_turn_memory_bytes(cwd):
+    """Ceiling on decoded transcript entries the Stop hook holds for one turn; 0 means no limit."""
+    return _get_size_option(cwd, "turn_memory_bytes", DEFAULT_TURN_MEMORY_BYTES)
+
+
+def load_hook_module(name):
+    """Import a hook script as a module, e.g. "log_response" for log-response.py.
+    Inside the bundle the scripts are already importable under their module names.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), name.replace('_', '-') + ".py")
+    if not os.path.isfile(path):
+        import importlib
+        return importlib.import_module(name)
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
 def get_temp_session_dir():
     """Get fixed directory for temp session files (cwd-independent)."""
     temp_dir = os.path.join(os.path.expanduser("~"), ".claude", "tmp")
@@ -162,16 +325,19 @@ def touch_temp_session(session_id, temp_dir=None):
 
 
 def cleanup_stale_temp_files(temp_dir=None, max_age_seconds=3600):
-    """Remove temp session files older than max_age_seconds (default 1 hour)."""
+    """Remove temp session files and parse caches older than max_age_seconds (default 1 hour)."""
+    import glob
     if temp_dir is None:
         temp_dir = get_temp_session_dir()
-    temp_pattern = os.path.join(temp_dir, ".temp_session_*.json")
-    for temp_f in glob.glob(temp_pattern):
-        try:
-            if os.path.getmtime(temp_f) < (datetime.now().timestamp() - max_age_seconds):
-                os.remove(temp_f)
-        except:
-            pass
+    for prefix in (".temp_session_", ".transcript_cache_", ".memory_index_", ".subagent_queue_",
+                   ".event_spool_"):
+        temp_pattern = os.path.join(temp_dir, f"{prefix}*")
+        for temp_f in glob.glob(temp_pattern):
+            try:
+                if os.path.getmtime(temp_f) < (datetime.now().timestamp() - max_age_seconds):
+                    os.remove(temp_f)
+            except:
+                pass
 
 
 def debug_log(log_dir, message):
@@ -201,19 +367,96 @@ def calculate_fence(content):
 
 
 def _find_existing_log(log_dir, session_id):
-    """Find existing log file for session_id in log_dir. Returns path or None."""
+    """Find existing log file for session_id in log_dir. Returns path or None.
+    The session index (sharded layouts) answers in one read; flat logs are globbed.
+    """
+    import glob
     if not session_id or not os.path.isdir(log_dir):
         return None
+    try:
+        with open(_session_index_path(log_dir, session_id), 'r', encoding='utf-8') as f:
+            indexed = os.path.join(log_dir, f.read().strip())
+        if os.path.isfile(indexed):
+            return indexed
+    except (IOError, OSError):
+        pass
     pattern = os.path.join(log_dir, f"*_{session_id}_conversation-log.*")
     matches = glob.glob(pattern)
     if not matches:
         return None
-    matches.sort()  # 시간순 정렬 (YYYY-MM-DD_HH-MM-SS 접두사)
-    return matches[0]  # 가장 먼저 생성된 파일 반환
+    return current_log_part(matches)
+
+
+def continuation_header(previous, part, log_format, now=None):
+    """First lines of a continuation part, linking back to the previous part."""
+    name = os.path.basename(previous)
+    if log_format == "markdown":
+        date_str = (now or datetime.now()).strftime('%Y-%m-%d')
+        return f"# Conversation Log \u2014 {date_str} (part {part})\n\n> Continued from [{name}]({name})\n"
+    return f"~ CONTINUED FROM {name} (part {part})\n"
+
+
+def continuation_trailer(following, log_format):
+    """Last line of a full part, pointing to the next part."""
+    name = os.path.basename(following)
+    if log_format == "markdown":
+        return f"\n> Continued in [{name}]({name})\n"
+    return f"~ CONTINUED IN {name}\n"
+
+
+def roll_log_part(cwd, log_dir, session_id, log_file, log_format, max_bytes):
+    """Current part of a session log: log_file, or a new part once log_file holds max_bytes.
+    The new part is created exclusively, so concurrent hooks agree on one part and
+    only one writes its header; the temp session and the session index then point
+    at it, and later calls stat only the current part.
+    """
+    current = log_file
+    while True:
+        try:
+            if os.path.getsize(current) < max_bytes:
+                break
+        except OSError:
+            break
+        following = log_part_path(current, log_part_number(current) + 1)
+        if following == current:
+            break
+        try:
+            fd = os.open(following, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            current = following  # Another hook rolled over first
+            continue
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(continuation_header(current, log_part_number(following), log_format))
+        with open(current, 'a', encoding='utf-8') as f:
+            f.write(continuation_trailer(following, log_format))
+        from durability import get_durability, sync_log
+        sync_log(following, get_durability(cwd), created=True)
+        current = following
+        break
+    if current != log_file:
+        try:
+            data = read_temp_session(session_id) or {"session_id": session_id, "cwd": cwd,
+                                                     "log_format": log_format}
+            data["log_file_path"] = current
+            write_temp_session(session_id, data)
+            record_log_path(log_dir, session_id, current)
+        except (IOError, OSError):
+            pass  # 비핵심: 다음 호출에서 다시 part를 따라감
+    return current
 
 
 def resolve_log_path(cwd, session_id):
-    """Resolve log file path: try temp_session first, search existing files, fall back to new file."""
+    """Resolve log file path: try temp_session first, search existing files, fall back to new file.
+    With max_log_bytes set, a full log continues in its next part.
+    """
+    log_file, log_format, log_dir = _locate_log(cwd, session_id)
+    max_bytes = get_max_log_bytes(cwd)
+    if max_bytes:
+        log_file = roll_log_part(cwd, log_dir, session_id, log_file, log_format, max_bytes)
+    return log_file, log_format, log_dir
+
+
+def _locate_log(cwd, session_id):
     log_dir = get_log_dir(cwd)
     temp_data = read_temp_session(session_id)
     if temp_data and temp_data.get("log_file_path"):
@@ -234,18 +477,24 @@ def resolve_log_path(cwd, session_id):
         return existing, fmt, log_dir
     # Fallback 2: 새 파일 생성 (세션 최초 호출)
     log_format = get_log_format(cwd)
-    log_file = get_log_file_path(log_dir, session_id, log_format)
+    layout = get_log_layout(cwd)
+    log_file = get_log_file_path(log_dir, session_id, log_format, layout)
+    if layout != "flat":
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        try:
+            record_log_path(log_dir, session_id, log_file)
+        except (IOError, OSError):
+            pass  # 비핵심: temp_session이 경로를 유지
     return log_file, log_format, log_dir
 
 
-def ensure_markdown_header(f, log_file):
+def ensure_markdown_header(f, log_file, now=None):
     """Write markdown document header if file is new/empty. Receives open file handle."""
+    date_str = (now or datetime.now()).strftime('%Y-%m-%d')
     try:
         if os.path.getsize(log_file) == 0:
-            date_str = datetime.now().strftime('%Y-%m-%d')
             f.write(f"# Conversation Log \u2014 {date_str}\n")
     except OSError:
-        date_str = datetime.now().strftime('%Y-%m-%d')
         f.write(f"# Conversation Log \u2014 {date_str}\n")
 
 
@@ -253,10 +502,28 @@ def ensure_markdown_header(f, log_file):
 # Context Keeper utilities
 # ---------------------------------------------------------------------------
 
+RESTORE_BYTES_PER_TOKEN = 4
+DEFAULT_RESTORE_MAX_TOKENS = 0  # Unlimited unless configured
+
+
+def _restore_budget_bytes(ck):
+    """Active Work restore budget in bytes from a context_keeper config section.
+    restore_max_bytes wins over restore_max_tokens; 0 means unlimited.
+    """
+    for key, scale in (("restore_max_bytes", 1), ("restore_max_tokens", RESTORE_BYTES_PER_TOKEN)):
+        if key not in ck:
+            continue
+        value = ck[key]
+        if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+            return value * scale
+        print(f"Warning: invalid context_keeper {key} '{value}', using default", file=sys.stderr)
+    return DEFAULT_RESTORE_MAX_TOKENS * RESTORE_BYTES_PER_TOKEN
+
+
 def get_context_keeper_config(cwd):
     """Get context-keeper config from conversation-logger config files.
-    Returns: {"enabled": bool, "scope": str}
-    Default: {"enabled": False, "scope": "project"}
+    Returns: {"enabled": bool, "scope": str, "restore_max_bytes": int}
+    Default: {"enabled": False, "scope": "project", "restore_max_bytes": 0}
     ENV (CONVERSATION_LOG_FORMAT) does not affect context_keeper settings.
     """
     for path in [
@@ -275,10 +542,12 @@ def get_context_keeper_config(cwd):
             if scope not in ("user", "project", "local"):
                 print(f"Warning: invalid context_keeper scope '{scope}', using 'project'", file=sys.stderr)
                 scope = "project"
-            return {"enabled": ck.get("enabled", False), "scope": scope}
+            return {"enabled": ck.get("enabled", False), "scope": scope,
+                    "restore_max_bytes": _restore_budget_bytes(ck)}
         except (json.JSONDecodeError, IOError):
             continue
-    return {"enabled": False, "scope": "project"}
+    return {"enabled": False, "scope": "project",
+            "restore_max_bytes": DEFAULT_RESTORE_MAX_TOKENS * RESTORE_BYTES_PER_TOKEN}
 
 
 def get_memory_path(cwd, scope="user"):
@@ -301,6 +570,91 @@ def get_memory_path(cwd, scope="user"):
         )
 
 
+_MEMORY_HEADER_RE = re.compile(rb'^## ', re.M)
+_memory_index_memo = {}
+
+
+def _memory_index_path(memory_file, temp_dir=None):
+    import hashlib
+    if temp_dir is None:
+        temp_dir = get_temp_session_dir()
+    digest = hashlib.sha1(os.path.abspath(memory_file).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(temp_dir, f".memory_index_{digest}.json")
+
+
+def _scan_memory_sections(memory_file):
+    """Scan MEMORY.md for ## headers. Returns (line_count, sections)."""
+    with open(memory_file, 'rb') as f:
+        data = f.read()
+    sections = []
+    for m in _MEMORY_HEADER_RE.finditer(data):
+        nl = data.find(b'\n', m.start())
+        body_start = len(data) if nl == -1 else nl + 1
+        header = data[m.start():body_start].decode('utf-8', errors='replace').rstrip('\r\n')
+        if sections:
+            sections[-1][3] = m.start()
+        sections.append([header, m.start(), body_start, len(data)])
+    line_count = data.count(b'\n') + (1 if data and not data.endswith(b'\n') else 0)
+    return line_count, sections
+
+
+def _save_memory_index(memory_file, index):
+    _memory_index_memo[memory_file] = index
+    try:
+        with open(_memory_index_path(memory_file), 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+    except (IOError, OSError):
+        pass  # Non-critical: rebuilt on next read
+
+
+def get_memory_section_index(memory_file):
+    """Return the ## section index of MEMORY.md, cached by mtime and size.
+    Result: {"path", "mtime_ns", "size", "lines", "sections": [[header, start, body_start, end], ...]}
+    with byte offsets. Cached in-process and in the temp session directory, so an
+    unchanged file is never re-scanned. Raises OSError if the file cannot be read.
+    """
+    st = os.stat(memory_file)
+    index = _memory_index_memo.get(memory_file)
+    if not index:
+        try:
+            with open(_memory_index_path(memory_file), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (IOError, OSError, ValueError):
+            index = None
+    if (isinstance(index, dict) and index.get("path") == memory_file
+            and index.get("mtime_ns") == st.st_mtime_ns and index.get("size") == st.st_size):
+        _memory_index_memo[memory_file] = index
+        return index
+
+    line_count, sections = _scan_memory_sections(memory_file)
+    index = {"path": memory_file, "mtime_ns": st.st_mtime_ns, "size": st.st_size,
+             "lines": line_count, "sections": sections}
+    _save_memory_index(memory_file, index)
+    return index
+
+
+def _find_memory_section(index, prefix):
+    for section in index["sections"]:
+        if section[0].startswith(prefix):
+            return section
+    return None
+
+
+def read_memory_section(memory_file, prefix, index=None):
+    """Read the body of the first ## section whose header starts with prefix.
+    Only that section's bytes are read. Returns str, or None if not found.
+    """
+    if index is None:
+        index = get_memory_section_index(memory_file)
+    section = _find_memory_section(index, prefix)
+    if section is None:
+        return None
+    _, _, body_start, end = section
+    with open(memory_file, 'rb') as f:
+        f.seek(body_start)
+        return f.read(end - body_start).decode('utf-8', errors='replace')
+
+
 def read_active_work(memory_file):
     """Extract ## Active Work section content from MEMORY.md.
     Returns section content as str, or empty string if not found or file missing.
@@ -308,19 +662,8 @@ def read_active_work(memory_file):
     if not os.path.isfile(memory_file):
         return ""
     try:
-        with open(memory_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        in_section = False
-        result = []
-        for line in lines:
-            if not in_section:
-                if line.startswith("## Active Work"):
-                    in_section = True
-            else:
-                if line.startswith("## "):
-                    break
-                result.append(line)
-        return "".join(result).strip()
+        body = read_memory_section(memory_file, "## Active Work")
+        return body.replace('\r\n', '\n').strip() if body else ""
     except (IOError, OSError) as e:
         print(f"Warning: failed to read {memory_file}: {e}", file=sys.stderr)
         return ""
@@ -329,12 +672,22 @@ def read_active_work(memory_file):
 def write_compaction_marker(memory_file, trigger, modified_files=None):
     """Insert compaction marker into ## Active Work section of MEMORY.md.
     Removes previous compaction markers to prevent accumulation.
-    Creates the section if it doesn't exist. Uses atomic write (temp + os.replace).
+    Creates the section if it doesn't exist. Only the Active Work section is
+    decoded; the bytes before and after it are copied through unchanged.
+    Uses atomic write (temp + os.replace).
     """
+    import tempfile
     try:
-        with open(memory_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        lines = content.splitlines(keepends=True)
+        index = get_memory_section_index(memory_file)
+        section = _find_memory_section(index, "## Active Work")
+        with open(memory_file, 'rb') as f:
+            if section is not None:
+                f.seek(section[1])
+                header = f.read(section[2] - section[1]).decode('utf-8', errors='replace')
+                body = f.read(section[3] - section[2]).decode('utf-8', errors='replace')
+            else:
+                f.seek(max(index["size"] - 1, 0))
+                last_byte = f.read(1)
     except (IOError, OSError) as e:
         print(f"Warning: failed to read {memory_file}: {e}", file=sys.stderr)
         return
@@ -342,12 +695,12 @@ def write_compaction_marker(memory_file, trigger, modified_files=None):
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
     marker = f"<!-- compaction: {trigger} at {timestamp} -->"
 
-    def _marker_lines():
-        result = [marker + "\n"]
+    def _marker_lines(eol):
+        result = [marker + eol]
         if modified_files:
-            result.append("- [Auto-saved context] Files modified in previous context:\n")
+            result.append("- [Auto-saved context] Files modified in previous context:" + eol)
             for fp in modified_files:
-                result.append(f"  - {fp}\n")
+                result.append(f"  - {fp}{eol}")
         return result
 
     def _clean_markers(section_lines):
@@ -365,88 +718,243 @@ def write_compaction_marker(memory_file, trigger, modified_files=None):
             cleaned.append(line)
         return cleaned
 
-    new_lines = []
-    if any(line.startswith("## Active Work") for line in lines):
-        in_active = False
-        active_section = []
-        before_active = []
-        after_active = []
-        header_line = None
-
-        for line in lines:
-            if not in_active and line.startswith("## Active Work"):
-                in_active = True
-                header_line = line
-            elif in_active and line.startswith("## ") and not line.startswith("## Active Work"):
-                in_active = False
-                after_active.append(line)
-            elif in_active:
-                active_section.append(line)
-            elif header_line is None:
-                before_active.append(line)
-            else:
-                after_active.append(line)
-
-        cleaned_active = _clean_markers(active_section)
-        new_lines = before_active + [header_line] + _marker_lines() + cleaned_active + after_active
+    if section is not None:
+        old_newlines = (header + body).count('\n')
+        eol = '\r\n' if header.endswith('\r\n') else '\n'
+        if not header.endswith('\n'):
+            header += eol
+        new_section = header + "".join(_marker_lines(eol) + _clean_markers(body.splitlines(keepends=True)))
+        start, end = section[1], section[3]
     else:
-        new_lines = list(lines)
-        if new_lines and not new_lines[-1].endswith('\n'):
-            new_lines.append('\n')
-        new_lines.append('\n')
-        new_lines.append("## Active Work\n")
-        new_lines.extend(_marker_lines())
+        old_newlines = 0
+        header = "## Active Work\n"
+        new_section = "" if last_byte in (b'', b'\n') else "\n"
+        new_section += "\n" + header + "".join(_marker_lines("\n"))
+        start = end = index["size"]
+    new_bytes = new_section.encode('utf-8')
 
     try:
         dir_name = os.path.dirname(os.path.abspath(memory_file))
-        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=dir_name,
-                                         delete=False, suffix='.tmp') as tmp:
-            tmp.writelines(new_lines)
+        with open(memory_file, 'rb') as src, \
+                tempfile.NamedTemporaryFile('wb', dir=dir_name, delete=False, suffix='.tmp') as tmp:
             tmp_path = tmp.name
+            tmp.write(src.read(start))
+            tmp.write(new_bytes)
+            src.seek(end)
+            while True:
+                chunk = src.read(1 << 16)
+                if not chunk:
+                    break
+                tmp.write(chunk)
         os.replace(tmp_path, memory_file)
     except (IOError, OSError) as e:
         print(f"Warning: failed to write compaction marker to {memory_file}: {e}", file=sys.stderr)
+        return
+
+    # Shift the cached index instead of re-scanning the file
+    try:
+        st = os.stat(memory_file)
+        header_start = start + len(new_section[:new_section.index(header)].encode('utf-8'))
+        active = ["## Active Work" if section is None else section[0], header_start,
+                  header_start + len(header.encode('utf-8')), start + len(new_bytes)]
+        delta = len(new_bytes) - (end - start)
+        sections = []
+        for entry in index["sections"]:
+            if entry[1] < start:
+                sections.append(list(entry))
+            elif entry[1] > start:
+                sections.append([entry[0], entry[1] + delta, entry[2] + delta, entry[3] + delta])
+        if section is None and sections:
+            sections[-1][3] = header_start
+        sections.append(active)
+        sections.sort(key=lambda entry: entry[1])
+        _save_memory_index(memory_file, {
+            "path": memory_file, "mtime_ns": st.st_mtime_ns, "size": st.st_size,
+            "lines": index["lines"] - old_newlines + new_section.count('\n'),
+            "sections": sections})
+    except (IOError, OSError):
+        pass
 
 
 def extract_modified_files(transcript_path, max_lines=100, max_files=20):
     """Extract file paths from Edit/Write tool uses in transcript JSONL.
-    Reads last max_lines lines, deduplicates, returns list of paths.
+    Reads the last max_lines lines backward, so only the tail of the file is touched.
+    Returns deduplicated paths, most recently modified first.
     """
+    from transcript import LazyEntry, TranscriptReader, modified_paths
     if not transcript_path or not os.path.isfile(transcript_path):
         return []
     try:
-        with open(transcript_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        recent = lines[-max_lines:] if len(lines) > max_lines else lines
-        seen = set()
         files = []
-        for line in recent:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                entry = json.loads(line)
-            except (json.JSONDecodeError, ValueError):
-                continue
-            if entry.get("type") != "tool_use":
-                continue
-            if entry.get("tool_name") not in ("Edit", "Write"):
-                continue
-            fp = entry.get("tool_input", {}).get("file_path", "")
-            if fp and fp not in seen:
-                seen.add(fp)
-                files.append(fp)
-                if len(files) >= max_files:
+        seen = set()
+        with TranscriptReader(transcript_path) as reader:
+            for count, (_, line) in enumerate(reader.iter_lines_reverse()):
+                if count >= max_lines or len(files) >= max_files:
                     break
-        return files
+                try:
+                    paths = modified_paths(LazyEntry(line).materialize())
+                except ValueError:
+                    continue
+                for fp in reversed(paths):
+                    if fp not in seen:
+                        seen.add(fp)
+                        files.append(fp)
+        return files[:max_files]
     except (IOError, OSError) as e:
         print(f"Warning: failed to read transcript {transcript_path}: {e}", file=sys.stderr)
         return []
 
 
-def build_restore_context(memory_file, source):
+def get_transcript_cache_path(session_id, temp_dir=None):
+    """Get path of the per-session transcript parse cache."""
+    if temp_dir is None:
+        temp_dir = get_temp_session_dir()
+    return os.path.join(temp_dir, f".transcript_cache_{session_id}.json")
+
+
+def get_ledger_path(log_dir, session_id):
+    """Get path of the per-session ledger of logged turns (kept with the logs, across resumes)."""
+    return os.path.join(log_dir, LEDGER_DIR, f"{session_id}.json")
+
+
+def update_transcript_cache(session_id, transcript_path, temp_dir=None):
+    """Bring the per-session transcript parse cache up to date and return it.
+    Only the bytes appended since the last cached offset are parsed.
+    """
+    from transcript import TranscriptReader, TranscriptCache
+    cache_file = get_transcript_cache_path(session_id, temp_dir)
+    with TranscriptReader(transcript_path) as reader:
+        cache = TranscriptCache.load(cache_file, reader)
+        offset = cache.offset
+        cache.scan(reader)
+    if cache.offset != offset:
+        try:
+            cache.save(cache_file)
+        except (IOError, OSError):
+            pass  # Non-critical: the next update reparses the delta
+    return cache
+
+
+def get_session_modified_files(session_id, transcript_path):
+    """Return every file modified in the session, most recent first.
+    Uses the shared transcript parse cache; falls back to a tail read without a session id.
+    """
+    if not transcript_path or not os.path.isfile(transcript_path):
+        return []
+    if not session_id:
+        return extract_modified_files(transcript_path)
+    try:
+        return update_transcript_cache(session_id, transcript_path).modified_files
+    except (IOError, OSError) as e:
+        print(f"Warning: failed to read transcript {transcript_path}: {e}", file=sys.stderr)
+        return []
+
+
+RESTORE_MARKER_FILES_LIMIT = 10
+_ACTIVE_WORK_ITEM_RE = re.compile(r'(?:[-*+]|\d+[.)])\s|#{3,}\s|<!-- compaction:')
+
+
+def _split_active_work_items(active_work):
+    """Split Active Work text into top-level items (lists of lines).
+    A compaction marker and its auto-saved file list form one item; indented
+    and prose lines belong to the item above them.
+    """
+    items = []
+    in_marker = False
+    for line in active_work.split('\n'):
+        if in_marker and (line.startswith("- [Auto-saved") or line.startswith("  - ")):
+            items[-1].append(line)
+            continue
+        in_marker = line.startswith("<!-- compaction:")
+        if not items or _ACTIVE_WORK_ITEM_RE.match(line):
+            items.append([line])
+        else:
+            items[-1].append(line)
+    return items
+
+
+def _cap_marker_files(item, memory_file):
+    """Cap the file list of a compaction marker item."""
+    files = [line for line in item if line.startswith("  - ")]
+    if len(files) <= RESTORE_MARKER_FILES_LIMIT:
+        return item
+    head = [line for line in item if not line.startswith("  - ")]
+    return head + files[:RESTORE_MARKER_FILES_LIMIT] + [
+        f"  - ... {len(files) - RESTORE_MARKER_FILES_LIMIT} more (see {memory_file})"]
+
+
+def _truncate_item(lines, max_bytes):
+    """Keep the leading lines of an item that fit in max_bytes. Returns str or ""."""
+    kept = []
+    used = len(" ...")
+    if max_bytes <= used:
+        return ""
+    for line in lines:
+        size = len(line.encode('utf-8')) + 1
+        if used + size > max_bytes:
+            if not kept:
+                cut = line.encode('utf-8')[:max_bytes - used].decode('utf-8', errors='ignore')
+                if cut.strip():
+                    kept.append(cut)
+            break
+        kept.append(line)
+        used += size
+    return "\n".join(kept).rstrip() + " ..." if kept else ""
+
+
+def render_active_work(active_work, memory_file, max_bytes):
+    """Fit Active Work text into max_bytes for session restore; 0 returns it unchanged.
+    Deterministic priority: compaction markers (file lists capped), then tasks
+    from the top of the section down (newest first). The first task that does
+    not fit is truncated, later ones are dropped, and a pointer to the file is
+    appended.
+    """
+    if not max_bytes:
+        return active_work
+    items = _split_active_work_items(active_work)
+    markers = [_cap_marker_files(item, memory_file) for item in items
+               if item[0].startswith("<!-- compaction:")]
+    tasks = [item for item in items if not item[0].startswith("<!-- compaction:")]
+    ordered = [text for text in ("\n".join(item).strip() for item in markers + tasks) if text]
+
+    kept = []
+    used = 0
+    for i, text in enumerate(ordered):
+        size = len(text.encode('utf-8')) + 1
+        if used + size <= max_bytes:
+            kept.append(text)
+            used += size
+            continue
+        truncated = _truncate_item(text.split('\n'), max_bytes - used)
+        if truncated:
+            kept.append(truncated)
+        omitted = len(ordered) - i - (1 if truncated else 0)
+        note = f"{omitted} older item(s) omitted" if omitted else "truncated"
+        kept.append(f"[... {note} to fit the restore budget; see {memory_file} for the full Active Work]")
+        break
+    return "\n".join(kept)
+
+
+def _restore_excerpt(memory_file, max_bytes):
+    """Rendered Active Work for restore, cached in the section index.
+    The index is keyed on MEMORY.md mtime and size, so any edit invalidates it.
+    """
+    index = get_memory_section_index(memory_file)
+    cached = index.get("restore")
+    if isinstance(cached, dict) and cached.get("max_bytes") == max_bytes:
+        return cached.get("text", "")
+    body = read_memory_section(memory_file, "## Active Work", index)
+    active_work = body.replace('\r\n', '\n').strip() if body else ""
+    text = render_active_work(active_work, memory_file, max_bytes) if active_work else ""
+    index["restore"] = {"max_bytes": max_bytes, "text": text}
+    _save_memory_index(memory_file, index)
+    return text
+
+
+def build_restore_context(memory_file, source, max_bytes=0):
     """Build additionalContext string for SessionStart hook.
     Always returns a string with the Active Work maintenance directive.
+    The Active Work excerpt is limited to max_bytes (0 = unlimited).
     """
     directive = (
         "IMPORTANT: Maintain the ## Active Work section of %s as you work. "
@@ -462,7 +970,11 @@ def build_restore_context(memory_file, source):
     if not os.path.isfile(memory_file):
         return f"[Context Keeper] Session source: {source}.\n{directive}"
 
-    active_work = read_active_work(memory_file)
+    try:
+        active_work = _restore_excerpt(memory_file, max_bytes)
+    except (IOError, OSError) as e:
+        print(f"Warning: failed to read {memory_file}: {e}", file=sys.stderr)
+        active_work = ""
     if active_work:
         return (
             f"[Context Keeper] Session source: {source}. "
@@ -471,8 +983,7 @@ def build_restore_context(memory_file, source):
             f"{directive}"
         )
     try:
-        with open(memory_file, 'r', encoding='utf-8') as f:
-            line_count = sum(1 for _ in f)
+        line_count = get_memory_section_index(memory_file)["lines"]
         if line_count > 5:
             return (
                 f"[Context Keeper] Session source: {source}. "
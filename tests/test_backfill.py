@@ -0,0 +1,132 @@
+"""Tests for backfill.py — turn splitting, rendering and checksum-based skipping."""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import conftest  # noqa: F401  (adds scripts/ to sys.path)
+
+import backfill
+import transcript
+
+
+def _entry(entry, ts="2026-01-02T03:04:05.000Z"):
+    return dict(entry, timestamp=ts)
+
+
+def _user(content, **extra):
+    return _entry(dict({"type": "user", "message": {"role": "user", "content": content}}, **extra))
+
+
+def _assistant(text):
+    return _entry({"type": "assistant", "message": {"content": [{"type": "text", "text": text}]}})
+
+
+class _BackfillCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.transcripts = os.path.join(self.tmp, "transcripts")
+        self.log_dir = os.path.join(self.tmp, "logs")
+        self.temp_dir = os.path.join(self.tmp, "tmp")
+        for path in (self.transcripts, self.log_dir, self.temp_dir):
+            os.makedirs(path)
+
+    def write_transcript(self, session_id, entries, mode='w'):
+        path = os.path.join(self.transcripts, f"{session_id}.jsonl")
+        with open(path, mode, encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        return path
+
+    def run_backfill(self, log_format="text", **kwargs):
+        return backfill.run_backfill(backfill.find_transcripts(self.transcripts), self.log_dir, log_format,
+                                     jobs=2, temp_dir=self.temp_dir, **kwargs)
+
+    def logs(self):
+        return sorted(n for n in os.listdir(self.log_dir) if not n.startswith("."))
+
+    def read_log(self):
+        with open(os.path.join(self.log_dir, self.logs()[0]), encoding='utf-8') as f:
+            return f.read()
+
+
+# ---------------------------------------------------------------------------
+# Turn splitting and rendering
+# ---------------------------------------------------------------------------
+class TestRender(_BackfillCase):
+
+    def test_turns_split_at_prompts(self):
+        path = self.write_transcript("s1", [
+            _user("first"), _assistant("one"),
+            _user("caveat", isMeta=True),
+            _user([{"type": "tool_result", "content": "ok"}]),
+            _assistant("two"),
+            _user("second"), _assistant("three"),
+        ])
+        with transcript.TranscriptReader(path) as reader:
+            turns = [(p["message"]["content"], len(lines)) for p, lines, _ in backfill.iter_turns(reader)]
+        self.assertEqual(turns, [("first", 4), ("second", 2)])
+
+    def test_renders_every_turn(self):
+        self.write_transcript("s1", [_user("first"), _assistant("one"), _user("second"), _assistant("two")])
+        counts = self.run_backfill("markdown")
+        self.assertEqual(counts, {"written": 1, "skipped": 0, "failed": 0})
+        self.assertEqual(self.logs(), [f"{backfill.parse_timestamp('2026-01-02T03:04:05Z'):%Y-%m-%d_%H-%M-%S}"
+                                       "_s1_conversation-log.md"])
+        log = self.read_log()
+        self.assertEqual(log.count("# Conversation Log"), 1)
+        self.assertLess(log.index("first"), log.index("one"))
+        self.assertLess(log.index("one"), log.index("second"))
+        self.assertLess(log.index("second"), log.index("two"))
+
+
+# ---------------------------------------------------------------------------
+# Manifest: skip unchanged sessions, respect hook-written logs
+# ---------------------------------------------------------------------------
+class TestManifest(_BackfillCase):
+
+    def test_unchanged_sessions_skipped(self):
+        self.write_transcript("s1", [_user("first"), _assistant("one")])
+        self.write_transcript("s2", [_user("other"), _assistant("two")])
+        self.assertEqual(self.run_backfill()["written"], 2)
+        self.assertEqual(self.run_backfill(), {"written": 0, "skipped": 2, "failed": 0})
+
+        self.write_transcript("s1", [_user("again"), _assistant("three")], mode='a')
+        self.assertEqual(self.run_backfill()["written"], 1)
+        self.assertIn("three", open(os.path.join(self.log_dir, [n for n in self.logs() if "_s1_" in n][0])).read())
+
+    def test_touched_but_unchanged_transcript_skipped(self):
+        path = self.write_transcript("s1", [_user("first"), _assistant("one")])
+        self.run_backfill()
+        os.utime(path, (1, 1))
+        self.assertEqual(self.run_backfill()["written"], 0)
+
+    def test_hook_log_kept_unless_rebuild(self):
+        self.write_transcript("s1", [_user("first"), _assistant("one")])
+        hook_log = os.path.join(self.log_dir, "2026-01-01_00-00-00_s1_conversation-log.txt")
+        with open(hook_log, 'w') as f:
+            f.write("hook output\n")
+        self.assertEqual(self.run_backfill()["skipped"], 1)
+        self.assertEqual(self.run_backfill(rebuild=True)["written"], 1)
+        self.assertEqual(self.logs(), [os.path.basename(hook_log)])
+        self.assertIn("one", self.read_log())
+
+    def test_format_change_replaces_log(self):
+        self.write_transcript("s1", [_user("first"), _assistant("one")])
+        self.run_backfill("text")
+        self.assertEqual(self.run_backfill("markdown")["written"], 1)
+        self.assertEqual([os.path.splitext(n)[1] for n in self.logs()], [".md"])
+
+    def test_active_session_skipped(self):
+        self.write_transcript("s1", [_user("first"), _assistant("one")])
+        open(os.path.join(self.temp_dir, ".temp_session_s1.json"), 'w').close()
+        self.assertEqual(self.run_backfill(), {"written": 0, "skipped": 1, "failed": 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
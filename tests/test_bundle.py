@@ -0,0 +1,142 @@
+"""Tests for the precompiled hook bundle — build output and parity with the scripts."""
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+from conftest import SCRIPTS_DIR, import_script
+
+build_bundle_mod = import_script("build_bundle", "build-bundle.py")
+
+_DIGITS_RE = re.compile(r'\d')
+
+SCRIPT_FOR_EVENT = {
+    "UserPromptSubmit": "log-prompt.py",
+    "Stop": "log-response.py",
+}
+
+
+def _transcript_lines():
+    return [
+        {"type": "user", "message": {"role": "user", "content": "Write a file"}},
+        {"type": "assistant", "message": {"content": [
+            {"type": "text", "text": "Writing it."},
+            {"type": "tool_use", "name": "Write", "input": {"file_path": "/p/a.py", "content": "x = 1"}}]}},
+        {"type": "user", "message": {"content": [{"type": "tool_result", "content": "File created"}]}},
+        {"type": "assistant", "message": {"content": [{"type": "text", "text": "Done"}]}},
+    ]
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "building the bundle requires Python 3.7+")
+class TestBundle(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.build_dir = tempfile.mkdtemp()
+        cls.bundle = build_bundle_mod.build_bundle(os.path.join(cls.build_dir, "hooks.pyz"))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.build_dir)
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.transcript = os.path.join(self.tmp, "t.jsonl")
+        with open(self.transcript, 'w', encoding='utf-8') as f:
+            for entry in _transcript_lines():
+                f.write(json.dumps(entry) + "\n")
+
+    def _run_session(self, name, use_bundle, log_format):
+        """Run one full session through either the bundle or the scripts. Returns outputs and logs."""
+        home = os.path.join(self.tmp, name, "home")
+        cwd = os.path.join(self.tmp, name, "proj")
+        os.makedirs(os.path.join(cwd, ".claude"))
+        os.makedirs(home)
+        with open(os.path.join(cwd, ".claude", "conversation-logger-config.json"), 'w') as f:
+            json.dump({"log_format": log_format}, f)
+        env = dict(os.environ, HOME=home, USERPROFILE=home)
+
+        base = {"session_id": "s1", "cwd": cwd, "transcript_path": self.transcript}
+        payloads = [
+            {"hook_event_name": "SessionStart", "source": "startup", "model": "m"},
+            {"hook_event_name": "UserPromptSubmit", "prompt": "Write a file"},
+            {"hook_event_name": "SubagentStart", "subagent_type": "Explore", "subagent_id": "a1"},
+            {"hook_event_name": "PostToolUseFailure", "tool_name": "Bash", "error": "exit 1"},
+            {"hook_event_name": "Stop"},
+            {"hook_event_name": "Notification"},
+            {"hook_event_name": "SessionEnd", "reason": "exit"},
+        ]
+        outputs = []
+        for payload in payloads:
+            payload = dict(base, **payload)
+            if use_bundle:
+                args = [self.bundle]
+            else:
+                script = SCRIPT_FOR_EVENT.get(payload["hook_event_name"], "log-event.py")
+                args = [os.path.join(SCRIPTS_DIR, script)]
+            result = subprocess.run([sys.executable] + args, input=json.dumps(payload).encode("utf-8"),
+                                    env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            outputs.append((result.returncode, result.stdout, result.stderr))
+
+        logs = {}
+        log_dir = os.path.join(cwd, ".claude", "logs")
+        for filename in sorted(n for n in os.listdir(log_dir) if not n.startswith(".")):
+            with open(os.path.join(log_dir, filename), encoding='utf-8') as f:
+                logs[_DIGITS_RE.sub("0", filename)] = _DIGITS_RE.sub("0", f.read())
+        return outputs, logs
+
+    def test_archive_contents(self):
+        with zipfile.ZipFile(self.bundle) as zf:
+            names = set(zf.namelist())
+        for module in ("__main__", "utils", "transcript", "log_prompt", "log_event", "log_response"):
+            self.assertIn(f"{module}.py", names)
+            self.assertIn(f"{module}.pyc", names)
+
+    def test_build_is_reproducible(self):
+        # Separate processes: marshal output can differ within one interpreter
+        built = []
+        for name in ("a.pyz", "b.pyz"):
+            built.append(os.path.join(self.build_dir, name))
+            subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, "build-bundle.py"), "-o", built[-1]],
+                           stdout=subprocess.PIPE, check=True)
+        with open(built[0], 'rb') as a, open(built[1], 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_matches_scripts(self):
+        for log_format in ("text", "markdown"):
+            scripts = self._run_session(f"scripts-{log_format}", False, log_format)
+            bundle = self._run_session(f"bundle-{log_format}", True, log_format)
+            self.assertEqual(bundle[0], scripts[0])
+            self.assertEqual(bundle[1], scripts[1])
+            self.assertTrue(bundle[1])
+
+    def test_invalid_input_exits_like_scripts(self):
+        for script in ("log-prompt.py", "log-event.py", "log-response.py"):
+            expected = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, script)],
+                                      input=b"not json", stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            self.assertEqual(expected.returncode, 1)
+        actual = subprocess.run([sys.executable, self.bundle], input=b"not json",
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.assertEqual(actual.returncode, 1)
+
+    def test_event_argument_overrides_payload(self):
+        cwd = os.path.join(self.tmp, "proj")
+        os.makedirs(cwd)
+        payload = {"session_id": "s1", "cwd": cwd, "prompt": "hello"}
+        env = dict(os.environ, HOME=self.tmp, USERPROFILE=self.tmp)
+        result = subprocess.run([sys.executable, self.bundle, "UserPromptSubmit"],
+                                input=json.dumps(payload).encode("utf-8"), env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn(b"Prompt logged", result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+"""Tests for coalesce.py — spooled subagent and tool failure events and their flush."""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+from conftest import SCRIPTS_DIR
+
+import coalesce
+import logreader
+
+
+def _record(kind, ts, **fields):
+    return {"kind": kind, "ts": ts, "t": 0, "fields": fields}
+
+
+class TestCoalesce(unittest.TestCase):
+
+    def test_identical_failures_collapse(self):
+        records = [
+            _record("subagent_start", "12:00:00", type="Explore", id="a1"),
+            _record("tool_failed", "12:00:01", tool="Bash", error="exit 1 | pipe"),
+            _record("tool_failed", "12:00:02", tool="Bash", error="exit 2"),
+            _record("tool_failed", "12:00:03", tool="Bash", error="exit 1 | pipe"),
+            _record("subagent_stop", "12:00:04", type="Explore", id=""),
+            _record("tool_failed", "12:00:05", tool="Bash", error="exit 1 | pipe"),
+        ]
+        self.assertEqual(coalesce.coalesce(records, "text"), [
+            "~ SUBAGENT START (12:00:00) | type=Explore | id=a1\n",
+            "~ TOOL FAILED (12:00:01) | tool=Bash | count=3 | last=12:00:05 | error=exit 1 | pipe\n",
+            "~ TOOL FAILED (12:00:02) | tool=Bash | error=exit 2\n",
+            "~ SUBAGENT STOP (12:00:04) | type=Explore\n",
+        ])
+        self.assertEqual(coalesce.coalesce(records[1:4], "markdown")[0],
+                         "> **Tool Failed** -- 12:00:01 | tool: `Bash` | count: 2 | last: 12:00:03"
+                         " | error: exit 1 | pipe\n")
+
+    def test_collapsed_line_reads_back(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        records = [_record("tool_failed", f"12:00:0{n}", tool="Read", error="not found") for n in range(3)]
+        for log_format, ext in (("text", ".txt"), ("markdown", ".md")):
+            path = os.path.join(tmp, "log" + ext)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("".join(coalesce.coalesce(records, log_format)))
+            event, = logreader.iter_events(path)
+            self.assertEqual(event.attrs, {"name": "tool_failed", "tool": "Read", "count": "3",
+                                           "last": "12:00:02", "error": "not found"})
+
+
+class TestSpool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.home = os.path.join(self.tmp, "home")
+        self.cwd = os.path.join(self.tmp, "proj")
+        os.makedirs(self.home)
+        os.makedirs(os.path.join(self.cwd, ".claude"))
+        self.spool = os.path.join(self.home, ".claude", "tmp", ".event_spool_s1.jsonl")
+
+    def configure(self, value):
+        with open(os.path.join(self.cwd, ".claude", "conversation-logger-config.json"), 'w') as f:
+            json.dump({"coalesce_events": value}, f)
+
+    def hook(self, script, **payload):
+        payload = dict(payload, session_id="s1", cwd=self.cwd)
+        result = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, script)],
+                                input=json.dumps(payload).encode(), env=dict(os.environ, HOME=self.home),
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def failure(self, error="exit 1"):
+        self.hook("log-event.py", hook_event_name="PostToolUseFailure", tool_name="Bash", error=error)
+
+    def log(self):
+        log_dir = os.path.join(self.cwd, ".claude", "logs")
+        names = [n for n in os.listdir(log_dir) if n.endswith("_conversation-log.txt")] \
+            if os.path.isdir(log_dir) else []
+        if not names:
+            return ""
+        with open(os.path.join(log_dir, names[0]), encoding='utf-8') as f:
+            return f.read()
+
+    def test_spooled_until_next_prompt(self):
+        self.configure({"window_seconds": 3600})
+        self.hook("log-event.py", hook_event_name="SubagentStart", subagent_type="Explore", subagent_id="a1")
+        for _ in range(3):
+            self.failure()
+        self.assertNotIn("~ ", self.log())
+        with open(self.spool, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 4)
+        self.hook("log-prompt.py", prompt="next")
+        log = self.log()
+        self.assertIn("~ SUBAGENT START", log)
+        self.assertEqual(log.count("~ TOOL FAILED"), 1)
+        self.assertIn("| count=3 | last=", log)
+        self.assertLess(log.index("~ TOOL FAILED"), log.index("next"))
+        self.assertEqual(os.path.getsize(self.spool), 0)
+
+    def test_window_and_session_end_flush(self):
+        self.configure({"window_seconds": 0})
+        self.failure()
+        self.assertIn("~ TOOL FAILED", self.log())
+        self.configure(True)
+        self.failure("exit 2")
+        self.hook("log-event.py", hook_event_name="SessionEnd", reason="exit")
+        log = self.log()
+        self.assertLess(log.index("error=exit 2"), log.index("~ SESSION END"))
+
+    def test_off_by_default(self):
+        self.failure()
+        self.assertIn("~ TOOL FAILED", self.log())
+        self.assertFalse(os.path.exists(self.spool))
+
+
+if __name__ == '__main__':
+    unittest.main()
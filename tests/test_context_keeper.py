@@ -0,0 +1,207 @@
+"""Tests for context-keeper MEMORY.md helpers — section index, Active Work, compaction marker, restore."""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(__file__))
+import conftest  # noqa: F401  (adds scripts/ to sys.path)
+
+import utils
+
+MEMORY = (
+    "# Project Memory\n"
+    "\n"
+    "## Active Work\n"
+    "<!-- compaction: auto at 2026-01-01 10:00 -->\n"
+    "- [Auto-saved context] Files modified in previous context:\n"
+    "  - old.py\n"
+    "- **Implement auth**\n"
+    "  Status: in progress\n"
+    "\n"
+    "## Decisions & Conventions\n"
+    "- JWT over sessions\n"
+)
+
+
+class _MemoryCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        home_patch = mock.patch.dict(os.environ, {"HOME": self.tmp, "USERPROFILE": self.tmp})
+        home_patch.start()
+        self.addCleanup(home_patch.stop)
+        utils._memory_index_memo.clear()
+        self.memory_file = os.path.join(self.tmp, "MEMORY.md")
+
+    def write(self, content, newline=None):
+        with open(self.memory_file, 'w', encoding='utf-8', newline=newline) as f:
+            f.write(content)
+
+    def read(self):
+        with open(self.memory_file, 'rb') as f:
+            return f.read().decode('utf-8')
+
+
+# ---------------------------------------------------------------------------
+# get_memory_section_index
+# ---------------------------------------------------------------------------
+class TestMemorySectionIndex(_MemoryCase):
+
+    def test_sections_and_byte_ranges(self):
+        self.write(MEMORY)
+        index = utils.get_memory_section_index(self.memory_file)
+        headers = [s[0] for s in index["sections"]]
+        self.assertEqual(headers, ["## Active Work", "## Decisions & Conventions"])
+        data = MEMORY.encode('utf-8')
+        _, start, body_start, end = index["sections"][0]
+        self.assertTrue(data[start:body_start].startswith(b"## Active Work"))
+        self.assertTrue(data[end:].startswith(b"## Decisions"))
+        self.assertEqual(index["lines"], MEMORY.count("\n"))
+
+    def test_unchanged_file_not_rescanned(self):
+        self.write(MEMORY)
+        utils.get_memory_section_index(self.memory_file)
+        utils._memory_index_memo.clear()  # Force the on-disk cache path
+        with mock.patch.object(utils, "_scan_memory_sections") as scan:
+            utils.get_memory_section_index(self.memory_file)
+            utils.read_active_work(self.memory_file)
+        scan.assert_not_called()
+
+    def test_subsection_headers_not_split(self):
+        self.write("## Active Work\n### Detail\n- item\n## Other\n")
+        self.assertEqual(utils.read_active_work(self.memory_file), "### Detail\n- item")
+
+
+# ---------------------------------------------------------------------------
+# read_active_work / write_compaction_marker
+# ---------------------------------------------------------------------------
+class TestCompactionMarker(_MemoryCase):
+
+    def test_read_active_work(self):
+        self.write(MEMORY)
+        active = utils.read_active_work(self.memory_file)
+        self.assertTrue(active.startswith("<!-- compaction: auto"))
+        self.assertTrue(active.endswith("Status: in progress"))
+
+    def test_marker_replaced_and_other_sections_untouched(self):
+        self.write(MEMORY)
+        utils.write_compaction_marker(self.memory_file, "manual", ["/new.py"])
+        content = self.read()
+        self.assertEqual(content.count("<!-- compaction:"), 1)
+        self.assertIn("<!-- compaction: manual", content)
+        self.assertIn("  - /new.py\n- **Implement auth**", content)
+        self.assertNotIn("old.py", content)
+        self.assertTrue(content.startswith("# Project Memory\n\n## Active Work\n"))
+        self.assertTrue(content.endswith("## Decisions & Conventions\n- JWT over sessions\n"))
+
+    def test_section_created_when_missing(self):
+        self.write("# Memory\n\n## Notes\n- a")
+        utils.write_compaction_marker(self.memory_file, "auto")
+        content = self.read()
+        self.assertTrue(content.startswith("# Memory\n\n## Notes\n- a\n\n## Active Work\n<!-- compaction: auto"))
+
+    def test_crlf_line_endings_preserved(self):
+        self.write(MEMORY.replace("\n", "\r\n"), newline="")
+        utils.write_compaction_marker(self.memory_file, "auto", ["/x.py"])
+        content = self.read()
+        self.assertNotIn("\n", content.replace("\r\n", ""))
+        self.assertEqual(utils.read_active_work(self.memory_file).count("<!-- compaction:"), 1)
+
+    def test_cached_index_matches_rescan_after_write(self):
+        for initial in (MEMORY, "# Memory\n\n## Notes\n- a\n"):
+            self.write(initial)
+            utils.write_compaction_marker(self.memory_file, "auto", ["/a.py", "/b.py"])
+            cached = utils.get_memory_section_index(self.memory_file)
+            lines, sections = utils._scan_memory_sections(self.memory_file)
+            self.assertEqual(cached["sections"], sections)
+            self.assertEqual(cached["lines"], lines)
+
+
+# ---------------------------------------------------------------------------
+# build_restore_context: budgeted Active Work restore
+# ---------------------------------------------------------------------------
+class TestRestoreBudget(_MemoryCase):
+
+    def tasks(self, count, body_lines=2):
+        lines = []
+        for i in range(count):
+            lines.append(f"- **Task {i}**")
+            lines.extend(f"  detail {i}.{j} " + "x" * 40 for j in range(body_lines))
+        return "\n".join(lines)
+
+    def test_unlimited_budget_keeps_everything(self):
+        self.write(MEMORY)
+        context = utils.build_restore_context(self.memory_file, "startup")
+        self.assertIn("old.py", context)
+        self.assertIn("Status: in progress", context)
+
+    def test_unlimited_budget_restores_section_verbatim(self):
+        files = "\n".join(f"  - /f{i}.py" for i in range(30))
+        active = (self.tasks(2) + "\n\n- **Later task**\n  note\n\n<!-- compaction: auto at 2026-01-01 10:00 -->\n"
+                  "- [Auto-saved context] Files modified in previous context:\n" + files)
+        self.write("## Active Work\n" + active + "\n\n## Decisions\n- kept out\n")
+        self.assertEqual(utils.render_active_work(active, self.memory_file, 0), active)
+        context = utils.build_restore_context(self.memory_file, "startup")
+        self.assertIn(f"Active work from previous session:\n{active}\n", context)
+
+    def test_newest_tasks_kept_and_older_dropped(self):
+        self.write("## Active Work\n" + self.tasks(20) + "\n")
+        context = utils.build_restore_context(self.memory_file, "resume", max_bytes=500)
+        self.assertIn("**Task 0**", context)
+        self.assertNotIn("**Task 19**", context)
+        self.assertIn("older item(s) omitted", context)
+        self.assertIn(self.memory_file, context)
+        excerpt = utils.render_active_work(self.tasks(20), self.memory_file, 500)
+        self.assertLess(len(excerpt.encode("utf-8")), 500 + 200)
+
+    def test_oversized_task_truncated_on_line_boundary(self):
+        self.write("## Active Work\n" + self.tasks(1, body_lines=50) + "\n")
+        excerpt = utils.render_active_work(self.tasks(1, body_lines=50), self.memory_file, 300)
+        self.assertTrue(excerpt.startswith("- **Task 0**\n  detail 0.0"))
+        self.assertIn(" ...\n[... truncated", excerpt)
+
+    def test_marker_first_with_file_list_capped(self):
+        files = "\n".join(f"  - /f{i}.py" for i in range(30))
+        active = (self.tasks(1) + "\n<!-- compaction: auto at 2026-01-01 10:00 -->\n"
+                  "- [Auto-saved context] Files modified in previous context:\n" + files)
+        excerpt = utils.render_active_work(active, self.memory_file, 10000)
+        self.assertTrue(excerpt.startswith("<!-- compaction: auto"))
+        self.assertIn(f"/f{utils.RESTORE_MARKER_FILES_LIMIT - 1}.py", excerpt)
+        self.assertNotIn(f"/f{utils.RESTORE_MARKER_FILES_LIMIT}.py", excerpt)
+        self.assertIn(f"{30 - utils.RESTORE_MARKER_FILES_LIMIT} more", excerpt)
+        self.assertTrue(excerpt.endswith("x" * 40))
+
+    def test_rendered_result_cached_by_mtime(self):
+        self.write(MEMORY)
+        first = utils.build_restore_context(self.memory_file, "startup", max_bytes=200)
+        utils._memory_index_memo.clear()  # Force the on-disk cache path
+        with mock.patch.object(utils, "render_active_work") as render, \
+                mock.patch.object(utils, "read_memory_section") as read:
+            self.assertEqual(utils.build_restore_context(self.memory_file, "startup", max_bytes=200), first)
+        render.assert_not_called()
+        read.assert_not_called()
+
+        utils.write_compaction_marker(self.memory_file, "manual", ["/new.py"])
+        self.assertIn("/new.py", utils.build_restore_context(self.memory_file, "startup", max_bytes=200))
+
+    def test_budget_from_config(self):
+        config_dir = os.path.join(self.tmp, "proj", ".claude")
+        os.makedirs(config_dir)
+        path = os.path.join(config_dir, "conversation-logger-config.json")
+        cwd = os.path.dirname(config_dir)
+        cases = [({}, 0), ({"restore_max_tokens": 50}, 200),
+                 ({"restore_max_tokens": 50, "restore_max_bytes": 123}, 123),
+                 ({"restore_max_bytes": 0}, 0)]
+        for ck, expected in cases:
+            with open(path, 'w') as f:
+                f.write('{"log_format": "text", "context_keeper": %s}' % json.dumps(dict(ck, enabled=True)))
+            self.assertEqual(utils.get_context_keeper_config(cwd)["restore_max_bytes"], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
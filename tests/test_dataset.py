@@ -0,0 +1,129 @@
+"""Tests for dataset.py — transcript and log rows, CSV/Parquet files and incremental export."""
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+from conftest import import_script
+
+import dataset
+log_event_mod = import_script("log_event", "log-event.py")
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+def _entry(entry, ts):
+    return dict(entry, timestamp=f"2026-01-02T03:04:{ts:02d}.250Z")
+
+
+def _turn(n, start):
+    return [
+        _entry({"type": "user", "message": {"role": "user", "content": f"prompt {n}"}}, start),
+        _entry({"type": "assistant", "message": {"content": [
+            {"type": "tool_use", "id": f"t{n}", "name": "Bash", "input": {"command": "ls"}}]}}, start + 1),
+        _entry({"type": "user", "message": {"content": [
+            {"type": "tool_result", "tool_use_id": f"t{n}", "content": "out", "is_error": n == 2}]}}, start + 3),
+        _entry({"type": "assistant", "message": {"content": [{"type": "text", "text": "done"}]}}, start + 4),
+    ]
+
+
+class TestDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.transcripts = os.path.join(self.tmp, "transcripts")
+        self.log_dir = os.path.join(self.tmp, "logs")
+        self.out = os.path.join(self.tmp, "dataset")
+        os.makedirs(self.transcripts)
+        os.makedirs(self.log_dir)
+        self.transcript = os.path.join(self.transcripts, "s1.jsonl")
+        self.write_transcript(_turn(1, 0) + _turn(2, 10))
+        self.log_file = os.path.join(self.log_dir, "2026-01-02_03-04-00_s1_conversation-log.txt")
+        log_event_mod.handle_tool_failure({"tool_name": "Bash", "error": "exit 1"}, self.log_file, "text",
+                                          self.log_dir, "s1", self.tmp)
+
+    def write_transcript(self, entries, mode='w'):
+        with open(self.transcript, mode, encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+    def run_dataset(self, fmt="csv", **kwargs):
+        sessions = dataset.find_sessions(self.log_dir, [self.transcripts])
+        return dataset.run_dataset(sessions, self.out, fmt, jobs=1, **kwargs)
+
+    def read_csv(self):
+        with open(os.path.join(self.out, "date=2026-01-02", "s1.csv"), encoding='utf-8', newline='') as f:
+            return list(csv.DictReader(f))
+
+    def test_transcript_rows(self):
+        rows = list(dataset.iter_transcript_rows(self.transcript))
+        self.assertEqual([(r.turn, r.kind) for r in rows], [
+            (1, "prompt"), (1, "tool_use"), (1, "tool_result"), (1, "response"),
+            (2, "prompt"), (2, "tool_use"), (2, "tool_result"), (2, "response")])
+        result = rows[6]
+        self.assertEqual((result.tool, result.tool_use_id, result.is_error, result.bytes, result.latency_ms),
+                         ("Bash", "t2", True, 3, 2000))
+        self.assertFalse(rows[2].is_error)
+        self.assertEqual((rows[0].bytes, rows[0].ts % 60000), (8, 250))
+        self.assertEqual(rows[3].latency_ms, 4000)
+
+    def test_csv_export_with_log_events(self):
+        counts = self.run_dataset(batch_rows=3)
+        self.assertEqual(counts, {"written": 1, "skipped": 0, "failed": 0, "rows": 9})
+        rows = self.read_csv()
+        self.assertEqual(list(rows[0]), [name for name, _ in dataset.COLUMNS])
+        self.assertEqual([r["seq"] for r in rows], [str(n) for n in range(9)])
+        self.assertEqual(rows[0]["ts"], "2026-01-02T03:04:00.250Z")
+        self.assertEqual((rows[6]["is_error"], rows[2]["is_error"], rows[0]["tool"]), ("true", "false", ""))
+        event = rows[-1]
+        self.assertEqual((event["source"], event["kind"], event["name"], event["tool"], event["is_error"]),
+                         ("log", "event", "tool_failed", "Bash", "true"))
+        self.assertEqual(json.loads(event["detail"]), {"tool": "Bash", "error": "exit 1"})
+
+    def test_incremental(self):
+        self.assertEqual(self.run_dataset()["written"], 1)
+        self.assertEqual(self.run_dataset()["skipped"], 1)
+        self.write_transcript(_turn(3, 20), 'a')
+        self.assertEqual(self.run_dataset(), {"written": 1, "skipped": 0, "failed": 0, "rows": 13})
+        log_event_mod.handle_session_end({"reason": "exit"}, self.log_file, "text", self.log_dir, "s1", self.tmp)
+        self.assertEqual(self.run_dataset()["rows"], 14)
+        self.assertEqual(len(self.read_csv()), 14)
+        self.assertEqual(self.run_dataset(force=True)["written"], 1)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.out, "date=2026-01-02"))), ["s1.csv"])
+
+    def test_format_change_replaces_files(self):
+        self.run_dataset()
+        with open(os.path.join(self.out, dataset.MANIFEST_NAME), encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest["format"] = "parquet"
+        with open(os.path.join(self.out, dataset.MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(dict(manifest, sessions={"s1": {"file": os.path.join("date=2026-01-01", "s1.parquet")}}), f)
+        old = os.path.join(self.out, "date=2026-01-01", "s1.parquet")
+        os.makedirs(os.path.dirname(old))
+        open(old, 'w').close()
+        self.assertEqual(self.run_dataset()["written"], 1)
+        self.assertFalse(os.path.exists(old))
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_parquet_export(self):
+        self.run_dataset("parquet", batch_rows=4)
+        self.run_dataset("csv")  # Another format exports every session again
+        self.assertEqual(self.run_dataset("parquet")["written"], 1)
+        self.assertEqual(os.listdir(os.path.join(self.out, "date=2026-01-02")), ["s1.parquet"])
+        parquet = pq.ParquetFile(os.path.join(self.out, "date=2026-01-02", "s1.parquet"))
+        self.assertEqual(parquet.schema_arrow.names, [name for name, _ in dataset.COLUMNS])
+        table = parquet.read()
+        self.assertEqual(table.num_rows, 9)
+        self.assertEqual(table.column("latency_ms").to_pylist()[6], 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
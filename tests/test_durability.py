@@ -0,0 +1,135 @@
+"""Tests for log durability modes — config, fsync per mode and batch group commit."""
+import fcntl
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(__file__))
+import conftest  # noqa: F401  (adds scripts/ to sys.path)
+
+import durability
+
+
+class _DurabilityCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.log_file = os.path.join(self.tmp, "session_conversation-log.txt")
+        self.fsyncs = []
+        real_fsync = os.fsync
+
+        def counting_fsync(fd):
+            self.fsyncs.append(os.readlink(f"/proc/self/fd/{fd}") if os.path.exists("/proc/self/fd") else fd)
+            real_fsync(fd)
+
+        patcher = mock.patch("os.fsync", side_effect=counting_fsync)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _append(self, mode, text="line\n"):
+        with durability.open_log(self.log_file, mode) as f:
+            f.write(text)
+
+
+class TestConfig(unittest.TestCase):
+
+    def test_default_and_configured(self):
+        with tempfile.TemporaryDirectory() as cwd, \
+                mock.patch("os.path.expanduser", return_value=cwd):
+            self.assertEqual(durability.get_durability(cwd), "none")
+            os.makedirs(os.path.join(cwd, ".claude"))
+            config = os.path.join(cwd, ".claude", "conversation-logger-config.json")
+            with open(config, 'w') as f:
+                json.dump({"durability": "batch"}, f)
+            self.assertEqual(durability.get_durability(cwd), "batch")
+            with open(config, 'w') as f:
+                json.dump({"durability": "sometimes"}, f)
+            self.assertEqual(durability.get_durability(cwd), "none")
+
+
+# ---------------------------------------------------------------------------
+# Modes
+# ---------------------------------------------------------------------------
+
+class TestModes(_DurabilityCase):
+
+    def test_none_never_fsyncs(self):
+        self._append("none")
+        self._append("none")
+        self.assertEqual(self.fsyncs, [])
+        self.assertEqual(sorted(os.listdir(self.tmp)), [os.path.basename(self.log_file)])
+
+    def test_always_fsyncs_each_append_and_new_directory_entry(self):
+        self._append("always")
+        self.assertEqual(len(self.fsyncs), 2)  # File, then its directory
+        self._append("always")
+        self.assertEqual(len(self.fsyncs), 3)
+        with open(self.log_file) as f:
+            self.assertEqual(f.read(), "line\nline\n")
+
+    def test_failed_write_is_not_synced(self):
+        with self.assertRaises(ValueError):
+            with durability.open_log(self.log_file, "always") as f:
+                f.write("partial\n")
+                raise ValueError("boom")
+        self.assertEqual(self.fsyncs, [])
+
+
+class TestGroupCommit(_DurabilityCase):
+
+    def _commits(self):
+        with open(os.path.join(self.tmp, durability.LOCK_NAME), 'rb') as f:
+            return int(f.read(20) or 0)
+
+    def test_uncovered_append_commits(self):
+        self._append("batch")
+        self._append("batch")
+        self.assertEqual(self._commits(), 2)
+        self.assertEqual(os.path.getsize(os.path.join(self.tmp, durability.DIRTY_NAME)), 0)
+        with open(self.log_file) as f:
+            self.assertEqual(f.read(), "line\nline\n")
+
+    def test_append_covered_by_later_commit_skips_fsync(self):
+        other_log = os.path.join(self.tmp, "other_conversation-log.txt")
+        with open(other_log, 'w') as f:
+            f.write("x\n")
+        real_flock = fcntl.flock
+        nested = []
+
+        calls = []
+
+        def flock(fd, op):
+            calls.append(op)
+            if len(calls) == 3:  # Listed (lock, unlock), about to wait for the commit lock
+                # Another hook commits after our append, before we get the commit lock
+                nested.append(durability.group_commit(self.log_file))
+            real_flock(fd, op)
+
+        with mock.patch("fcntl.flock", side_effect=flock):
+            covered = durability.group_commit(other_log)
+        self.assertEqual(nested, [True])
+        self.assertFalse(covered)
+        self.assertEqual(self._commits(), 1)
+        synced = [os.path.basename(p) for p in self.fsyncs if isinstance(p, str)]
+        if synced:
+            self.assertIn("other_conversation-log.txt", synced)
+
+    def test_concurrent_hooks_share_fsyncs(self):
+        threads = [threading.Thread(target=self._append, args=("batch", f"{i}\n")) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with open(self.log_file) as f:
+            self.assertEqual(sorted(f.read().split()), sorted(str(i) for i in range(20)))
+        self.assertLessEqual(self._commits(), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""Tests for export.py — turn sources, pagination, fragments and incremental export."""
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import conftest  # noqa: F401  (adds scripts/ to sys.path)
+
+import backfill
+import export
+
+BIG = "\n".join(f"line {i} <tag>" for i in range(3000))
+
+
+def _entry(entry, ts="2026-01-02T03:04:05.000Z"):
+    return dict(entry, timestamp=ts)
+
+
+def _turn(n, output="ok"):
+    return [
+        _entry({"type": "user", "message": {"role": "user", "content": f"prompt {n}"}}),
+        _entry({"type": "assistant", "message": {"content": [
+            {"type": "text", "text": f"answer {n}"},
+            {"type": "tool_use", "name": "Bash", "input": {"command": "ls"}}]}}),
+        _entry({"type": "tool_result", "content": output}),
+    ]
+
+
+class _ExportCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.transcripts = os.path.join(self.tmp, "transcripts")
+        self.log_dir = os.path.join(self.tmp, "logs")
+        self.out = os.path.join(self.tmp, "html")
+        os.makedirs(self.transcripts)
+        os.makedirs(self.log_dir)
+        entries = []
+        for n in range(1, 6):
+            entries.extend(_turn(n, BIG if n == 2 else f"out {n}"))
+        self.transcript = os.path.join(self.transcripts, "s1.jsonl")
+        with open(self.transcript, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+    def write_log(self, log_format):
+        ext = ".md" if log_format == "markdown" else ".txt"
+        log_file = os.path.join(self.log_dir, f"2026-01-02_03-04-05_s1_conversation-log{ext}")
+        backfill.render_transcript(self.transcript, log_file, log_format)
+        return log_file
+
+    def export(self, *sources, **kwargs):
+        kwargs.setdefault("turns_per_page", 2)
+        return export.run_export(list(sources), self.out, jobs=1, **kwargs)
+
+    def read(self, name):
+        with open(os.path.join(self.out, "s1", name), encoding='utf-8') as f:
+            return f.read()
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+class TestSources(_ExportCase):
+
+    def _summary(self, turns):
+        return [(next(t for k, t in items if k == "prompt"), [k for k, _ in items if k == "output"])
+                for _, items in turns]
+
+    def test_logs_split_like_the_transcript(self):
+        expected = [(f"prompt {n}", ["output"]) for n in range(1, 6)]
+        turns = list(export.iter_transcript_turns(self.transcript, self.log_dir))
+        self.assertEqual(self._summary(turns), expected)
+        self.assertEqual([t for k, t in turns[1][1] if k == "output"], [BIG])
+        for log_format in ("text", "markdown"):
+            turns = list(export.iter_log_turns(self.write_log(log_format), log_format))
+            self.assertEqual(self._summary(turns), expected, log_format)
+            self.assertEqual([t for k, t in turns[1][1] if k == "output"], [BIG], log_format)
+
+    def test_find_sources_prefers_transcripts(self):
+        self.write_log("text")
+        other = os.path.join(self.log_dir, "2026-01-03_00-00-00_s2_conversation-log.md")
+        open(other, 'w').close()
+        self.assertEqual(export.find_sources(self.log_dir, self.transcripts),
+                         [("s1", "transcript", self.transcript), ("s2", "markdown", other)])
+        self.assertEqual([s[1] for s in export.find_sources(self.log_dir, self.transcripts, ["s1"], "log")],
+                         ["text"])
+        self.assertEqual(export.find_sources(self.log_dir, self.transcripts, [other]), [("s2", "markdown", other)])
+
+
+# ---------------------------------------------------------------------------
+# Pages and fragments
+# ---------------------------------------------------------------------------
+
+class TestExport(_ExportCase):
+
+    def test_pages_and_fragments(self):
+        counts = self.export(("s1", "transcript", self.transcript))
+        self.assertEqual(counts, {"written": 1, "skipped": 0, "failed": 0})
+        names = sorted(os.listdir(os.path.join(self.out, "s1")))
+        self.assertEqual(names, [".source.json", "fragments", "index.html",
+                                 "page-0001.html", "page-0002.html", "page-0003.html"])
+        first = self.read("page-0001.html")
+        self.assertIn("&lt;tag&gt;", first)
+        self.assertNotIn("line 2999", first)  # Only the preview is inline
+        self.assertIn('href="page-0002.html"', first)
+        self.assertNotIn("Next", self.read("page-0003.html"))
+        self.assertIn('href="page-0003.html#turn-5"', self.read("index.html"))
+
+        fragment = self.read(os.path.join("fragments", "000001.js"))
+        number, text = re.match(r"loadFragment\((\d+), (.*)\);\n$", fragment, re.S).groups()
+        self.assertEqual((number, json.loads(text)), ("1", BIG))
+
+    def test_unchanged_sessions_are_skipped(self):
+        source = ("s1", "markdown", self.write_log("markdown"))
+        self.assertEqual(self.export(source)["written"], 1)
+        self.assertEqual(self.export(source)["skipped"], 1)
+        self.assertEqual(self.export(source, turns_per_page=3)["written"], 1)
+        self.assertEqual(sorted(n for n in os.listdir(self.out)), ["s1"])  # No temp dirs left behind
+
+    def test_redaction_applies(self):
+        self.export(("s1", "transcript", self.transcript), redaction={"builtin": False, "literals": ["answer 1"]})
+        self.assertIn("[REDACTED]", self.read("page-0001.html"))
+        self.assertNotIn("answer 1", self.read("index.html"))
+
+
+if __name__ == '__main__':
+    unittest.main()
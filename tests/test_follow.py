@@ -0,0 +1,157 @@
+"""Tests for follow mode — session discovery, incremental tails and the live loop."""
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import conftest  # noqa: F401  (adds scripts/ to sys.path)
+
+import follow
+import utils
+
+
+class _FollowCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.temp_dir = os.path.join(self.tmp, "tmp")
+        self.project = os.path.join(self.tmp, "proj")
+        self.log_dir = os.path.join(self.project, ".claude", "logs")
+        os.makedirs(self.temp_dir)
+        os.makedirs(self.log_dir)
+
+    def _start_session(self, session_id, cwd=None, content=""):
+        log_file = os.path.join(self.log_dir, f"2026-01-01_00-00-00_{session_id}_conversation-log.txt")
+        with open(log_file, 'w', encoding='utf-8') as f:
+            f.write(content)
+        utils.write_temp_session(session_id, {
+            "session_id": session_id, "cwd": cwd or self.project,
+            "log_format": "text", "log_file_path": log_file}, self.temp_dir)
+        return log_file
+
+
+# ---------------------------------------------------------------------------
+# Discovery and offsets
+# ---------------------------------------------------------------------------
+
+class TestDiscovery(_FollowCase):
+
+    def test_filters_by_project_and_id(self):
+        self._start_session("aaa111")
+        self._start_session("bbb222", cwd="/elsewhere")
+        self.assertEqual([s["session_id"] for s in follow.find_active_sessions(
+            self.project, temp_dir=self.temp_dir)], ["aaa111"])
+        self.assertEqual(len(follow.find_active_sessions(temp_dir=self.temp_dir)), 2)
+        self.assertEqual([s["session_id"] for s in follow.find_active_sessions(
+            self.project, ("bbb",), self.temp_dir)], ["bbb222"])
+
+    def test_ignores_other_temp_files(self):
+        with open(os.path.join(self.temp_dir, ".transcript_cache_x.json"), 'w') as f:
+            f.write("{}")
+        self.assertEqual(follow.find_active_sessions(temp_dir=self.temp_dir), [])
+
+    def test_tail_offset(self):
+        path = self._start_session("s", content="".join(f"line {i}\n" for i in range(5000)))
+        with open(path, 'rb') as f:
+            f.seek(follow.tail_offset(path, 3))
+            self.assertEqual(f.read(), b"line 4997\nline 4998\nline 4999\n")
+        self.assertEqual(follow.tail_offset(path, 0), os.path.getsize(path))
+        self.assertEqual(follow.tail_offset(path, 10 ** 6), 0)
+
+
+class TestSessionTail(_FollowCase):
+
+    def test_reads_only_new_complete_lines(self):
+        path = self._start_session("s", content="old\n")
+        tail = follow.SessionTail("s", path, os.path.getsize(path))
+        self.assertEqual("".join(tail.read_new()), "")
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("éé first\nsec")
+        self.assertEqual("".join(tail.read_new()), "éé first\n")
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("ond\n")
+        self.assertEqual("".join(tail.read_new()), "second\n")
+
+    def test_restarts_after_rewrite(self):
+        path = self._start_session("s", content="a long first version\n")
+        tail = follow.SessionTail("s", path, os.path.getsize(path))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("short\n")
+        self.assertEqual("".join(tail.read_new()), "short\n")
+
+    def test_large_append_is_read_in_chunks(self):
+        path = self._start_session("s")
+        tail = follow.SessionTail("s", path)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("x" * (follow.READ_CHUNK + 10) + "\n")
+        chunks = list(tail.read_new())
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(len(chunks[0]), follow.READ_CHUNK + 11)
+
+
+# ---------------------------------------------------------------------------
+# Live loop
+# ---------------------------------------------------------------------------
+
+class TestFollowLoop(_FollowCase):
+
+    def _run(self, use_inotify, actions):
+        out = io.StringIO()
+        done = threading.Event()
+
+        def writer():
+            time.sleep(0.2)
+            for action in actions:
+                action()
+                time.sleep(0.1)
+            time.sleep(0.5)
+            done.set()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        follow.follow(out, cwd=self.project, lines=1, temp_dir=self.temp_dir,
+                      use_inotify=use_inotify, poll_interval=0.05, stop=done.is_set)
+        thread.join()
+        return out.getvalue()
+
+    def _check(self, use_inotify):
+        first = self._start_session("one111", content="old\nlast old\n")
+
+        def append(path, text):
+            return lambda: open(path, 'a', encoding='utf-8').write(text)
+
+        def start_second():
+            self.second = self._start_session("two222", content="~ SESSION START\n")
+
+        output = self._run(use_inotify, [
+            append(first, "prompt 1\n"),
+            start_second,
+            lambda: append(self.second, "prompt 2\n")(),
+            append(first, "response 1\n"),
+            lambda: utils.delete_temp_session("one111", self.temp_dir),
+        ])
+        self.assertNotIn("old\nlast old", output)
+        self.assertEqual(output.count("last old\n"), 1)
+        for text in ("prompt 1\n", "~ SESSION START\n", "prompt 2\n", "response 1\n"):
+            self.assertEqual(output.count(text), 1, output)
+        self.assertIn("==> two222 (", output)
+        self.assertLess(output.index("prompt 1"), output.index("prompt 2"))
+        self.assertLess(output.index("prompt 2"), output.index("response 1"))
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+    def test_inotify(self):
+        follow.Inotify().close()  # Fails loudly if inotify cannot be used here
+        self._check(True)
+
+    def test_polling(self):
+        self._check(False)
+
+
+if __name__ == '__main__':
+    unittest.main()
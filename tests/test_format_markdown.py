@@ -111,6 +111,17 @@ class TestFormatToolResultMd(unittest.TestCase):
         fence = result.split("\n")[0]
         self.assertGreater(len(fence), 3)
 
+    def test_compact_fences_head_and_tail_with_digest(self):
+        content = "```\n" + "\n".join(f"row {i}" for i in range(50))
+        result = log_response_mod.format_tool_result_md(content, "compact")
+        fence, body = result.split("\n", 1)
+        self.assertGreater(len(fence), 3)
+        self.assertIn("\u2026 36 lines omitted \u2026", body)
+        self.assertRegex(result.splitlines()[-1], r"^> \*\d+ bytes, sha256 [0-9a-f]{12}\*$")
+
+    def test_summary_is_a_size_line(self):
+        self.assertEqual(log_response_mod.format_tool_result_md("a\nb", "summary"), "> *(3 bytes, 2 lines)*")
+
 
 # ---------------------------------------------------------------------------
 # Tier 3.6: _format_output_markdown
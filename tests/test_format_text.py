@@ -76,6 +76,49 @@ class TestFormatToolResult(unittest.TestCase):
         self.assertIn("line 49", result)
 
 
+# ---------------------------------------------------------------------------
+# "detail" levels: compact and summary tool calls
+# ---------------------------------------------------------------------------
+class TestDetailLevels(unittest.TestCase):
+
+    def setUp(self):
+        self.output = "\n".join([f"line {i}" for i in range(100)])
+
+    def test_compact_keeps_head_and_tail(self):
+        result = log_response_mod.format_tool_result(self.output, "compact")
+        self.assertIn("line 9\n", result)
+        self.assertNotIn("line 10\n", result)
+        self.assertIn("\u2026 85 lines omitted \u2026", result)
+        self.assertIn("line 95", result)
+        self.assertIn("line 99", result)
+        self.assertRegex(result.splitlines()[-1], r"^  \u23bf  \[789 bytes, sha256 [0-9a-f]{12}\]$")
+
+    def test_compact_short_result_unchanged(self):
+        self.assertEqual(log_response_mod.format_tool_result("a\nb", "compact"),
+                         log_response_mod.format_tool_result("a\nb"))
+
+    def test_compact_cuts_long_lines_and_params(self):
+        result = log_response_mod.format_tool_result("x" * 1000, "compact")
+        self.assertIn("x" * log_response_mod.COMPACT_LINE_CHARS + "\u2026", result)
+        self.assertIn("1000 bytes, sha256", result)
+        tool_input = log_response_mod.format_tool_input("Write", {"file_path": "/a", "content": "y" * 500},
+                                                       "compact")
+        self.assertIn("\u2026 (500 bytes)", tool_input)
+
+    def test_summary_keeps_sizes_only(self):
+        self.assertEqual(log_response_mod.format_tool_result(self.output, "summary"),
+                         "  \u23bf  (789 bytes, 100 lines)")
+        tool_input = log_response_mod.format_tool_input(
+            "Edit", {"file_path": "/a.py", "old_string": "old", "new_string": "new\ntext"}, "summary")
+        self.assertEqual(tool_input, "\u25cf Edit(file_path=/a.py, old_string=<3 bytes>, new_string=<8 bytes>)")
+
+    def test_head_tail_lines(self):
+        head_tail = log_response_mod._head_tail_lines
+        self.assertEqual(head_tail("a\nb\nc", 2, 2), (["a", "b", "c"], 0, []))
+        self.assertEqual(head_tail("a\nb\nc\nd\ne", 1, 2), (["a"], 2, ["d", "e"]))
+        self.assertEqual(head_tail("a\nb\nc", 1, 2), (["a", "b", "c"], 0, []))
+
+
 # ---------------------------------------------------------------------------
 # Tier 3: _write_prompt_text structural checks
 # ---------------------------------------------------------------------------
@@ -0,0 +1,150 @@
+"""Tests for the date-sharded log layout — paths, indexed lookup, migration and backfill."""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(__file__))
+import conftest  # noqa: F401  (adds scripts/ to sys.path)
+
+import backfill
+import migrate
+import utils
+
+MAIN = "2026-03-04_10-11-12_s1_conversation-log.md"
+SUBAGENT = "2026-03-04_10-11-12_s1_conversation-log_subagent-a1.md"
+OTHER = "2025-12-31_23-59-59_s2_conversation-log.txt"
+
+
+class _LayoutCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.cwd = os.path.join(self.tmp, "proj")
+        self.log_dir = os.path.join(self.cwd, ".claude", "logs")
+        self.temp_dir = os.path.join(self.tmp, "tmp")
+        os.makedirs(self.log_dir)
+        os.makedirs(self.temp_dir)
+
+    def set_layout(self, layout):
+        with open(os.path.join(self.cwd, ".claude", "conversation-logger-config.json"), 'w') as f:
+            json.dump({"log_layout": layout}, f)
+
+    def write_log(self, *parts):
+        path = os.path.join(self.log_dir, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(parts[-1])
+        return path
+
+
+# ---------------------------------------------------------------------------
+# Paths and lookup
+# ---------------------------------------------------------------------------
+
+class TestPaths(_LayoutCase):
+
+    def test_shard_dir(self):
+        self.assertEqual(utils.log_shard_dir(self.log_dir, MAIN, "date"),
+                         os.path.join(self.log_dir, "2026", "03", "04"))
+        self.assertEqual(utils.log_shard_dir(self.log_dir, MAIN, "flat"), self.log_dir)
+        self.assertEqual(utils.log_shard_dir(self.log_dir, "debug-response.log", "date"), self.log_dir)
+
+    def test_new_session_in_date_layout_is_indexed(self):
+        self.set_layout("date")
+        with mock.patch("utils.get_temp_session_dir", return_value=self.temp_dir):
+            log_file, _, _ = utils.resolve_log_path(self.cwd, "s9")
+        relative = os.path.relpath(log_file, self.log_dir).split(os.sep)
+        self.assertEqual(len(relative), 4)
+        self.assertTrue(os.path.isdir(os.path.dirname(log_file)))
+        open(log_file, 'w').close()
+        with mock.patch("glob.glob", side_effect=AssertionError("scanned")):
+            self.assertEqual(utils._find_existing_log(self.log_dir, "s9"), log_file)
+
+    def test_flat_logs_still_found_without_index(self):
+        path = self.write_log(OTHER)
+        self.assertEqual(utils._find_existing_log(self.log_dir, "s2"), path)
+
+    def test_stale_index_entry_falls_back(self):
+        utils.record_log_path(self.log_dir, "s2", os.path.join(self.log_dir, "2025", "12", "31", OTHER))
+        path = self.write_log(OTHER)
+        self.assertEqual(utils._find_existing_log(self.log_dir, "s2"), path)
+
+
+# ---------------------------------------------------------------------------
+# Migration
+# ---------------------------------------------------------------------------
+
+class TestMigrate(_LayoutCase):
+
+    def test_flat_to_date_and_back(self):
+        self.write_log(MAIN)
+        self.write_log(SUBAGENT)
+        self.write_log(OTHER)
+        self.write_log("debug-response.log")
+
+        counts, skipped, _ = migrate.migrate_logs(self.log_dir, "date", self.temp_dir)
+        self.assertEqual((counts["moved"], counts["indexed"], skipped), (3, 2, []))
+        shard = os.path.join(self.log_dir, "2026", "03", "04")
+        self.assertEqual(sorted(os.listdir(shard)), [MAIN, SUBAGENT])
+        self.assertTrue(os.path.exists(os.path.join(self.log_dir, "debug-response.log")))
+        with mock.patch("glob.glob", side_effect=AssertionError("scanned")):
+            self.assertEqual(utils._find_existing_log(self.log_dir, "s1"), os.path.join(shard, MAIN))
+
+        # Idempotent
+        counts, _, _ = migrate.migrate_logs(self.log_dir, "date", self.temp_dir)
+        self.assertEqual(counts["moved"], 0)
+
+        counts, _, _ = migrate.migrate_logs(self.log_dir, "flat", self.temp_dir)
+        self.assertEqual(counts["moved"], 3)
+        self.assertEqual(sorted(n for n in os.listdir(self.log_dir) if not n.startswith(".")),
+                         sorted([OTHER, MAIN, SUBAGENT, "debug-response.log"]))
+        self.assertEqual(os.listdir(os.path.join(self.log_dir, utils.SESSION_INDEX_DIR)), [])
+
+    def test_active_sessions_and_conflicts_skipped(self):
+        self.write_log(MAIN)
+        self.write_log(OTHER)
+        self.write_log("2025", "12", "31", OTHER)
+        open(os.path.join(self.temp_dir, ".temp_session_s1.json"), 'w').close()
+        counts, skipped, _ = migrate.migrate_logs(self.log_dir, "date", self.temp_dir)
+        self.assertEqual(counts["moved"], 0)
+        self.assertEqual(sorted(reason.split()[-1] for _, reason in skipped), ["exists", "session"])
+        self.assertTrue(os.path.exists(os.path.join(self.log_dir, MAIN)))
+
+    def test_dry_run_moves_nothing(self):
+        self.write_log(MAIN)
+        counts, _, moves = migrate.migrate_logs(self.log_dir, "date", self.temp_dir, dry_run=True)
+        self.assertEqual(counts["moved"], 1)
+        self.assertEqual(len(moves), 1)
+        self.assertTrue(os.path.exists(os.path.join(self.log_dir, MAIN)))
+
+    def test_backfill_manifest_follows_moves(self):
+        path = self.write_log(MAIN)
+        backfill.save_manifest(self.log_dir, {"version": backfill.BACKFILL_VERSION,
+                                              "sessions": {"s1": {"log_file": path}}})
+        migrate.migrate_logs(self.log_dir, "date", self.temp_dir)
+        self.assertEqual(backfill.load_manifest(self.log_dir)["sessions"]["s1"]["log_file"],
+                         os.path.join(self.log_dir, "2026", "03", "04", MAIN))
+
+
+class TestBackfillLayout(_LayoutCase):
+
+    def test_backfill_writes_into_shards(self):
+        transcripts = os.path.join(self.tmp, "transcripts")
+        os.makedirs(transcripts)
+        with open(os.path.join(transcripts, "s5.jsonl"), 'w') as f:
+            f.write(json.dumps({"type": "user", "timestamp": "2026-05-06T07:08:09.000Z",
+                                "message": {"role": "user", "content": "hi"}}) + "\n")
+        counts = backfill.run_backfill(backfill.find_transcripts(transcripts), self.log_dir, "text",
+                                       jobs=1, temp_dir=self.temp_dir, layout="date")
+        self.assertEqual(counts["written"], 1)
+        found = utils._find_existing_log(self.log_dir, "s5")
+        self.assertEqual(os.path.relpath(os.path.dirname(found), self.log_dir).split(os.sep)[0], "2026")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""Tests for logreader.py — events and turns read back from logs written by the hooks."""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+from conftest import import_script
+
+import logreader
+log_prompt_mod = import_script("log_prompt", "log-prompt.py")
+log_response_mod = import_script("log_response", "log-response.py")
+log_event_mod = import_script("log_event", "log-event.py")
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+OUTPUT = "a\n```\nnested fence\n```\n## \U0001f464 User \u2014 12:00:00\n~ SESSION END (12:00:00) | reason=x\nz"
+OUTPUTS = [
+    ("text", "Let me look.\n\n```python\nprint(1)\n```\nDone?"),
+    ("tool_use", {"name": "Bash", "input": {"command": "cat x", "description": "Show"}}),
+    ("tool_use", {"name": "Read", "input": {"file_path": "/a.py"}}),
+    ("tool_result", OUTPUT),
+    ("tool_result", ""),
+    ("tool_rejection", "  \u23bf  Tool use rejected with user message: not that"),
+    ("text", "Done."),
+    ("interrupt", "  \u23bf  Interrupted"),
+]
+
+
+class TestLogReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def write_session(self, log_format, detail="full"):
+        log_file = os.path.join(self.tmp, "s_conversation-log." + ("md" if log_format == "markdown" else "txt"))
+        log_event_mod.handle_session_start({"source": "startup", "model": "m1"}, log_file, log_format,
+                                           self.tmp, "s1", self.tmp)
+        with open(log_file, 'a', encoding='utf-8') as f:
+            if log_format == "markdown":
+                log_prompt_mod._write_prompt_markdown(f, log_file, "first\n\n---\nline", "12:00:00")
+            else:
+                log_prompt_mod._write_prompt_text(f, "first\n\nline", "12:00:00")
+            log_response_mod.write_response(f, log_file, log_format, [], OUTPUTS, NOW, detail)
+        log_event_mod.handle_tool_failure({"tool_name": "Bash", "error": "exit 1 | pipe"}, log_file, log_format,
+                                          self.tmp, "s1", self.tmp)
+        with open(log_file, 'a', encoding='utf-8') as f:
+            if log_format == "markdown":
+                log_prompt_mod._write_prompt_markdown(f, log_file, "second", "12:05:00")
+            else:
+                log_prompt_mod._write_prompt_text(f, "second", "12:05:00")
+            log_response_mod.write_response(f, log_file, log_format, [("answer", "yes"), ("interrupt", "")],
+                                            [("text", "ok")], NOW, detail)
+        return log_file
+
+    def check_session(self, log_format):
+        log_file = self.write_session(log_format)
+        events = list(logreader.iter_events(log_file))
+        self.assertEqual([e.kind for e in events], [
+            "event", "prompt", "response", "text", "tool_use", "tool_use", "tool_result", "tool_result",
+            "rejected", "text", "interrupted", "event", "prompt", "follow_up", "follow_up", "response", "text"])
+        start, prompt = events[0], events[1]
+        self.assertEqual(start.attrs, {"name": "session_start", "source": "startup", "model": "m1"})
+        self.assertEqual(prompt.when, "12:00:00")
+        self.assertIn("first", prompt.text)
+        self.assertTrue(prompt.text.endswith("line"))
+        self.assertEqual(events[2].when, "2026-01-01 12:00:00")
+        self.assertEqual(events[3].text, OUTPUTS[0][1])
+        self.assertEqual(events[4].attrs["name"], "Bash")
+        self.assertIn("command=cat x", events[4].text)
+        self.assertEqual(events[6].text, OUTPUT)
+        self.assertEqual(events[8].text, "not that")
+        self.assertEqual(events[11].attrs, {"name": "tool_failed", "tool": "Bash", "error": "exit 1 | pipe"})
+        self.assertEqual([e.attrs["label"] for e in events[13:15]], ["answer", "interrupt"])
+        self.assertEqual(events[13].text, "yes")
+        with open(log_file, 'rb') as f:
+            data = f.read()
+        for event in events:
+            self.assertLess(event.offset, event.end)
+            self.assertTrue(data[event.end - 1:event.end] == b"\n")
+        return log_file, events
+
+    def test_text_log(self):
+        self.check_session("text")
+
+    def test_markdown_log(self):
+        self.check_session("markdown")
+
+    def test_resume_from_any_event_end(self):
+        for log_format in ("text", "markdown"):
+            log_file, events = self.check_session(log_format)
+            for n, event in enumerate(events):
+                self.assertEqual(list(logreader.iter_events(log_file, offset=event.end)), events[n + 1:])
+
+    def test_turns(self):
+        for log_format in ("text", "markdown"):
+            log_file, events = self.check_session(log_format)
+            turns = list(logreader.iter_turns(log_file))
+            self.assertEqual([t.prompt and t.prompt.split("\n")[0] for t in turns], [None, "first", "second"])
+            self.assertEqual(sum(len(t.events) for t in turns), len(events) - 2)
+            self.assertEqual(turns[1].end, events[11].end)
+            self.assertEqual(turns[-1].end, events[-1].end)
+
+    def test_max_text_and_unfinished_line(self):
+        log_file = self.write_session("text")
+        events = list(logreader.iter_events(log_file, max_text=5))
+        result = [e for e in events if e.kind == "tool_result"][0]
+        self.assertEqual(result.text, OUTPUT[:5])
+        self.assertTrue(result.attrs["truncated"])
+        with open(log_file, 'a', encoding='utf-8') as f:
+            f.write("~ SESSION END (12:09:00) | reason=ex")
+        self.assertEqual(list(logreader.iter_events(log_file))[-1].kind, "text")
+
+    def test_compact_detail_digest(self):
+        output = "\n".join(f"line {i}" for i in range(100))
+        for log_format in ("text", "markdown"):
+            log_file = os.path.join(self.tmp, "c_conversation-log." + ("md" if log_format == "markdown" else "txt"))
+            with open(log_file, 'w', encoding='utf-8') as f:
+                log_response_mod.write_response(f, log_file, log_format, [],
+                                                [("tool_result", output), ("tool_result", "b")], NOW, "compact")
+            results = [e for e in logreader.iter_events(log_file) if e.kind == "tool_result"]
+            self.assertEqual(len(results), 2)
+            self.assertRegex(results[0].attrs["digest"], r"^789 bytes, sha256 [0-9a-f]{12}$")
+            self.assertTrue(results[0].text.endswith("line 99"))
+            self.assertEqual((results[1].text, results[1].attrs), ("b", {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Tests for maintenance.py — job stamps, the scheduler lock and the detached run."""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import conftest  # noqa: F401  (adds scripts/ to sys.path)
+
+import maintenance
+
+
+class TestSchedule(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.lock_file = os.path.join(self.tmp, maintenance.LOCK_NAME)
+
+    def wait_for_run(self):
+        deadline = time.time() + 30
+        while os.path.exists(self.lock_file) and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertFalse(os.path.exists(self.lock_file))
+
+    def temp_file(self, name, age):
+        path = os.path.join(self.tmp, name)
+        open(path, 'w').close()
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_first_hook_starts_the_clock(self):
+        now = time.time()
+        self.assertFalse(maintenance.schedule_jobs(self.tmp, now))
+        self.assertEqual(maintenance.read_stamps(self.tmp), {"temp_files": now})
+        self.assertFalse(maintenance.schedule_jobs(self.tmp, now + 60))
+        self.assertFalse(os.path.exists(self.lock_file))
+
+    def test_due_job_runs_in_background_once(self):
+        stale = self.temp_file(".temp_session_old.json", 7200)
+        fresh = self.temp_file(".temp_session_new.json", 60)
+        maintenance.write_stamps(self.tmp, {"temp_files": time.time() - 3600})
+        self.assertTrue(maintenance.schedule_jobs(self.tmp))
+        self.wait_for_run()
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(fresh))
+        self.assertEqual(maintenance.due_jobs(maintenance.read_stamps(self.tmp), time.time()), [])
+        self.assertFalse(maintenance.schedule_jobs(self.tmp))
+
+    def test_held_lock_skips_the_run(self):
+        maintenance.write_stamps(self.tmp, {"temp_files": 0})
+        open(self.lock_file, 'w').close()
+        self.assertFalse(maintenance.schedule_jobs(self.tmp))
+        self.assertTrue(os.path.exists(self.lock_file))
+        stale = time.time() - maintenance.LOCK_STALE_SECONDS - 1
+        os.utime(self.lock_file, (stale, stale))
+        self.assertFalse(maintenance.schedule_jobs(self.tmp))  # Stale lock is cleared for the next hook
+        self.assertFalse(os.path.exists(self.lock_file))
+
+    def test_failing_job_is_stamped(self):
+        def fail(temp_dir):
+            raise RuntimeError("boom")
+        saved = maintenance.JOBS
+        maintenance.JOBS = [("fail", 60, fail)]
+        self.addCleanup(setattr, maintenance, "JOBS", saved)
+        maintenance.write_stamps(self.tmp, {"fail": 0})
+        self.assertEqual(maintenance.run_due_jobs(self.tmp), ["fail"])
+        self.assertEqual(maintenance.run_due_jobs(self.tmp), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Tests for modified file tracking — tail reader and shared transcript parse cache."""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import conftest  # noqa: F401  (adds scripts/ to sys.path)
+
+import transcript
+import utils
+
+
+def _assistant_edit(*paths, tool="Edit"):
+    return {"type": "assistant", "message": {"content": [
+        {"type": "text", "text": "editing"}] + [
+        {"type": "tool_use", "name": tool, "input": {"file_path": p}} for p in paths]}}
+
+
+class _TranscriptCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.transcript = os.path.join(self.tmp, "t.jsonl")
+        open(self.transcript, 'w').close()
+
+    def append(self, *entries, newline=True):
+        with open(self.transcript, 'a', encoding='utf-8') as f:
+            f.write("\n".join(json.dumps(e) for e in entries))
+            if newline:
+                f.write("\n")
+
+
+# ---------------------------------------------------------------------------
+# modified_paths: nested and top-level tool uses
+# ---------------------------------------------------------------------------
+class TestModifiedPaths(unittest.TestCase):
+
+    def test_nested_assistant_tool_uses(self):
+        entry = _assistant_edit("/a.py", "/b.py")
+        self.assertEqual(transcript.modified_paths(entry), ["/a.py", "/b.py"])
+
+    def test_top_level_tool_use(self):
+        entry = {"type": "tool_use", "tool_name": "Write", "tool_input": {"file_path": "/c.py"}}
+        self.assertEqual(transcript.modified_paths(entry), ["/c.py"])
+
+    def test_read_only_tools_ignored(self):
+        entry = _assistant_edit("/a.py", tool="Read")
+        self.assertEqual(transcript.modified_paths(entry), [])
+
+
+# ---------------------------------------------------------------------------
+# extract_modified_files: reverse tail read
+# ---------------------------------------------------------------------------
+class TestExtractModifiedFiles(_TranscriptCase):
+
+    def test_most_recent_first_and_deduplicated(self):
+        self.append(_assistant_edit("/a.py"), _assistant_edit("/b.py", "/a.py"),
+                    _assistant_edit("/c.py"))
+        self.assertEqual(utils.extract_modified_files(self.transcript), ["/c.py", "/a.py", "/b.py"])
+
+    def test_only_tail_lines_inspected(self):
+        self.append(_assistant_edit("/old.py"), *[{"type": "assistant"}] * 5)
+        self.assertEqual(utils.extract_modified_files(self.transcript, max_lines=5), [])
+
+    def test_missing_transcript(self):
+        self.assertEqual(utils.extract_modified_files(os.path.join(self.tmp, "none.jsonl")), [])
+
+
+# ---------------------------------------------------------------------------
+# update_transcript_cache: shared per-session parse cache
+# ---------------------------------------------------------------------------
+class TestTranscriptCache(_TranscriptCase):
+
+    def update(self):
+        return utils.update_transcript_cache("s1", self.transcript, temp_dir=self.tmp)
+
+    def test_incremental_updates(self):
+        self.append(_assistant_edit("/a.py"), _assistant_edit("/b.py"))
+        cache = self.update()
+        self.assertEqual(cache.modified_files, ["/b.py", "/a.py"])
+        first_offset = cache.offset
+
+        self.append(_assistant_edit("/a.py", tool="Write"))
+        cache = self.update()
+        self.assertEqual(cache.modified_files, ["/a.py", "/b.py"])
+        self.assertGreater(cache.offset, first_offset)
+        self.assertEqual(cache.offset, os.path.getsize(self.transcript))
+        self.assertEqual(cache.tool_calls, {"Edit": 2, "Write": 1})
+
+    def test_turns_and_follow_ups_recorded(self):
+        self.append({"type": "user", "message": {"content": "first"}},
+                    {"type": "user", "message": {"content": [
+                        {"type": "text", "text": "[Request interrupted by user]"}]}},
+                    {"type": "user", "message": {"content": "second"}})
+        cache = self.update()
+        self.assertEqual((len(cache.turns), cache.turn_count), (2, 2))
+        self.assertEqual(cache.last_turn_offset, cache.turns[-1])
+        self.assertEqual(cache.follow_ups, {"INTERRUPT": 1})
+
+    def test_only_recent_turn_offsets_are_kept(self):
+        count = transcript.TranscriptCache.RECENT_TURNS + 5
+        self.append(*[{"type": "user", "message": {"content": f"prompt {n}"}} for n in range(count)])
+        cache = self.update()
+        self.assertEqual(len(cache.turns), transcript.TranscriptCache.RECENT_TURNS)
+        self.assertEqual(cache.stats()["turns"], count)
+
+    def test_partial_last_line_deferred(self):
+        self.append(_assistant_edit("/a.py"))
+        self.append(_assistant_edit("/b.py"), newline=False)
+        self.assertEqual(self.update().modified_files, ["/a.py"])
+        with open(self.transcript, 'a') as f:
+            f.write("\n")
+        self.assertEqual(self.update().modified_files, ["/b.py", "/a.py"])
+
+    def test_rewritten_transcript_rescanned(self):
+        self.append(*[_assistant_edit(f"/{i}.py") for i in range(5)])
+        self.update()
+        open(self.transcript, 'w').close()
+        self.append(_assistant_edit("/new.py"))
+        self.assertEqual(self.update().modified_files, ["/new.py"])
+
+    def test_other_transcript_invalidates(self):
+        self.append(_assistant_edit("/a.py"))
+        self.update()
+        other = os.path.join(self.tmp, "other.jsonl")
+        with open(other, 'w') as f:
+            f.write(json.dumps(_assistant_edit("/z.py")) + "\n")
+        cache = utils.update_transcript_cache("s1", other, temp_dir=self.tmp)
+        self.assertEqual(cache.modified_files, ["/z.py"])
+
+
+if __name__ == '__main__':
+    unittest.main()
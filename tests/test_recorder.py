@@ -0,0 +1,123 @@
+"""Tests for the hook recorder and replay — ring buffer, recording from the hooks, replay."""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+from conftest import SCRIPTS_DIR
+
+import recorder
+import replay
+
+
+class TestRingBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, "ring")
+
+    def append(self, *records, capacity=1024):
+        with recorder.RingBuffer(self.path, capacity) as ring:
+            for record in records:
+                ring.append(record)
+
+    def read(self):
+        with recorder.RingBuffer(self.path, create=False) as ring:
+            return list(ring)
+
+    def test_keeps_newest_records_in_order(self):
+        records = [f"record {n:03d} ".encode() * 3 for n in range(200)]
+        for record in records:
+            self.append(record)
+        stored = self.read()
+        self.assertGreater(len(stored), 10)
+        self.assertEqual(stored, records[-len(stored):])
+        self.assertEqual(os.path.getsize(self.path), 1024)
+
+    def test_varied_sizes_wrap_cleanly(self):
+        records = [bytes([65 + n % 26]) * (1 + (n * 37) % 200) for n in range(300)]
+        for n, record in enumerate(records):
+            self.append(record)
+            stored = self.read()
+            self.assertEqual(stored, records[n + 1 - len(stored):n + 1])
+
+    def test_oversized_record_is_rejected(self):
+        self.append(b"keep")
+        with self.assertRaises(ValueError):
+            self.append(b"x" * 512)
+        self.assertEqual(self.read(), [b"keep"])
+
+    def test_damaged_record_ends_the_read(self):
+        self.append(b"first", b"second")
+        with open(self.path, 'r+b') as f:
+            f.seek(64 + 8 + 5 + 8)  # Header, first record, second record's header
+            f.write(b"X")
+        self.assertEqual(self.read(), [b"first"])
+
+
+class TestReplay(unittest.TestCase):
+    """Record a small session through the real hooks, then replay it."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.home = os.path.join(self.tmp, "home")
+        self.cwd = os.path.join(self.tmp, "proj")
+        os.makedirs(self.home)
+        os.makedirs(os.path.join(self.cwd, ".claude"))
+        self.transcript = os.path.join(self.tmp, "s1.jsonl")
+        open(self.transcript, 'w').close()
+        self.log_dir = os.path.join(self.cwd, ".claude", "logs")
+
+    def hook(self, script, **payload):
+        payload.update(session_id="s1", cwd=self.cwd, transcript_path=self.transcript)
+        subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, script)], input=json.dumps(payload).encode(),
+                       env=dict(os.environ, HOME=self.home), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def transcript_add(self, *entries):
+        with open(self.transcript, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(dict(entry, timestamp="2026-01-01T00:00:00.000Z")) + "\n")
+
+    def record_session(self):
+        with open(os.path.join(self.cwd, ".claude", "conversation-logger-config.json"), 'w') as f:
+            json.dump({"record_hooks": True}, f)
+        self.hook("log-event.py", hook_event_name="SessionStart", source="startup")
+        for n in (1, 2):
+            self.transcript_add({"type": "user", "message": {"role": "user", "content": f"prompt {n}"}})
+            self.hook("log-prompt.py", hook_event_name="UserPromptSubmit", prompt=f"prompt {n}")
+            self.transcript_add({"type": "assistant", "message": {"content": [{"type": "text", "text": f"a{n}"}]}})
+            self.hook("log-response.py", hook_event_name="Stop")
+        self.transcript_add({"type": "user", "message": {"role": "user", "content": "not replayed"}})
+
+    def test_off_by_default(self):
+        self.hook("log-event.py", hook_event_name="SessionStart", source="startup")
+        self.assertFalse(os.path.exists(recorder.get_ring_path(self.log_dir)))
+
+    def test_replay_matches_the_session_log(self):
+        self.record_session()
+        records = recorder.read_records(recorder.get_ring_path(self.log_dir))
+        self.assertEqual([r["hook"] for r in records],
+                         ["log-event", "log-prompt", "log-response", "log-prompt", "log-response"])
+        self.assertLess(records[1]["transcript_size"], records[2]["transcript_size"])
+
+        session_id, session = replay.select_session(records, "s")
+        sandbox, timings, failures = replay.replay_session(session, self.cwd, os.path.join(self.tmp, "replay"))
+        self.assertEqual(failures, [])
+        self.assertEqual([label for label, _ in timings],
+                         ["SessionStart", "UserPromptSubmit", "Stop", "UserPromptSubmit", "Stop"])
+        self.assertEqual(os.path.getsize(sandbox.transcripts[self.transcript]), records[-1]["transcript_size"])
+        actual = replay.read_session_log(os.path.join(sandbox.cwd, ".claude", "logs"), session_id)
+        golden = replay.read_session_log(self.log_dir, session_id)
+        self.assertIn("a2", actual)
+        self.assertEqual(replay.normalize(actual, [(sandbox.cwd, self.cwd)]), replay.normalize(golden))
+        self.assertFalse(os.path.exists(recorder.get_ring_path(os.path.join(sandbox.cwd, ".claude", "logs"))))
+
+
+if __name__ == '__main__':
+    unittest.main()
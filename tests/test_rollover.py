@@ -0,0 +1,160 @@
+"""Tests for size-based log rollover — part paths, the rollover itself, lookup and readers."""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(__file__))
+import conftest  # noqa: F401  (adds scripts/ to sys.path)
+
+import backfill
+import export
+import migrate
+import utils
+
+BASE = "2026-03-04_10-11-12_s1_conversation-log"
+
+
+class _RolloverCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.cwd = os.path.join(self.tmp, "proj")
+        self.log_dir = os.path.join(self.cwd, ".claude", "logs")
+        self.temp_dir = os.path.join(self.tmp, "tmp")
+        os.makedirs(self.log_dir)
+        os.makedirs(self.temp_dir)
+        patcher = mock.patch("utils.get_temp_session_dir", return_value=self.temp_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def set_config(self, **options):
+        with open(os.path.join(self.cwd, ".claude", "conversation-logger-config.json"), 'w') as f:
+            json.dump(options, f)
+
+    def write_log(self, name, text="x" * 200):
+        path = os.path.join(self.log_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+
+# ---------------------------------------------------------------------------
+# Part paths
+# ---------------------------------------------------------------------------
+
+class TestPartPaths(_RolloverCase):
+
+    def test_part_path_and_number(self):
+        base = os.path.join(self.log_dir, BASE + ".md")
+        part3 = os.path.join(self.log_dir, BASE + ".part3.md")
+        self.assertEqual(utils.log_part_path(base, 3), part3)
+        self.assertEqual(utils.log_part_path(part3, 1), base)
+        self.assertEqual((utils.log_part_number(base), utils.log_part_number(part3)), (1, 3))
+        self.assertEqual(utils.log_part_path("debug-response.log", 2), "debug-response.log")
+
+    def test_current_part_of_earliest_log(self):
+        # ".part2.txt" sorts before ".txt": the order comes from the part number
+        paths = [BASE + ".part2.txt", BASE + ".txt", "2026-03-05_00-00-00_s1_conversation-log.txt",
+                 BASE + ".part10.txt"]
+        self.assertEqual(utils.current_log_part(paths), BASE + ".part10.txt")
+
+    def test_log_parts_stop_at_first_gap(self):
+        base = self.write_log(BASE + ".md")
+        part2 = self.write_log(BASE + ".part2.md")
+        self.write_log(BASE + ".part4.md")
+        self.assertEqual(utils.log_parts(part2), [base, part2])
+
+
+# ---------------------------------------------------------------------------
+# Rollover
+# ---------------------------------------------------------------------------
+
+class TestRollover(_RolloverCase):
+
+    def test_no_limit_by_default(self):
+        base = self.write_log(BASE + ".md")
+        utils.write_temp_session("s1", {"session_id": "s1", "log_format": "markdown", "log_file_path": base})
+        self.assertEqual(utils.resolve_log_path(self.cwd, "s1")[0], base)
+        self.assertEqual(os.listdir(self.log_dir), [BASE + ".md"])
+
+    def test_full_log_continues_in_next_part(self):
+        self.set_config(max_log_bytes=100)  # Raised to MIN_LOG_BYTES
+        base = self.write_log(BASE + ".md", "x" * utils.MIN_LOG_BYTES)
+        utils.write_temp_session("s1", {"session_id": "s1", "log_format": "markdown", "log_file_path": base,
+                                        "prompt": "keep"})
+        log_file, log_format, _ = utils.resolve_log_path(self.cwd, "s1")
+        self.assertEqual(log_file, os.path.join(self.log_dir, BASE + ".part2.md"))
+        with open(log_file, encoding='utf-8') as f:
+            header = f.read()
+        self.assertTrue(header.startswith("# Conversation Log"))
+        self.assertIn(f"[{BASE}.md]({BASE}.md)", header)
+        with open(base, encoding='utf-8') as f:
+            self.assertIn(f"Continued in [{BASE}.part2.md]", f.read())
+
+        temp = utils.read_temp_session("s1")
+        self.assertEqual((temp["log_file_path"], temp["prompt"]), (log_file, "keep"))
+        with mock.patch("glob.glob", side_effect=AssertionError("scanned")):
+            self.assertEqual(utils._find_existing_log(self.log_dir, "s1"), log_file)
+            self.assertEqual(utils.resolve_log_path(self.cwd, "s1")[0], log_file)  # Not full yet
+
+    def test_concurrent_rollover_creates_one_part(self):
+        base = self.write_log(BASE + ".txt")
+        first = utils.roll_log_part(self.cwd, self.log_dir, "s1", base, "text", 100)
+        second = utils.roll_log_part(self.cwd, self.log_dir, "s1", base, "text", 100)
+        self.assertEqual(first, second)
+        with open(first, encoding='utf-8') as f:
+            self.assertEqual(f.read(), f"~ CONTINUED FROM {BASE}.txt (part 2)\n")
+        with open(base, encoding='utf-8') as f:
+            self.assertEqual(f.read().count("CONTINUED IN"), 1)
+
+    def test_lookup_without_index_finds_current_part(self):
+        self.write_log(BASE + ".txt")
+        part2 = self.write_log(BASE + ".part2.txt")
+        self.write_log("2026-03-05_00-00-00_s1_conversation-log.txt")
+        self.assertEqual(utils._find_existing_log(self.log_dir, "s1"), part2)
+        _, index, _ = migrate.plan_migration(self.log_dir, "date")
+        self.assertEqual(os.path.basename(index["s1"]), BASE + ".part2.txt")
+
+
+# ---------------------------------------------------------------------------
+# Readers
+# ---------------------------------------------------------------------------
+
+class TestReaders(_RolloverCase):
+
+    def _split(self, log_file, log_format, max_bytes):
+        """Roll log_file over at the prompt after max_bytes, as the hooks would have."""
+        with open(log_file, encoding='utf-8') as f:
+            text = f.read()
+        marker = "\n## \U0001f464" if log_format == "markdown" else "\n" + "=" * 80 + "\n\U0001f464"
+        cut = text.index(marker, max_bytes)
+        with open(log_file, 'w', encoding='utf-8') as f:
+            f.write(text[:cut + 1])
+        part2 = utils.roll_log_part(self.cwd, self.log_dir, "s1", log_file, log_format, max_bytes)
+        with open(part2, 'a', encoding='utf-8') as f:
+            f.write(text[cut + 1:])
+        return part2
+
+    def test_export_reads_every_part(self):
+        transcript = os.path.join(self.tmp, "s1.jsonl")
+        with open(transcript, 'w', encoding='utf-8') as f:
+            for n in range(1, 5):
+                for entry in [{"type": "user", "message": {"role": "user", "content": f"prompt {n}"}},
+                              {"type": "assistant", "message": {"content": [{"type": "text", "text": f"a{n}"}]}}]:
+                    f.write(json.dumps(dict(entry, timestamp="2026-03-04T10:11:12.000Z")) + "\n")
+        for log_format, ext in (("text", ".txt"), ("markdown", ".md")):
+            log_file = os.path.join(self.log_dir, BASE + ext)
+            backfill.render_transcript(transcript, log_file, log_format)
+            expected = list(export.iter_log_turns(log_file, log_format))
+            part2 = self._split(log_file, log_format, 100)
+            self.assertEqual(list(export.iter_log_turns(log_file, log_format)), expected, log_format)
+            self.assertEqual(list(export.iter_log_turns(part2, log_format)), expected, log_format)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Tests for hook startup cost — early exit, lazy imports, import/cold-start budgets."""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+from conftest import SCRIPTS_DIR
+
+# Budgets in milliseconds; override on slow machines via environment variables
+UTILS_IMPORT_BUDGET_MS = float(os.environ.get("CONVERSATION_LOGGER_IMPORT_BUDGET_MS", 25))
+STARTUP_BUDGET_MS = float(os.environ.get("CONVERSATION_LOGGER_STARTUP_BUDGET_MS", 40))
+
+# Modules no-op invocations and `import utils` must not load
+HEAVY_MODULES = ("utils", "transcript", "tempfile", "glob", "hashlib", "mmap")
+
+
+def _run(args, stdin=b"", env=None):
+    return subprocess.run([sys.executable] + args, input=stdin, cwd=SCRIPTS_DIR, env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def _importtime(args, stdin=b"", env=None):
+    """Run with -X importtime. Returns {module: cumulative_us}."""
+    result = _run(["-X", "importtime"] + args, stdin, env)
+    modules = {}
+    for line in result.stderr.decode("utf-8", "replace").splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            modules[name.strip()] = int(cumulative)
+        except ValueError:
+            continue  # Header line
+    return modules
+
+
+def _best_of(args, stdin=b"", runs=5):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        _run(args, stdin)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class TestEarlyExit(unittest.TestCase):
+
+    def test_unhandled_event_skips_heavy_imports(self):
+        modules = _importtime(["log-event.py"], b'{"hook_event_name": "Notification"}')
+        self.assertFalse(set(HEAVY_MODULES) & set(modules), modules.keys())
+
+    def test_stop_hook_active_skips_heavy_imports(self):
+        modules = _importtime(["log-response.py"], b'{"stop_hook_active": true}')
+        self.assertFalse(set(HEAVY_MODULES) & set(modules), modules.keys())
+
+    def test_subagent_stop_without_capture_skips_capture_imports(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        payload = {"hook_event_name": "SubagentStop", "session_id": "s1", "cwd": tmp, "subagent_type": "Explore"}
+        modules = _importtime(["log-event.py"], json.dumps(payload).encode(), dict(os.environ, HOME=tmp))
+        self.assertIn("utils", modules)
+        self.assertNotIn("subagents", modules, modules.keys())
+
+
+class TestImportBudget(unittest.TestCase):
+
+    def test_utils_import_is_lazy(self):
+        modules = _importtime(["-c", "import json, datetime; import utils"])
+        self.assertIn("utils", modules)
+        self.assertFalse(set(HEAVY_MODULES[1:]) & set(modules), modules.keys())
+
+    def test_utils_import_within_budget(self):
+        modules = _importtime(["-c", "import json, datetime; import utils"])
+        self.assertLess(modules["utils"] / 1000.0, UTILS_IMPORT_BUDGET_MS)
+
+
+class TestColdStartBudget(unittest.TestCase):
+
+    def test_noop_hook_startup_within_budget(self):
+        baseline = _best_of(["-c", "import json, sys; json.loads(sys.stdin.read())"], b"{}")
+        noop = _best_of(["log-event.py"], b'{"hook_event_name": "Notification"}')
+        self.assertLess(noop - baseline, STARTUP_BUDGET_MS,
+                        f"no-op hook took {noop:.1f} ms vs {baseline:.1f} ms interpreter baseline")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Tests for session statistics — cache counters, sidecars and the merged report."""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import conftest  # noqa: F401  (adds scripts/ to sys.path)
+
+import stats
+import transcript
+import utils
+
+
+def _tool_call(tool_id, name):
+    return {"type": "assistant", "message": {"content": [
+        {"type": "tool_use", "id": tool_id, "name": name, "input": {"file_path": "/a.py"}}]}}
+
+
+def _tool_result(tool_id, output):
+    return {"type": "user", "message": {"content": [
+        {"type": "tool_result", "tool_use_id": tool_id, "content": output}]}}
+
+
+SESSION = [
+    {"type": "user", "message": {"content": "first"}},
+    _tool_call("t1", "Read"), _tool_result("t1", "x" * 100),
+    _tool_call("t2", "Bash"), _tool_result("t2", [{"type": "text", "text": "é" * 10}]),
+    {"type": "user", "message": {"content": "second"}},
+    _tool_call("t3", "Edit"),
+    _tool_result("t3", "The user doesn't want to proceed with this tool use."),
+    {"type": "user", "message": {"content": [{"type": "text", "text": "[Request interrupted by user]"}]}},
+]
+
+
+class _StatsCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.transcript = os.path.join(self.tmp, "s1.jsonl")
+        self.log_dir = os.path.join(self.tmp, "logs")
+
+    def write(self, entries, mode='w'):
+        with open(self.transcript, mode, encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+
+# ---------------------------------------------------------------------------
+# TranscriptCache counters
+# ---------------------------------------------------------------------------
+class TestCacheStats(_StatsCase):
+
+    EXPECTED = {
+        "turns": 2,
+        "tool_calls": {"Read": 1, "Bash": 1, "Edit": 1},
+        "output_bytes": {"Read": 100, "Bash": 20, "Edit": 52},
+        "follow_ups": {"TOOL_REJECTION": 1, "INTERRUPT": 1},
+    }
+
+    def test_counters(self):
+        self.write(SESSION)
+        self.assertEqual(stats.transcript_stats(self.transcript), self.EXPECTED)
+
+    def test_incremental_matches_full_parse(self):
+        self.write(SESSION[:4])
+        utils.update_transcript_cache("s1", self.transcript, temp_dir=self.tmp)
+        self.write(SESSION[4:], mode='a')
+        cache = utils.update_transcript_cache("s1", self.transcript, temp_dir=self.tmp)
+        self.assertEqual(cache.stats(), self.EXPECTED)
+
+    def test_lazy_sizes_match_decoded(self):
+        saved = transcript.LAZY_MIN_BYTES
+        transcript.LAZY_MIN_BYTES = 0
+        try:
+            line = json.dumps(_tool_result("t1", "abc" * 50)).encode('utf-8')
+            self.assertEqual(transcript.LazyEntry(line).tool_results(), [("t1", 150)])
+            # Escapes and list wrappers count as the decoded text, like the decoded path
+            outputs = ['a "quoted"\tline\n', "caf\u00e9 \u2713", [{"type": "text", "text": "one\n"},
+                                                           {"type": "image"}, {"type": "text", "text": "tw\u00f6"}]]
+            for ensure_ascii in (True, False):
+                for output in outputs:
+                    entry = _tool_result("t1", output)
+                    line = json.dumps(entry, ensure_ascii=ensure_ascii).encode('utf-8')
+                    self.assertEqual(transcript.LazyEntry(line).tool_results(),
+                                     transcript.entry_tool_results(entry), output)
+        finally:
+            transcript.LAZY_MIN_BYTES = saved
+
+
+# ---------------------------------------------------------------------------
+# Sidecars and merged report
+# ---------------------------------------------------------------------------
+class TestStatsReport(_StatsCase):
+
+    def test_sidecar_round_trip_and_merge(self):
+        stats.write_session_stats(self.log_dir, "a", {"turns": 4, "tool_calls": {"Read": 3},
+                                                      "output_bytes": {"Read": 30}, "follow_ups": {}})
+        stats.write_session_stats(self.log_dir, "b", {"turns": 6, "tool_calls": {"Read": 1, "Bash": 1},
+                                                      "output_bytes": {"Bash": 5},
+                                                      "follow_ups": {"TOOL_REJECTION": 1, "INTERRUPT": 2}})
+        totals = stats.merge_stats(stats.load_session_stats(self.log_dir).values())
+        self.assertEqual(totals["sessions"], 2)
+        self.assertEqual(totals["turns"], 10)
+        self.assertEqual(totals["tool_calls"], {"Read": 4, "Bash": 1})
+        self.assertAlmostEqual(totals["rejection_rate"], 0.2)
+        self.assertAlmostEqual(totals["interrupt_rate"], 0.2)
+        self.assertIn("Read", stats.format_report(totals))
+
+    def test_missing_sidecars_parsed_and_written(self):
+        self.write(SESSION)
+        sessions = stats.collect_stats(self.log_dir, [self.transcript], jobs=1)
+        self.assertEqual(sessions["s1"]["turns"], 2)
+        self.assertIn("s1", stats.load_session_stats(self.log_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
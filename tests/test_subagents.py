@@ -0,0 +1,199 @@
+"""Tests for subagents.py — sidechain transcript lookup, rendering and queued capture."""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import conftest  # noqa: F401  (adds scripts/ to sys.path)
+
+import subagents
+
+
+def _agent_transcript(path, marker):
+    entries = [
+        {"type": "user", "isSidechain": True, "message": {"role": "user", "content": "Explore the repo"}},
+        {"type": "assistant", "message": {"content": [
+            {"type": "text", "text": f"Looking around {marker}"},
+            {"type": "tool_use", "name": "Grep", "input": {"pattern": "def main"}}]}},
+        {"type": "user", "message": {"content": [
+            {"type": "tool_result", "content": f"main.py:1:def main {marker}"}]}},
+        {"type": "assistant", "message": {"content": [{"type": "text", "text": f"Found it {marker}"}]}},
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+class _SubagentCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.transcript = os.path.join(self.tmp, "s1.jsonl")
+        open(self.transcript, 'w').close()
+        self.agents_dir = os.path.join(self.tmp, "s1", "subagents")
+        os.makedirs(self.agents_dir)
+        self.log_file = os.path.join(self.tmp, "2026-01-01_00-00-00_s1_conversation-log.txt")
+
+    def agent(self, agent_id):
+        path = os.path.join(self.agents_dir, f"agent-{agent_id}.jsonl")
+        _agent_transcript(path, agent_id)
+        return {"id": agent_id, "type": "Explore", "path": path}
+
+    def read(self, path):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+
+# ---------------------------------------------------------------------------
+# Lookup and rendering
+# ---------------------------------------------------------------------------
+class TestRenderSubagent(_SubagentCase):
+
+    def test_find_transcript(self):
+        expected = self.agent("a1")["path"]
+        self.assertEqual(subagents.find_subagent_transcript(self.transcript, "s1", "a1"), expected)
+        self.assertEqual(subagents.find_subagent_transcript("", "s1", "a1", hint=expected), expected)
+        self.assertIsNone(subagents.find_subagent_transcript(self.transcript, "s1", "missing"))
+
+    def test_renders_whole_run(self):
+        rendered = subagents.render_subagent(self.agent("a1"), "text", time.monotonic() + 5)
+        self.assertNotIn("Explore the repo", rendered)
+        for text in ("Looking around a1", "Grep(pattern=def main)", "main.py:1:def main a1", "Found it a1"):
+            self.assertIn(text, rendered)
+
+    def test_past_deadline_returns_none(self):
+        self.assertIsNone(subagents.render_subagent(self.agent("a1"), "text", time.monotonic() - 1))
+
+
+# ---------------------------------------------------------------------------
+# capture_subagents: queue, lock and log output
+# ---------------------------------------------------------------------------
+class TestCaptureSubagents(_SubagentCase):
+
+    def test_inline_drains_whole_queue_in_order(self):
+        subagents.enqueue_subagent("s1", self.agent("a1"), temp_dir=self.tmp)
+        subagents.enqueue_subagent("s1", self.agent("a2"), temp_dir=self.tmp)
+        written = subagents.capture_subagents("s1", self.agent("a3"), "inline", self.log_file, "text",
+                                              temp_dir=self.tmp)
+        self.assertEqual(written, 3)
+        log = self.read(self.log_file)
+        self.assertEqual(log.count("~ SUBAGENT TRANSCRIPT"), 3)
+        self.assertLess(log.index("Found it a1"), log.index("Found it a2"))
+        self.assertLess(log.index("Found it a2"), log.index("Found it a3"))
+        self.assertEqual([n for n in os.listdir(self.tmp) if n.startswith(".subagent_queue_")], [])
+
+    def test_linked_log(self):
+        log_file = self.log_file[:-4] + ".md"
+        subagents.capture_subagents("s1", self.agent("a1"), "linked", log_file, "markdown", temp_dir=self.tmp)
+        linked = subagents.linked_log_path(log_file, "a1")
+        self.assertIn("Found it a1", self.read(linked))
+        self.assertIn(os.path.basename(log_file), self.read(linked))
+        self.assertIn(f"]({os.path.basename(linked)})", self.read(log_file))
+        self.assertNotIn("Found it", self.read(log_file))
+
+    def test_locked_queue_left_for_holder(self):
+        _, lock_file = subagents._queue_paths("s1", self.tmp)
+        open(lock_file, 'w').close()
+        written = subagents.capture_subagents("s1", self.agent("a1"), "inline", self.log_file, "text",
+                                              temp_dir=self.tmp, budget=0.1)
+        self.assertEqual(written, 0)
+        self.assertFalse(os.path.exists(self.log_file))
+        os.remove(lock_file)
+        written = subagents.capture_subagents("s1", self.agent("a2"), "inline", self.log_file, "text",
+                                              temp_dir=self.tmp)
+        self.assertEqual(written, 2)
+
+    def test_killed_drain_is_resumed(self):
+        queue_file, _ = subagents._queue_paths("s1", self.tmp)
+        with open(f"{queue_file}.99999.draining", 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.agent("a1")) + "\n")
+        written = subagents.capture_subagents("s1", self.agent("a2"), "inline", self.log_file, "text",
+                                              temp_dir=self.tmp)
+        self.assertEqual(written, 2)
+        log = self.read(self.log_file)
+        self.assertLess(log.index("Found it a1"), log.index("Found it a2"))
+        self.assertEqual([n for n in os.listdir(self.tmp) if n.startswith(".subagent_queue_")], [])
+
+
+# ---------------------------------------------------------------------------
+# drain_subagents: leftovers written by the Stop and SessionEnd hooks
+# ---------------------------------------------------------------------------
+class TestDrainSubagents(_SubagentCase):
+
+    def test_nothing_pending(self):
+        self.assertEqual(subagents.drain_subagents("s1", "inline", self.log_file, "text", temp_dir=self.tmp), 0)
+        self.assertEqual(sorted(os.listdir(self.tmp)), ["s1", "s1.jsonl"])
+
+    def test_drains_subagent_left_after_deadline(self):
+        written = subagents.capture_subagents("s1", self.agent("a1"), "inline", self.log_file, "text",
+                                              temp_dir=self.tmp, budget=0)
+        self.assertEqual(written, 0)
+        self.assertEqual(subagents.drain_subagents("s1", "inline", self.log_file, "text", temp_dir=self.tmp), 1)
+        self.assertIn("Found it a1", self.read(self.log_file))
+        self.assertEqual(subagents.drain_subagents("s1", "inline", self.log_file, "text", temp_dir=self.tmp), 0)
+
+
+
+# ---------------------------------------------------------------------------
+# Timing: rendering holds the GIL, so a thread pool would not help
+# ---------------------------------------------------------------------------
+def _large_transcript(path, results=400, result_lines=400):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(results):
+            f.write(json.dumps({"type": "assistant", "message": {"content": [
+                {"type": "tool_use", "name": "Grep", "input": {"pattern": f"p{i}"}}]}}) + "\n")
+            f.write(json.dumps({"type": "user", "message": {"content": [
+                {"type": "tool_result", "content": f"match {i}\n" * result_lines}]}}) + "\n")
+
+
+def _best_of(func, runs=3):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class TestCaptureTiming(_SubagentCase):
+
+    def setUp(self):
+        super().setUp()
+        self.agents = []
+        for n in range(4):
+            path = os.path.join(self.agents_dir, f"agent-big{n}.jsonl")
+            _large_transcript(path)
+            self.agents.append({"id": f"big{n}", "type": "Explore", "path": path})
+
+    def test_threads_do_not_speed_up_rendering(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        def render(agent):
+            return subagents.render_subagent(agent, "text", time.monotonic() + 60)
+
+        def threaded():
+            with ThreadPoolExecutor(max_workers=len(self.agents)) as pool:
+                list(pool.map(render, self.agents))
+
+        render(self.agents[0])  # Imports and warm caches out of the timing
+        sequential = _best_of(lambda: [render(agent) for agent in self.agents])
+        self.assertLess(sequential, _best_of(threaded) * 1.5)
+
+    def test_large_transcripts_drained_within_budget(self):
+        for agent in self.agents[:-1]:
+            subagents.enqueue_subagent("s1", agent, temp_dir=self.tmp)
+        start = time.monotonic()
+        written = subagents.capture_subagents("s1", self.agents[-1], "inline", self.log_file, "text",
+                                              temp_dir=self.tmp)
+        self.assertEqual(written, len(self.agents))
+        self.assertLess(time.monotonic() - start, subagents.CAPTURE_BUDGET_SECONDS)
+
+
+if __name__ == '__main__':
+    unittest.main()
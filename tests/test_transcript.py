@@ -0,0 +1,393 @@
+"""Tests for transcript.py — lazy entry decoding, memory-mapped line reader."""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+from conftest import SCRIPTS_DIR, import_script
+
+import durability
+import redact
+import transcript
+import utils
+log_response_mod = import_script("log_response", "log-response.py")
+
+
+def _line(entry):
+    return (json.dumps(entry) + "\n").encode("utf-8")
+
+
+def _block(text):
+    block = transcript.BlockDigest()
+    block.write(text)
+    return block
+
+
+def _user(content):
+    return {"type": "user", "message": {"role": "user", "content": content}}
+
+
+# ---------------------------------------------------------------------------
+# LazyEntry: field access and skeleton classification
+# ---------------------------------------------------------------------------
+class TestLazyEntry(unittest.TestCase):
+
+    def setUp(self):
+        # Force the lazy scanner for every line size
+        self._saved_min = transcript.LAZY_MIN_BYTES
+        transcript.LAZY_MIN_BYTES = 0
+
+    def tearDown(self):
+        transcript.LAZY_MIN_BYTES = self._saved_min
+
+    def test_type_and_get(self):
+        entry = transcript.LazyEntry(_line({"uuid": "u1", "type": "assistant", "n": [1, {"a": "}"}]}))
+        self.assertEqual(entry.type, "assistant")
+        self.assertEqual(entry.get("uuid"), "u1")
+        self.assertEqual(entry.get("n"), [1, {"a": "}"}])
+        self.assertIsNone(entry.get("missing"))
+
+    def test_materialize_matches_json(self):
+        raw = {"type": "user", "message": {"content": [{"type": "text", "text": "a \"quoted\" é"}]}}
+        self.assertEqual(transcript.LazyEntry(_line(raw)).materialize(), raw)
+
+    def test_skeleton_classification_matches_full_entry(self):
+        samples = [
+            _user("Hello"),
+            _user([{"type": "tool_result", "content": "User has answered your questions: x"}]),
+            _user([{"type": "tool_result", "content": "User has approved your plan"}]),
+            _user([{"type": "tool_result", "content": "Exit plan mode? Yes"}]),
+            _user([{"type": "tool_result", "content": "The user doesn't want to proceed"}]),
+            _user([{"type": "tool_result", "content": [{"type": "text", "text": "out"}]}]),
+            _user([{"type": "text", "text": "[Request interrupted by user]"}]),
+            _user([]),
+        ]
+        for raw in samples:
+            lazy = transcript.LazyEntry(_line(raw))
+            self.assertEqual(log_response_mod.classify_user_entry(lazy.skeleton()),
+                             log_response_mod.classify_user_entry(raw))
+
+    def test_skeleton_truncates_large_tool_result(self):
+        big = "The user doesn't want to proceed" + "éx\\" * 100000
+        lazy = transcript.LazyEntry(_line(_user([{"type": "tool_result", "content": big}])))
+        content = lazy.skeleton()["message"]["content"][0]["content"]
+        self.assertLessEqual(len(content), transcript.CLASSIFY_PREFIX_CHARS)
+        self.assertTrue(big.startswith(content))
+
+    def test_malformed_line_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            transcript.LazyEntry(b'{"type": "user", "message": {"content": "abc').skeleton()
+        with self.assertRaises(ValueError):
+            transcript.LazyEntry(b"\n").type
+
+
+# ---------------------------------------------------------------------------
+# collect_last_turn over raw lines
+# ---------------------------------------------------------------------------
+class TestCollectLastTurn(unittest.TestCase):
+
+    def test_collects_only_last_turn(self):
+        lines = [
+            _line(_user("first prompt")),
+            _line({"type": "assistant", "message": {"content": [{"type": "text", "text": "old"}]}}),
+            b"not json\n",
+            _line(_user("second prompt")),
+            _line({"type": "assistant", "message": {"content": [{"type": "text", "text": "new"}]}}),
+            _line(_user([{"type": "tool_result",
+                          "content": "The user doesn't want to proceed. the user said: stop"}])),
+        ]
+        pairs = list(zip(range(len(lines)), lines))
+        follow_ups, outputs, types = log_response_mod.collect_last_turn(pairs, "")
+        outputs = list(outputs)
+        self.assertEqual(follow_ups, [])
+        self.assertEqual(outputs[0], ("text", "new"))
+        self.assertIn("stop", outputs[1][1])
+        self.assertEqual(types.count("user"), 3)
+
+    def test_resume_from_cached_turn_matches_full_parse(self):
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_line(_user("first prompt")))
+            f.write(_line({"type": "assistant", "message": {"content": [
+                {"type": "tool_use", "name": "Write", "input": {"file_path": "/a.py"}}]}}))
+            f.write(_line(_user("second prompt")))
+            f.write(_line({"type": "assistant", "message": {"content": [{"type": "text", "text": "ok"}]}}))
+
+        with transcript.TranscriptReader(path) as reader:
+            cache = transcript.TranscriptCache(path, reader.inode)
+            full = log_response_mod.collect_last_turn(reader.iter_lines(), "", cache)
+            self.assertEqual(cache.offset, reader.size)
+            self.assertEqual(cache.modified_files, ["/a.py"])
+            self.assertEqual(len(cache.turns), 2)
+            resumed = log_response_mod.collect_last_turn(
+                reader.iter_lines(cache.last_turn_offset), "", cache)
+        self.assertEqual((full[0], list(full[1])), (resumed[0], list(resumed[1])))
+        self.assertEqual(len(cache.turns), 2)  # Already recorded lines are not re-recorded
+
+    def test_memory_ceiling_spills_to_lines(self):
+        lines = [_line(_user("prompt"))]
+        for n in range(20):
+            lines.append(_line({"type": "assistant", "message": {"content": [
+                {"type": "tool_use", "name": "Bash", "input": {"command": f"cat {n}"}}]}}))
+            lines.append(_line({"type": "tool_result", "content": f"out {n} " + "x" * 1000}))
+        lines.append(_line(_user([{"type": "text", "text": "[Request interrupted by user]"}])))
+        pairs = list(zip(range(len(lines)), lines))
+        _, unbounded, _ = log_response_mod.collect_last_turn(pairs, "")
+        _, bounded, _ = log_response_mod.collect_last_turn(pairs, "", max_bytes=4096)
+        self.assertEqual(unbounded.spilled, 0)
+        self.assertGreater(bounded.spilled, 30)
+        self.assertEqual(list(bounded), list(unbounded))
+        self.assertEqual(len(bounded), 41)
+        self.assertEqual(list(bounded)[-1], ("interrupt", "  \u23bf  Interrupted"))
+
+    def test_streamed_response_matches_joined_block(self):
+        import io
+        outputs = [("text", "hi"), ("tool_use", {"name": "Bash", "input": {"command": "ls"}}),
+                   ("tool_result", "a\nb")]
+        for log_format in ("text", "markdown"):
+            for parts in (outputs, []):
+                f = io.StringIO()
+                log_response_mod._write_outputs(f, parts, log_format)
+                self.assertEqual(f.getvalue(), log_response_mod.format_outputs(parts, log_format) + "\n")
+
+# ---------------------------------------------------------------------------
+# TurnLedger: exactly-once responses
+# ---------------------------------------------------------------------------
+class TestTurnLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.home = os.path.join(self.tmp, "home")
+        self.cwd = os.path.join(self.tmp, "proj")
+        os.makedirs(self.home)
+        os.makedirs(os.path.join(self.cwd, ".claude"))
+        self.transcript = os.path.join(self.tmp, "s1.jsonl")
+        open(self.transcript, 'w').close()
+        self.uuids = 0
+
+    def add(self, *entries):
+        with open(self.transcript, 'ab') as f:
+            for entry in entries:
+                self.uuids += 1
+                f.write(_line(dict(entry, uuid=f"u{self.uuids}", timestamp="2026-01-01T00:00:00.000Z")))
+
+    def reply(self, text):
+        self.add({"type": "assistant", "message": {"content": [{"type": "text", "text": text}]}})
+
+    def stop(self):
+        payload = {"session_id": "s1", "cwd": self.cwd, "transcript_path": self.transcript}
+        subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, "log-response.py")],
+                       input=json.dumps(payload).encode(), env=dict(os.environ, HOME=self.home),
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def log(self):
+        log_dir = os.path.join(self.cwd, ".claude", "logs")
+        names = [n for n in os.listdir(log_dir) if n.endswith("_conversation-log.txt")]
+        with open(os.path.join(log_dir, names[0]), encoding='utf-8') as f:
+            return f.read()
+
+    def test_unlogged_ranges(self):
+        ranges = log_response_mod.unlogged_ranges
+        self.assertEqual(ranges([0, 50], None, 90), [(50, 90, False)])
+        self.assertEqual(ranges([], None, 90), [(0, 90, False)])
+        self.assertEqual(ranges([0, 50], 90, 90), [])
+        self.assertEqual(ranges([0, 50], 70, 90), [(70, 90, True)])
+        self.assertEqual(ranges([0, 50, 80], 40, 90), [(40, 50, True), (50, 80, False), (80, 90, False)])
+        many = list(range(0, 1000, 10))
+        self.assertEqual(len(ranges(many, 0, 1000)), log_response_mod.MAX_CATCH_UP_TURNS + 1)
+
+    def test_repeated_stop_logs_once(self):
+        self.add(_user("hello"))
+        self.reply("first answer")
+        self.stop()
+        self.stop()
+        self.assertEqual(self.log().count("first answer"), 1)
+        self.assertEqual(self.log().count("CLAUDE ["), 1)
+
+    def test_continued_turn_logs_only_new_lines(self):
+        self.add(_user("hello"))
+        self.reply("first answer")
+        self.stop()
+        self.reply("more after stop")
+        self.stop()
+        log = self.log()
+        self.assertEqual(log.count("first answer"), 1)
+        self.assertEqual(log.count("more after stop"), 1)
+
+    def test_missed_turn_is_caught_up(self):
+        self.add(_user("one"))
+        self.reply("answer one")
+        self.stop()
+        self.add(_user("two"))
+        self.reply("answer two")  # Its Stop never ran
+        self.add(_user("three"))
+        self.reply("answer three")
+        self.stop()
+        log = self.log()
+        self.assertEqual([log.count(f"answer {n}") for n in ("one", "two", "three")], [1, 1, 1])
+        self.assertLess(log.index("answer two"), log.index("answer three"))
+
+    def test_missed_turn_scanned_by_pre_compact_is_caught_up(self):
+        with open(os.path.join(self.cwd, ".claude", "conversation-logger-config.json"), 'w') as f:
+            json.dump({"context_keeper": {"enabled": True, "scope": "project"}}, f)
+        self.add(_user("zero"))
+        self.reply("answer zero")
+        self.stop()
+        self.add(_user("one"))
+        self.reply("answer one")  # Its Stop never ran, but PreCompact scanned the turn into the cache
+        payload = {"hook_event_name": "PreCompact", "trigger": "auto", "session_id": "s1", "cwd": self.cwd,
+                   "transcript_path": self.transcript}
+        subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, "log-event.py")],
+                       input=json.dumps(payload).encode(), env=dict(os.environ, HOME=self.home),
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.add(_user("two"))
+        self.reply("answer two")
+        self.stop()
+        log = self.log()
+        self.assertIn("~ COMPACT", log)
+        self.assertEqual([log.count(f"answer {n}") for n in ("zero", "one", "two")], [1, 1, 1])
+        self.assertLess(log.index("answer one"), log.index("answer two"))
+
+    def test_rewritten_transcript_resets_the_ledger(self):
+        self.add(_user("hello"))
+        self.reply("first answer")
+        with transcript.TranscriptReader(self.transcript) as reader:
+            ledger = transcript.TurnLedger.load(os.path.join(self.tmp, "ledger.json"), reader)
+            self.assertIsNone(ledger.offset)
+            ledger.begin(reader.size, transcript.entry_uuid_before(reader, reader.size), self.transcript,
+                         _block("response"))
+            ledger.commit()
+            self.assertEqual(ledger.uuid, "u2")
+            ledger.save(os.path.join(self.tmp, "ledger.json"))
+            self.assertTrue(transcript.TurnLedger.load(os.path.join(self.tmp, "ledger.json"), reader)
+                            .logged(reader.size))
+        with open(self.transcript, 'r+b') as f:  # Same size, different last entry
+            data = f.read().replace(b'"u2"', b'"u9"')
+            f.seek(0)
+            f.write(data)
+        with transcript.TranscriptReader(self.transcript) as reader:
+            self.assertIsNone(transcript.TurnLedger.load(os.path.join(self.tmp, "ledger.json"), reader).offset)
+
+    def test_pending_write_settles_on_its_block(self):
+        self.add(_user("hello"))
+        log_file = os.path.join(self.tmp, "log.txt")
+        ledger_file = os.path.join(self.tmp, "ledger.json")
+        with open(log_file, 'w') as f:
+            f.write("prompt\n")
+        with transcript.TranscriptReader(self.transcript) as reader:
+            ledger = transcript.TurnLedger(reader.path, reader.inode)
+            ledger.begin(reader.size, "u1", log_file, _block("response\n"))
+            ledger.save(ledger_file)
+            self.assertIsNone(transcript.TurnLedger.load(ledger_file, reader).offset)  # Never written
+            with open(log_file, 'a') as f:
+                f.write("resp")  # Killed mid-write, then another hook appends
+                f.write("next prompt\n")
+            self.assertIsNone(transcript.TurnLedger.load(ledger_file, reader).offset)
+            with open(log_file, 'w') as f:
+                f.write("prompt\nresponse\nnext prompt\n")
+            self.assertEqual(transcript.TurnLedger.load(ledger_file, reader).offset, reader.size)
+
+    def test_dry_run_block_matches_written_bytes(self):
+        outputs = [("text", "caf\u00e9 token GITHUB_TOKEN=abc123"),
+                   ("tool_use", {"name": "Read", "input": {"file_path": "/a.py"}})]
+        responses = [([], outputs), ([("interrupt", "")], outputs)]
+        now = datetime(2026, 1, 1, 12, 0, 0)
+        redactor = redact.build_redactor(True)
+        for log_format in ("text", "markdown"):
+            log_file = os.path.join(self.tmp, f"log-{log_format}")
+            block = transcript.BlockDigest()
+            log_response_mod.write_responses(redact.RedactingWriter(block, redactor), log_file, log_format,
+                                             responses, now)
+            with durability.open_log(log_file, redactor=redactor) as f:
+                log_response_mod.write_responses(f, log_file, log_format, responses, now)
+            self.assertEqual(os.path.getsize(log_file), block.size)
+            self.assertEqual(transcript._digest_at(log_file, 0, block.size), block.hexdigest())
+
+    def test_stop_killed_mid_write_is_caught_up_after_next_prompt(self):
+        def prompt(text):
+            payload = {"prompt": text, "session_id": "s1", "cwd": self.cwd}
+            subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, "log-prompt.py")],
+                           input=json.dumps(payload).encode(), env=dict(os.environ, HOME=self.home),
+                           stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        prompt("zero")
+        self.add(_user("zero"))
+        self.reply("answer zero")
+        self.stop()
+        prompt("one")
+        self.add(_user("one"))
+        self.reply("answer one")
+        # A Stop that recorded its pending write and was killed after the first line
+        log_dir = os.path.join(self.cwd, ".claude", "logs")
+        log_file = os.path.join(log_dir, [n for n in os.listdir(log_dir) if n.endswith(".txt")][0])
+        ledger_file = utils.get_ledger_path(log_dir, "s1")
+        with transcript.TranscriptReader(self.transcript) as reader:
+            ledger = transcript.TurnLedger.load(ledger_file, reader)
+            block = "\U0001f916 CLAUDE [2026-01-01 00:00:00]:\nanswer one\n" + "=" * 80 + "\n\n"
+            ledger.begin(reader.size, transcript.entry_uuid_before(reader, reader.size), log_file, _block(block))
+            ledger.save(ledger_file)
+        with open(log_file, 'a', encoding='utf-8') as f:
+            f.write(block.split("\n")[0] + "\n")
+        prompt("two")
+        self.add(_user("two"))
+        self.reply("answer two")
+        self.stop()
+        log = self.log()
+        self.assertEqual([log.count(f"answer {n}") for n in ("zero", "one", "two")], [1, 1, 1])
+        self.assertLess(log.index("answer one"), log.index("answer two"))
+
+
+# ---------------------------------------------------------------------------
+# TranscriptReader: forward/reverse zero-copy line iteration
+# ---------------------------------------------------------------------------
+class TestTranscriptReader(unittest.TestCase):
+
+    def _write(self, data):
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_forward_lines_with_offsets(self):
+        path = self._write(b'{"a": 1}\n\n{"b": 2}\n{"c": 3}')
+        with transcript.TranscriptReader(path) as reader:
+            lines = [(off, bytes(view)) for off, view in reader.iter_lines()]
+        self.assertEqual(lines, [(0, b'{"a": 1}'), (10, b'{"b": 2}'), (19, b'{"c": 3}')])
+
+    def test_forward_from_offset(self):
+        path = self._write(b'one\ntwo\nthree\n')
+        with transcript.TranscriptReader(path) as reader:
+            self.assertEqual([bytes(v) for _, v in reader.iter_lines(4)], [b"two", b"three"])
+
+    def test_reverse_lines(self):
+        path = self._write(b'one\ntwo\n\nthree\n')
+        with transcript.TranscriptReader(path) as reader:
+            lines = [(off, bytes(view)) for off, view in reader.iter_lines_reverse()]
+        self.assertEqual(lines, [(9, b"three"), (4, b"two"), (0, b"one")])
+
+    def test_yields_memoryviews(self):
+        path = self._write(b'{"a": 1}\n')
+        with transcript.TranscriptReader(path) as reader:
+            for _, view in reader.iter_lines():
+                self.assertIsInstance(view, memoryview)
+                self.assertEqual(transcript.LazyEntry(view).get("a"), 1)
+                del view
+
+    def test_empty_file(self):
+        path = self._write(b"")
+        with transcript.TranscriptReader(path) as reader:
+            self.assertEqual(reader.size, 0)
+            self.assertEqual(list(reader.iter_lines()), [])
+            self.assertEqual(list(reader.iter_lines_reverse()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()